@@ -0,0 +1,195 @@
+"""Audits a password list: scores every entry and summarises the results.
+
+Usage: python audit.py PASSWORDS [--output results.jsonl] [--delimiter :] [--workers 4]
+                        [--reuse reuse.json]
+
+PASSWORDS has one password per line, or "account<delimiter>password" lines
+with --delimiter. Per-entry results are written to --output as JSON lines
+(line number, account if any, score and failed rules; never the password).
+A summary with the score and failed-rule histograms and passwords/sec is
+printed as JSON. --reuse also writes a report of the accounts that share
+identical or near-identical passwords (see reuse.py).
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from reuse import ReuseIndex, reuse_keys
+from strength import MAX_SCORE, RULES, check_batch, failed_from_mask
+
+# Lines are read lazily and handed to a process pool in chunks of
+# AUDIT_CHUNK_SIZE; at most a few chunks per worker are in flight and results
+# are written out as each chunk comes back, so memory use does not grow with
+# the size of the list. Chunks come back in input order. Each chunk is scored
+# in one check_batch() call.
+
+AUDIT_CHUNK_SIZE = 5000
+
+
+def iter_entries(text, delimiter=None):
+    """Yields (line_number, account, password) for each non-empty line."""
+    for line_number, line in enumerate(text, 1):
+        line = line.rstrip("\r\n")
+        if not line:
+            continue
+        account = None
+        if delimiter:
+            account, sep, password = line.partition(delimiter)
+            if not sep:
+                account, password = None, line
+        else:
+            password = line
+        yield line_number, account, password
+
+
+class AuditSummary:
+    """Score and failed-rule histograms for an audit."""
+
+    def __init__(self):
+        self.scores = Counter()
+        self.failed = Counter()
+        self.entries = 0
+        self.seconds = 0.0
+
+    def add(self, score, failed):
+        self.entries += 1
+        self.scores[score] += 1
+        self.failed.update(failed)
+
+    def add_batch(self, scores, failed):
+        """Adds check_batch() results."""
+        self.entries += len(scores)
+        self.scores.update({score: int(count) for score, count in enumerate(np.bincount(scores)) if count})
+        self.failed.update({rule: int(np.count_nonzero(failed >> bit & 1)) for bit, rule in enumerate(RULES)})
+
+    def merge(self, other):
+        self.entries += other.entries
+        self.scores.update(other.scores)
+        self.failed.update(other.failed)
+
+    @property
+    def rate(self):
+        return self.entries / max(self.seconds, 1e-9)
+
+    def to_dict(self):
+        return {
+            'entries': self.entries,
+            'seconds': self.seconds,
+            'passwords_per_second': self.rate,
+            'scores': {score: self.scores[score] for score in range(MAX_SCORE + 1)},
+            'failed_rules': {rule: self.failed[rule] for rule in RULES},
+        }
+
+
+def score_chunk(chunk, with_records=True, reuse_salt=None):
+    """Worker task: scores (line_number, account, password) entries.
+
+    Returns the chunk's AuditSummary, its per-entry results (if asked for)
+    already formatted as JSON lines, so the parent only has to write them,
+    and, given a `reuse_salt`, the arguments for ReuseIndex.add().
+    """
+    summary = AuditSummary()
+    passwords = [password for _, _, password in chunk]
+    scores, failed = check_batch(passwords)
+    summary.add_batch(scores, failed)
+    records = []
+    if with_records:
+        names = {}
+        for (line_number, account, _), entry_score, mask in zip(chunk, scores.tolist(), failed.tolist()):
+            if mask not in names:
+                names[mask] = failed_from_mask(mask)
+            record = {'line': line_number, 'score': entry_score, 'failed': names[mask]}
+            if account is not None:
+                record['account'] = account
+            records.append(json.dumps(record) + "\n")
+    reuse = None
+    if reuse_salt is not None:
+        reuse = ([line_number for line_number, _, _ in chunk], [account for _, account, _ in chunk],
+                 scores.tobytes()) + reuse_keys(passwords, reuse_salt)
+    return summary, "".join(records), reuse
+
+
+def audit(entries, pool, chunk_size=AUDIT_CHUNK_SIZE, with_records=True, max_pending=None, reuse_salt=None):
+    """Scores entries on `pool`, yielding score_chunk() results in input order."""
+    max_pending = max_pending or (os.cpu_count() or 1) * 2
+    entries = iter(entries)
+    pending = deque()
+    while True:
+        while len(pending) < max_pending:
+            chunk = list(islice(entries, chunk_size))
+            if not chunk:
+                break
+            pending.append(pool.submit(score_chunk, chunk, with_records, reuse_salt))
+        if not pending:
+            return
+        yield pending.popleft().result()
+
+
+def run_audit(text, out=None, delimiter=None, workers=None, chunk_size=AUDIT_CHUNK_SIZE, on_progress=None,
+              reuse=None):
+    """Audits the lines of the text stream `text`. Returns an AuditSummary.
+
+    Per-entry results go to the text stream `out` as JSON lines, and every
+    entry's reuse keys to the ReuseIndex `reuse`.
+    `on_progress(summary)` is called after every chunk.
+    """
+    summary = AuditSummary()
+    start = time.perf_counter()
+    reuse_salt = reuse.salt if reuse is not None else None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_summary, records, keys in audit(iter_entries(text, delimiter), pool, chunk_size,
+                                                  out is not None, reuse_salt=reuse_salt):
+            summary.merge(chunk_summary)
+            if out is not None:
+                out.write(records)
+            if keys is not None:
+                reuse.add(*keys)
+            summary.seconds = time.perf_counter() - start
+            if on_progress:
+                on_progress(summary)
+    summary.seconds = time.perf_counter() - start
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("passwords", help="Password list, or - for stdin")
+    parser.add_argument("--output", help="Write per-entry results here as JSON lines")
+    parser.add_argument("--delimiter", help="Split lines into account and password at the first delimiter")
+    parser.add_argument("--workers", type=int, help="Scoring processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=AUDIT_CHUNK_SIZE)
+    parser.add_argument("--reuse", help="Write a report of shared and near-identical passwords here as JSON")
+    args = parser.parse_args()
+
+    if args.passwords == "-":
+        text = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace", newline="")
+    else:
+        text = open(args.passwords, encoding="utf-8", errors="replace", newline="")
+    out = open(args.output, 'w', encoding="utf-8") if args.output else None
+    reuse = ReuseIndex() if args.reuse else None
+    try:
+        summary = run_audit(text, out, args.delimiter, args.workers, args.chunk_size, reuse=reuse)
+    finally:
+        text.close()
+        if out:
+            out.close()
+    result = summary.to_dict()
+    if reuse is not None:
+        report = reuse.to_dict()
+        with open(args.reuse, 'w', encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        result['reuse'] = {name: {key: report[name][key] for key in ('clusters', 'entries', 'cluster_sizes')}
+                           for name in ('identical', 'similar')}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Measures the guess estimator's per-password latency.
+
+Usage: python benchmark_estimator.py [--passwords 2000] [--budget-ms 1.0]
+
+Passwords are random strings and word-and-digit mixes of typical lengths.
+Exits non-zero if the median latency exceeds the budget.
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+
+from estimator import GuessEstimator
+
+ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*"
+SAMPLE_WORDS = ("password", "dragon", "monkey", "summer", "jennifer", "football", "qwerty", "letmein")
+
+
+def make_passwords(count, seed=42):
+    rng = random.Random(seed)
+    passwords = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            passwords.append(''.join(rng.choice(ALPHABET) for _ in range(rng.randint(6, 20))))
+        else:
+            word = rng.choice(SAMPLE_WORDS)
+            word = word.capitalize() if rng.random() < 0.5 else word.replace("a", "@").replace("o", "0")
+            passwords.append(word + str(rng.randint(0, 2030)) + rng.choice(["", "!", "#"]))
+    return passwords
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--passwords", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    estimator = GuessEstimator.load()
+    print(f"loaded {len(estimator.dictionaries):,} words in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    timings = []
+    for password in make_passwords(args.passwords):
+        start = time.perf_counter()
+        estimator.estimate(password)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p50 = statistics.median(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"per password: p50 {p50:.3f} ms, p99 {p99:.3f} ms, max {timings[-1]:.3f} ms")
+    if p50 > args.budget_ms:
+        raise SystemExit(f"median latency {p50:.3f} ms is over the {args.budget_ms} ms budget")
+
+
+if __name__ == "__main__":
+    main()
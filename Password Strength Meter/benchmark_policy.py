@@ -0,0 +1,113 @@
+"""Benchmarks password scoring: the original regex checks, the compiled policy and the batch scorer.
+
+Usage: python benchmark_policy.py [--passwords 1000000] [--parity 100000] [--single-runs 20000]
+
+The first --parity passwords are checked first, and the benchmark stops if
+any of them scores differently: the compiled policy against the original
+five-regex check, and check_batch() against scoring one password at a
+time. Then every path is timed over all --passwords. One password at a
+time the original and the policy are about as fast, as call overhead
+dominates for passwords this short; the gain is check_batch().
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from strength import DEFAULT_POLICY, check_batch, failed_from_mask, failed_rules, score
+
+ALPHABET = string.ascii_letters + string.digits + string.punctuation + " éß٣Ａ😀"
+
+
+def original_check_password_strength(password):
+    """The app's original five-regex check_password_strength()."""
+    score = 0
+    suggestions = []
+    if len(password) >= 8:
+        score += 1
+    else:
+        suggestions.append("Make the password at least 8 characters long.")
+    if re.search(r"[A-Z]", password) and re.search(r"[a-z]", password):
+        score += 1
+    else:
+        suggestions.append("Include both uppercase and lowercase letters.")
+    if re.search(r"\d", password):
+        score += 1
+    else:
+        suggestions.append("Include at least one number (0-9).")
+    if re.search(r"[!@#$%^&*]", password):
+        score += 1
+    else:
+        suggestions.append("Include at least one special character (!@#$%^&*).")
+    return score, suggestions
+
+
+def make_passwords(count, seed=42):
+    rng = random.Random(seed)
+    return [''.join(rng.choices(ALPHABET, k=rng.randint(0, 20))) for _ in range(count)]
+
+
+def score_each(passwords):
+    """Scores passwords one at a time, as the Check a Password tab does."""
+    results = []
+    for password in passwords:
+        failed = failed_rules(password)
+        results.append((score(failed), failed))
+    return results
+
+
+def check_parity(passwords):
+    """Returns the passwords that score differently on any two paths."""
+    mismatches = [p for p in passwords if DEFAULT_POLICY.check(p) != original_check_password_strength(p)]
+    scores, failed = check_batch(passwords)
+    batch = [(entry_score, failed_from_mask(mask)) for entry_score, mask in zip(scores.tolist(), failed.tolist())]
+    mismatches += [p for p, expected, got in zip(passwords, score_each(passwords), batch) if expected != got]
+    return mismatches
+
+
+def time_single(check, passwords, runs):
+    start = time.perf_counter()
+    for i in range(runs):
+        check(passwords[i % len(passwords)])
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def timed(run, passwords):
+    start = time.perf_counter()
+    run(passwords)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--passwords", type=int, default=1_000_000)
+    parser.add_argument("--parity", type=int, default=100_000)
+    parser.add_argument("--single-runs", type=int, default=20_000)
+    args = parser.parse_args()
+
+    passwords = make_passwords(args.passwords)
+    sample = passwords[:args.parity] + ["", "Aa1!aaaa", "a" * 1000]
+    mismatches = check_parity(sample)
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} passwords score differently, e.g. {mismatches[0]!r}")
+    print(f"parity: {len(sample)} passwords score identically")
+
+    print(f"{'':>12} {'single us':>10} {'seconds':>8} {'passwords/sec':>14}")
+    rows = [
+        ("original", original_check_password_strength, lambda ps: [original_check_password_strength(p) for p in ps]),
+        ("policy", DEFAULT_POLICY.check, lambda ps: [DEFAULT_POLICY.check(p) for p in ps]),
+        ("score_each", None, score_each),
+        ("check_batch", None, check_batch),
+    ]
+    seconds = {}
+    for label, check, run in rows:
+        single = f"{time_single(check, passwords, args.single_runs):.2f}" if check else ""
+        seconds[label] = timed(run, passwords)
+        print(f"{label:>12} {single:>10} {seconds[label]:>8.2f} {len(passwords) / seconds[label]:>14,.0f}")
+    print(f"speedup: {seconds['score_each'] / seconds['check_batch']:.1f}x for check_batch() "
+          f"over score_each() on {len(passwords):,} passwords")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Builds the offline breached-password index used by the strength check.
+
+Usage: python breached.py build [LIST] [INDEX] [--sha1] [--bloom]
+       python breached.py check [INDEX] PASSWORD
+
+LIST has one password per line, or with --sha1 one hex SHA-1 hash per line
+(optionally followed by ":count", as in the Pwned Passwords downloads).
+--bloom also writes INDEX.bloom, a Bloom filter checked before the index.
+
+No index is bundled. INDEX defaults to breached.idx next to this file (or
+$BREACHED_INDEX), which is where the strength check looks, and LIST to the
+common passwords in dictionaries/passwords.txt, so a bare
+`python breached.py build` gives the app a small working index. For real
+coverage, download the Pwned Passwords SHA-1 list (e.g. with the
+PwnedPasswordsDownloader tool) and run
+`python breached.py build pwnedpasswords.txt --sha1 --bloom`.
+"""
+import argparse
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+import numpy as np
+
+# --- Breached Password Index ---
+# The index holds the first 8 bytes of the SHA-1 of every listed password,
+# sorted, after a fan-out table of where each 2-byte prefix starts. It is
+# memory-mapped, so a lookup reads one fan-out entry and binary searches a
+# few records of one bucket; the operating system pages in only what is
+# touched, however large the file is. The optional Bloom filter answers most
+# misses from a handful of bits without touching the index at all. It is
+# built with NumPy, BLOOM_CHUNK keys at a time, straight into a memory-mapped
+# file, so building one for hundreds of millions of keys needs neither a
+# Python loop per key nor the whole filter in memory.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX = os.environ.get("BREACHED_INDEX", os.path.join(HERE, "breached.idx"))
+DEFAULT_LIST = os.path.join(HERE, "dictionaries", "passwords.txt")
+
+INDEX_MAGIC = b"PWSHA1IX"
+BLOOM_MAGIC = b"PWBLOOM1"
+RECORD_BYTES = 8 # Leading SHA-1 bytes kept per password
+HEADER = struct.Struct(">8sQ") # Magic, record count
+FANOUT_BUCKETS = 1 << 16
+FANOUT = struct.Struct(f">{FANOUT_BUCKETS + 1}Q")
+BLOOM_HEADER = struct.Struct(">8sIQ") # Magic, hash count, bit count
+BLOOM_BITS_PER_ENTRY = 10 # About a 1% false-positive rate
+BLOOM_HASHES = 7
+RUN_SIZE = 2_000_000 # Records sorted in memory at once while building
+BLOOM_CHUNK = 1 << 20 # Index records hashed into the Bloom filter at once
+MASK_64 = (1 << 64) - 1
+
+
+def password_key(password):
+    """The 64-bit index key of a password (str or UTF-8 bytes)."""
+    if isinstance(password, str):
+        password = password.encode("utf-8", "surrogatepass")
+    return int.from_bytes(hashlib.sha1(password).digest()[:RECORD_BYTES], "big")
+
+
+def bloom_positions(key, bits, hashes):
+    """Bit positions of a key, by double hashing its two 32-bit halves."""
+    step = (((key << 32) | (key >> 32)) & MASK_64) | 1
+    return [(key + i * step) % bits for i in range(hashes)]
+
+
+class BreachedIndex:
+    """Read-only, memory-mapped lookup of breached passwords."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a breached-password index")
+        self._records = HEADER.size + FANOUT.size
+        self._bloom = None
+        if os.path.exists(path + ".bloom"):
+            with open(path + ".bloom", 'rb') as f:
+                self._bloom = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self._hashes, self._bits = BLOOM_HEADER.unpack_from(self._bloom, 0)
+            if magic != BLOOM_MAGIC:
+                raise ValueError(f"{path}.bloom is not a Bloom filter")
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, password):
+        key = password_key(password)
+        if self._bloom is not None and not self._maybe_contains(key):
+            return False
+        bucket = key >> 48
+        lo, hi = struct.unpack_from(">QQ", self._map, HEADER.size + bucket * 8)
+        target = key.to_bytes(RECORD_BYTES, "big")
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = self._records + mid * RECORD_BYTES
+            record = self._map[offset:offset + RECORD_BYTES]
+            if record < target:
+                lo = mid + 1
+            elif record > target:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def _maybe_contains(self, key):
+        """Checks the Bloom filter, stopping at the first clear bit."""
+        step = (((key << 32) | (key >> 32)) & MASK_64) | 1
+        for i in range(self._hashes):
+            position = (key + i * step) % self._bits
+            if not self._bloom[BLOOM_HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def close(self):
+        self._map.close()
+        if self._bloom is not None:
+            self._bloom.close()
+
+
+def read_keys(path, hashed=False):
+    """Yields the index key of every entry in a plain-text list."""
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.rstrip(b"\r\n")
+            if not line:
+                continue
+            if hashed:
+                yield int(line.split(b":", 1)[0][:RECORD_BYTES * 2], 16)
+            else:
+                yield password_key(line)
+
+
+def write_run(keys, directory):
+    """Sorts keys and writes them to a temporary run file. Returns its path."""
+    run = array('Q', sorted(keys))
+    if sys.byteorder == "little":
+        run.byteswap() # Runs are stored big-endian, like the index
+    fd, path = tempfile.mkstemp(suffix=".run", dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        run.tofile(f)
+    return path
+
+
+def read_records(f):
+    """Yields the keys stored from the current position of a binary file to its end."""
+    while True:
+        block = f.read(RECORD_BYTES * 65536)
+        if not block:
+            return
+        yield from (int.from_bytes(block[i:i + RECORD_BYTES], "big")
+                    for i in range(0, len(block), RECORD_BYTES))
+
+
+def read_run(path):
+    with open(path, 'rb') as f:
+        yield from read_records(f)
+
+
+def build_index(list_path, index_path, hashed=False, bloom=False):
+    """Builds an index (and optionally its Bloom filter) from a plain-text list.
+
+    Keys are sorted in runs of RUN_SIZE and merged, so memory use does not
+    depend on the size of the list. Returns the number of distinct entries.
+    """
+    directory = os.path.dirname(os.path.abspath(index_path))
+    runs, keys = [], []
+    try:
+        for key in read_keys(list_path, hashed):
+            keys.append(key)
+            if len(keys) >= RUN_SIZE:
+                runs.append(write_run(keys, directory))
+                keys = []
+        if keys or not runs:
+            runs.append(write_run(keys, directory))
+        del keys
+
+        fanout = [0] * (FANOUT_BUCKETS + 1)
+        count = 0
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, 'wb') as out:
+            out.seek(HEADER.size + FANOUT.size)
+            previous = None
+            for key in heapq.merge(*(read_run(run) for run in runs)):
+                if key == previous:
+                    continue
+                previous = key
+                out.write(key.to_bytes(RECORD_BYTES, "big"))
+                fanout[(key >> 48) + 1] += 1
+                count += 1
+            for bucket in range(FANOUT_BUCKETS):
+                fanout[bucket + 1] += fanout[bucket]
+            out.seek(0)
+            out.write(HEADER.pack(INDEX_MAGIC, count))
+            out.write(FANOUT.pack(*fanout))
+        os.replace(tmp_path, index_path)
+    finally:
+        for run in runs:
+            os.remove(run)
+
+    if bloom:
+        build_bloom(index_path, count)
+    elif os.path.exists(index_path + ".bloom"):
+        os.remove(index_path + ".bloom") # A stale filter would hide new entries
+    return count
+
+
+def build_bloom(index_path, count):
+    """Writes INDEX.bloom for the keys of an existing index."""
+    bits = max(count * BLOOM_BITS_PER_ENTRY, 64)
+    tmp_path = index_path + ".bloom.tmp"
+    with open(tmp_path, 'wb') as out:
+        out.write(BLOOM_HEADER.pack(BLOOM_MAGIC, BLOOM_HASHES, bits))
+        out.truncate(BLOOM_HEADER.size + (bits + 7) // 8)
+    filter_bits = np.memmap(tmp_path, dtype=np.uint8, mode='r+', offset=BLOOM_HEADER.size)
+    keys = np.memmap(index_path, dtype='>u8', mode='r', offset=HEADER.size + FANOUT.size, shape=(count,))
+    for start in range(0, count, BLOOM_CHUNK):
+        for position in bloom_positions_batch(keys[start:start + BLOOM_CHUNK], bits, BLOOM_HASHES):
+            np.bitwise_or.at(filter_bits, position >> np.uint64(3),
+                             np.left_shift(np.uint8(1), (position & np.uint64(7)).astype(np.uint8)))
+    filter_bits.flush()
+    del filter_bits, keys
+    os.replace(tmp_path, index_path + ".bloom")
+
+
+def bloom_positions_batch(keys, bits, hashes):
+    """bloom_positions() for an array of keys: yields one array of positions per hash.
+
+    (key + i * step) % bits is worked out as (key % bits + i * (step % bits))
+    % bits, which stays exact in 64-bit arithmetic where the sum would not.
+    """
+    keys = keys.astype(np.uint64)
+    step = ((keys << np.uint64(32)) | (keys >> np.uint64(32))) | np.uint64(1)
+    bits = np.uint64(bits)
+    base, step = keys % bits, step % bits
+    for i in range(hashes):
+        yield (base + np.uint64(i) * step) % bits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build an index from a plain-text list")
+    build.add_argument("list", nargs="?", default=DEFAULT_LIST)
+    build.add_argument("index", nargs="?", default=DEFAULT_INDEX)
+    build.add_argument("--sha1", action="store_true", help="LIST holds hex SHA-1 hashes, not passwords")
+    build.add_argument("--bloom", action="store_true", help="Also write a Bloom filter")
+    check = commands.add_parser("check", help="Look a password up in an index")
+    check.add_argument("index", nargs="?", default=DEFAULT_INDEX)
+    check.add_argument("password")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_index(args.list, args.index, args.sha1, args.bloom)
+        print(f"Indexed {count:,} distinct entries in {args.index}")
+    else:
+        index = BreachedIndex(args.index)
+        found = args.password in index
+        print("breached" if found else "not found")
+        sys.exit(0 if found else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,620 @@
+import math
+import os
+import re
+from array import array
+from datetime import date
+
+# --- Guess Estimator ---
+# Estimates how many guesses an attacker needs, the way zxcvbn does. Every
+# substring that matches a known pattern (dictionary word, possibly reversed
+# or with l33t substitutions; keyboard walk; repeat; sequence; date or
+# recent year) becomes a match with its own guess count. A dynamic program
+# over the password then picks the sequence of matches, with brute force
+# filling the gaps, that needs the fewest guesses overall.
+
+DICTIONARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dictionaries")
+MAX_ANALYZED_LENGTH = 64 # Characters after this are not matched against patterns
+TAIL_GUESSES = 50 # Fixed factor for the unanalyzed tail, so padding cannot buy a high score
+REFERENCE_YEAR = date.today().year
+MIN_YEAR_SPACE = 20
+DATE_MIN_YEAR = 1000
+DATE_MAX_YEAR = 2050
+BRUTEFORCE_CARDINALITY = 10
+MIN_GUESSES_BEFORE_GROWING_SEQUENCE = 10000
+MIN_SUBMATCH_GUESSES_SINGLE_CHAR = 10
+MIN_SUBMATCH_GUESSES_MULTI_CHAR = 50
+MAX_SEQUENCE_DELTA = 5
+SCORE_THRESHOLDS = (1e3 + 5, 1e6 + 5, 1e8 + 5, 1e10 + 5) # Guesses needed for scores 1-4
+OFFLINE_GUESSES_PER_SECOND = 1e4 # A slow password hash (bcrypt, scrypt, ...)
+
+L33T_TABLE = {
+    'a': "4@", 'b': "8", 'c': "({[<", 'e': "3", 'g': "69", 'i': "1!|", 'l': "1|7",
+    'o': "0", 's': "$5", 't': "+7", 'x': "%", 'z': "2",
+}
+UNLEET = {}
+for _letter, _subs in L33T_TABLE.items():
+    for _sub in _subs:
+        UNLEET.setdefault(_sub, []).append(_letter)
+
+QWERTY_ROWS = (
+    ("`~", "1!", "2@", "3#", "4$", "5%", "6^", "7&", "8*", "9(", "0)", "-_", "=+"),
+    ("qQ", "wW", "eE", "rR", "tT", "yY", "uU", "iI", "oO", "pP", "[{", "]}", "\\|"),
+    ("aA", "sS", "dD", "fF", "gG", "hH", "jJ", "kK", "lL", ";:", "'\""),
+    ("zZ", "xX", "cC", "vV", "bB", "nN", "mM", ",<", ".>", "/?"),
+)
+QWERTY_ROW_OFFSETS = (0, 1.5, 1.75, 2.25) # How far each row is shifted right, in keys
+KEYPAD_ROWS = (("/", "*", "-"), ("7", "8", "9"), ("4", "5", "6"), ("1", "2", "3"), ("0", "."))
+
+DATE_SPLITS = {
+    4: ((1, 2), (2, 3)),
+    5: ((1, 3), (2, 3)),
+    6: ((1, 2), (2, 4), (4, 5)),
+    7: ((1, 3), (2, 3), (4, 5), (4, 6)),
+    8: ((2, 4), (4, 6)),
+}
+DATE_WITH_SEPARATOR = re.compile(r"(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4})")
+RECENT_YEAR = re.compile(r"19\d\d|20\d\d")
+REPEAT_GREEDY = re.compile(r"(.+)\1+")
+REPEAT_LAZY = re.compile(r"(.+?)\1+")
+REPEAT_LAZY_ANCHORED = re.compile(r"^(.+?)\1+$")
+
+
+class Match:
+    """One pattern found in the password, covering password[i:j + 1]."""
+
+    __slots__ = ('pattern', 'i', 'j', 'token', 'guesses', 'details')
+
+    def __init__(self, pattern, i, j, token, guesses=None, **details):
+        self.pattern = pattern
+        self.i = i
+        self.j = j
+        self.token = token
+        self.guesses = guesses
+        self.details = details
+
+    def __repr__(self):
+        return f"Match({self.pattern!r}, {self.i}, {self.j}, {self.token!r}, guesses={self.guesses})"
+
+
+class Dictionaries:
+    """Ranked word lists merged into one sorted array.
+
+    Each word keeps its best (lowest) rank and the list it came from. Every
+    prefix of every word is kept too, so the matcher can stop extending a
+    substring as soon as no word can start with it.
+    """
+
+    def __init__(self, lists):
+        best = {}
+        for name, words in lists.items():
+            for rank, word in enumerate(words, 1):
+                if word and (word not in best or rank < best[word][1]):
+                    best[word] = (name, rank)
+        self.names = sorted(lists)
+        self.words = sorted(best)
+        self.ranks = array('I', (best[word][1] for word in self.words))
+        self.sources = array('B', (self.names.index(best[word][0]) for word in self.words))
+        self.index = {word: i for i, word in enumerate(self.words)}
+        self.prefixes = frozenset(word[:k] for word in self.words for k in range(1, len(word) + 1))
+
+    @classmethod
+    def load(cls, directory=DICTIONARY_DIR):
+        """Reads every NAME.txt in `directory`: one word per line, most common first."""
+        lists = {}
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".txt"):
+                with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                    lists[filename[:-4]] = [line.strip().lower() for line in f if line.strip()]
+        return cls(lists)
+
+    def __len__(self):
+        return len(self.words)
+
+
+
+def build_keyboard_graph(rows, offsets=None):
+    """Maps each character to the keys around its key, one entry per direction.
+
+    Keys are strings of the characters they type (unshifted first). With
+    `offsets`, keys in neighbouring rows are adjacent when they overlap, as on
+    a staggered keyboard; without, the grid's eight neighbours count.
+    """
+    positions = {}
+    for y, row in enumerate(rows):
+        for x, key in enumerate(row):
+            positions[key] = (x + (offsets[y] if offsets else 0), y)
+    if offsets:
+        directions = [(-1, 0), (1, 0), (-0.5, -1), (0.5, -1), (-0.5, 1), (0.5, 1)]
+    else:
+        directions = [(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dx or dy]
+    graph = {}
+    for key, (x, y) in positions.items():
+        neighbours = []
+        for dx, dy in directions:
+            target = [other for other, (ox, oy) in positions.items()
+                      if oy == y + dy and abs(ox - (x + dx)) < (0.5 if offsets else 0.01)]
+            neighbours.append(target[0] if target else None)
+        for char in key:
+            graph[char] = neighbours
+    return graph
+
+
+KEYBOARD_GRAPHS = {
+    'qwerty': build_keyboard_graph(QWERTY_ROWS, QWERTY_ROW_OFFSETS),
+    'keypad': build_keyboard_graph(KEYPAD_ROWS),
+}
+
+
+def _graph_stats(rows, graph):
+    """(number of keys, average number of neighbours) for a keyboard's guess counts."""
+    keys = [key for row in rows for key in row]
+    degrees = [sum(1 for neighbour in graph[key[0]] if neighbour) for key in keys]
+    return len(keys), sum(degrees) / len(degrees)
+
+
+KEYBOARD_STATS = {
+    'qwerty': _graph_stats(QWERTY_ROWS, KEYBOARD_GRAPHS['qwerty']),
+    'keypad': _graph_stats(KEYPAD_ROWS, KEYBOARD_GRAPHS['keypad']),
+}
+
+
+# --- Matchers ---
+
+def dictionary_matches(password, dictionaries):
+    """Dictionary words, forwards and reversed, with or without l33t substitutions."""
+    matches = []
+    lower = password.lower()
+    n = len(lower)
+    words, prefixes = dictionaries.index, dictionaries.prefixes
+    for reversed_ in (False, True):
+        text = lower[::-1] if reversed_ else lower
+        for i in range(n):
+            # Depth-first over the letters each character could stand for
+            stack = [(i, "", ())]
+            while stack:
+                j, prefix, subs = stack.pop()
+                if j == n:
+                    continue
+                char = text[j]
+                mapped = dict(subs).get(char) # A substitution reads the same way throughout a word
+                options = [(char, subs)] if mapped is None else [(mapped, subs)]
+                if mapped is None:
+                    options += [(letter, subs + ((char, letter),)) for letter in UNLEET.get(char, ())]
+                for letter, letter_subs in options:
+                    candidate = prefix + letter
+                    if candidate not in prefixes:
+                        continue
+                    index = words.get(candidate, -1)
+                    if index >= 0 and not (reversed_ and candidate == candidate[::-1]): # Found forwards too
+                        start, end = (n - 1 - j, n - 1 - i) if reversed_ else (i, j)
+                        matches.append(Match(
+                            'dictionary', start, end, password[start:end + 1],
+                            word=candidate, rank=dictionaries.ranks[index],
+                            dictionary=dictionaries.names[dictionaries.sources[index]],
+                            reversed=reversed_, l33t=dict(letter_subs),
+                        ))
+                    stack.append((j + 1, candidate, letter_subs))
+    return matches
+
+
+def spatial_matches(password):
+    matches = []
+    for name, graph in KEYBOARD_GRAPHS.items():
+        n = len(password)
+        i = 0
+        while i < n - 1:
+            j = i + 1
+            last_direction = None
+            turns = 0
+            shifted = 1 if name == 'qwerty' and password[i] in graph and \
+                _is_shifted(password[i], graph) else 0
+            while True:
+                found = False
+                if j < n and password[j - 1] in graph:
+                    for direction, key in enumerate(graph[password[j - 1]]):
+                        if key and password[j] in key:
+                            found = True
+                            if key.index(password[j]) == 1:
+                                shifted += 1
+                            if direction != last_direction:
+                                turns += 1
+                                last_direction = direction
+                            break
+                if found:
+                    j += 1
+                    continue
+                if j - i > 2:
+                    matches.append(Match('spatial', i, j - 1, password[i:j], graph=name,
+                                         turns=turns, shifted=shifted))
+                i = j
+                break
+    return matches
+
+
+def _is_shifted(char, graph):
+    """Whether `char` is the shifted character on its qwerty key."""
+    for row in QWERTY_ROWS:
+        for key in row:
+            if char in key:
+                return key.index(char) == 1
+    return False
+
+
+def repeat_matches(password, estimator):
+    matches = []
+    last_index = 0
+    while last_index < len(password):
+        greedy = REPEAT_GREEDY.search(password, last_index)
+        if not greedy:
+            break
+        lazy = REPEAT_LAZY.search(password, last_index)
+        if len(greedy.group(0)) > len(lazy.group(0)):
+            match = greedy
+            base = REPEAT_LAZY_ANCHORED.match(match.group(0)).group(1)
+        else:
+            match = lazy
+            base = match.group(1)
+        i, j = match.start(), match.end() - 1
+        base_guesses = estimator.most_guessable(base)[0]
+        matches.append(Match('repeat', i, j, match.group(0), base_token=base,
+                             base_guesses=base_guesses, repeat_count=len(match.group(0)) // len(base)))
+        last_index = j + 1
+    return matches
+
+
+def sequence_matches(password):
+    if len(password) < 2:
+        return []
+    matches = []
+
+    def add(i, j, delta):
+        if (j - i > 1 or abs(delta) == 1) and 0 < abs(delta) <= MAX_SEQUENCE_DELTA:
+            matches.append(Match('sequence', i, j, password[i:j + 1], ascending=delta > 0))
+
+    i = 0
+    last_delta = None
+    for k in range(1, len(password)):
+        delta = ord(password[k]) - ord(password[k - 1])
+        if last_delta is None:
+            last_delta = delta
+        if delta == last_delta:
+            continue
+        add(i, k - 1, last_delta)
+        i = k - 1
+        last_delta = delta
+    add(i, len(password) - 1, last_delta)
+    return matches
+
+
+def year_matches(password):
+    return [Match('year', m.start(), m.end() - 1, m.group(0), year=int(m.group(0)))
+            for m in RECENT_YEAR.finditer(password)]
+
+
+def date_matches(password):
+    matches = []
+    n = len(password)
+    for i in range(n - 3):
+        for j in range(i + 3, min(i + 8, n)):
+            token = password[i:j + 1]
+            if not token.isdigit():
+                break
+            candidates = []
+            for k, l in DATE_SPLITS.get(len(token), ()):
+                dmy = _map_ints_to_dmy((int(token[:k]), int(token[k:l]), int(token[l:])))
+                if dmy:
+                    candidates.append(dmy)
+            if candidates:
+                year, month, day = min(candidates, key=lambda dmy: abs(dmy[0] - REFERENCE_YEAR))
+                matches.append(Match('date', i, j, token, separator="", year=year, month=month, day=day))
+    for i in range(n - 5):
+        for j in range(i + 5, min(i + 10, n)):
+            found = DATE_WITH_SEPARATOR.fullmatch(password, i, j + 1)
+            if found:
+                dmy = _map_ints_to_dmy((int(found.group(1)), int(found.group(3)), int(found.group(4))))
+                if dmy:
+                    matches.append(Match('date', i, j, found.group(0), separator=found.group(2),
+                                         year=dmy[0], month=dmy[1], day=dmy[2]))
+    # Drop dates inside longer dates, such as "1/1/91" in "11/1/91": a span is
+    # inside another if one starting earlier reaches as far, or one starting
+    # at the same place reaches further.
+    end_at = [-1] * n
+    for match in matches:
+        end_at[match.i] = max(end_at[match.i], match.j)
+    end_before = [-1] * n
+    for i in range(1, n):
+        end_before[i] = max(end_before[i - 1], end_at[i - 1])
+    return [match for match in matches if end_before[match.i] < match.j and end_at[match.i] <= match.j]
+
+
+def _map_ints_to_dmy(ints):
+    """(year, month, day) for three numbers that read as a date, else None."""
+    if ints[1] > 31 or ints[1] <= 0:
+        return None
+    over_12 = over_31 = under_1 = 0
+    for value in ints:
+        if 99 < value < DATE_MIN_YEAR or value > DATE_MAX_YEAR:
+            return None
+        over_31 += value > 31
+        over_12 += value > 12
+        under_1 += value <= 0
+    if over_31 >= 2 or over_12 == 3 or under_1 >= 2:
+        return None
+    orders = ((ints[2], ints[:2]), (ints[0], ints[1:]))
+    for year, rest in orders:
+        if DATE_MIN_YEAR <= year <= DATE_MAX_YEAR:
+            day_month = _map_ints_to_dm(rest)
+            return (year,) + day_month if day_month else None
+    for year, rest in orders:
+        day_month = _map_ints_to_dm(rest)
+        if day_month:
+            year = year if year > 99 else (1900 + year if year > 50 else 2000 + year)
+            return (year,) + day_month
+    return None
+
+
+def _map_ints_to_dm(ints):
+    """(month, day) for two numbers that read as a day and month in either order."""
+    for day, month in (ints, ints[::-1]):
+        if 1 <= day <= 31 and 1 <= month <= 12:
+            return month, day
+    return None
+
+
+# --- Guess Counts ---
+
+def n_choose_k(n, k):
+    return math.comb(n, k) if 0 <= k <= n else 0
+
+
+def uppercase_variations(token):
+    if token.islower() or not any(char.isalpha() for char in token):
+        return 1
+    if token.isupper() or (token[0].isupper() and token[1:].islower()) or \
+            (token[-1].isupper() and token[:-1].islower()):
+        return 2
+    upper = sum(1 for char in token if char.isupper())
+    lower = sum(1 for char in token if char.islower())
+    return sum(n_choose_k(upper + lower, i) for i in range(1, min(upper, lower) + 1))
+
+
+def l33t_variations(match):
+    if not match.details['l33t']:
+        return 1
+    variations = 1
+    token = match.token.lower()
+    for sub, letter in match.details['l33t'].items():
+        subbed = token.count(sub)
+        unsubbed = token.count(letter)
+        if subbed == 0 or unsubbed == 0:
+            variations *= 2
+        else:
+            variations *= sum(n_choose_k(subbed + unsubbed, i) for i in range(1, min(subbed, unsubbed) + 1))
+    return variations
+
+
+def pattern_guesses(match):
+    pattern = match.pattern
+    details = match.details
+    if pattern == 'bruteforce':
+        return float(BRUTEFORCE_CARDINALITY) ** len(match.token)
+    if pattern == 'dictionary':
+        guesses = details['rank'] * uppercase_variations(match.token) * l33t_variations(match)
+        return guesses * 2 if details['reversed'] else guesses
+    if pattern == 'spatial':
+        starts, degree = KEYBOARD_STATS[details['graph']]
+        length, turns = len(match.token), details['turns']
+        guesses = 0.0
+        for i in range(2, length + 1):
+            for j in range(1, min(turns, i - 1) + 1):
+                guesses += n_choose_k(i - 1, j - 1) * starts * degree ** j
+        shifted = details['shifted']
+        if shifted:
+            unshifted = length - shifted
+            if unshifted == 0:
+                guesses *= 2
+            else:
+                guesses *= sum(n_choose_k(shifted + unshifted, i) for i in range(1, min(shifted, unshifted) + 1))
+        return guesses
+    if pattern == 'repeat':
+        return details['base_guesses'] * details['repeat_count']
+    if pattern == 'sequence':
+        first = match.token[0]
+        if first in "aAzZ019":
+            base = 4
+        elif first.isdigit():
+            base = 10
+        else:
+            base = 26
+        return base * len(match.token) * (1 if details['ascending'] else 2)
+    if pattern == 'year':
+        return max(abs(details['year'] - REFERENCE_YEAR), MIN_YEAR_SPACE)
+    if pattern == 'date':
+        guesses = max(abs(details['year'] - REFERENCE_YEAR), MIN_YEAR_SPACE) * 365
+        return guesses * 4 if details['separator'] else guesses
+    raise ValueError(f"unknown pattern {pattern}")
+
+
+def estimate_guesses(match, password_length):
+    if match.guesses is None:
+        minimum = 1
+        if len(match.token) < password_length:
+            minimum = MIN_SUBMATCH_GUESSES_SINGLE_CHAR if len(match.token) == 1 else MIN_SUBMATCH_GUESSES_MULTI_CHAR
+        match.guesses = max(pattern_guesses(match), minimum)
+    return match.guesses
+
+
+# --- Estimator ---
+
+class Estimate:
+    """The result of GuessEstimator.estimate()."""
+
+    def __init__(self, password, guesses, sequence):
+        self.password_length = len(password)
+        self.guesses = guesses
+        self.guesses_log10 = math.log10(max(guesses, 1))
+        self.sequence = sequence
+        self.score = sum(guesses >= threshold for threshold in SCORE_THRESHOLDS)
+        self.crack_seconds = guesses / OFFLINE_GUESSES_PER_SECOND
+        self.warning, self.suggestions = feedback(self)
+
+    @property
+    def crack_time_display(self):
+        seconds = self.crack_seconds
+        for unit, size in (("year", 31536000), ("month", 2592000), ("day", 86400), ("hour", 3600),
+                           ("minute", 60), ("second", 1)):
+            if seconds >= size:
+                if unit == "year" and seconds / size >= 100:
+                    return "centuries"
+                count = round(seconds / size)
+                return f"{count} {unit}{'s' if count != 1 else ''}"
+        return "less than a second"
+
+
+class GuessEstimator:
+    """Finds the cheapest decomposition of a password into known patterns."""
+
+    def __init__(self, dictionaries):
+        self.dictionaries = dictionaries
+
+    @classmethod
+    def load(cls, directory=DICTIONARY_DIR):
+        return cls(Dictionaries.load(directory))
+
+    def estimate(self, password):
+        analyzed = password[:MAX_ANALYZED_LENGTH]
+        guesses, sequence = self.most_guessable(analyzed)
+        if len(password) > len(analyzed):
+            tail = Match('bruteforce', len(analyzed), len(password) - 1, password[len(analyzed):],
+                         guesses=TAIL_GUESSES, tail=True)
+            guesses *= tail.guesses
+            sequence = sequence + [tail]
+        return Estimate(password, guesses, sequence)
+
+    def matches(self, password):
+        return (dictionary_matches(password, self.dictionaries) + spatial_matches(password)
+                + repeat_matches(password, self) + sequence_matches(password)
+                + year_matches(password) + date_matches(password))
+
+    def most_guessable(self, password):
+        """Returns (guesses, matches) for the cheapest way to cover `password`."""
+        n = len(password)
+        if n == 0:
+            return 1, []
+        by_end = [[] for _ in range(n)]
+        for match in self.matches(password):
+            by_end[match.j].append(match)
+
+        # best_match[k][l]: last match of the best l-match sequence covering password[:k + 1];
+        # best_pi[k][l]: product of its guesses; best_g[k][l]: its overall guesses
+        best_match = [{} for _ in range(n)]
+        best_pi = [{} for _ in range(n)]
+        best_g = [{} for _ in range(n)]
+        pattern_lengths = [()] * n
+        pattern_ends = []
+
+        def update(match, length):
+            k = match.j
+            pi = estimate_guesses(match, n)
+            if length > 1:
+                pi *= best_pi[match.i - 1][length - 1]
+            g = math.factorial(length) * pi + MIN_GUESSES_BEFORE_GROWING_SEQUENCE ** (length - 1)
+            for other_length, other_g in best_g[k].items():
+                if other_length <= length and other_g <= g:
+                    return
+            best_g[k][length] = g
+            best_match[k][length] = match
+            best_pi[k][length] = pi
+
+        for k in range(n):
+            for match in by_end[k]:
+                if match.i > 0:
+                    for length in list(best_match[match.i - 1]):
+                        update(match, length + 1)
+                else:
+                    update(match, 1)
+            update(Match('bruteforce', 0, k, password[:k + 1]), 1)
+            # Brute force only follows a pattern match (adjacent brute force
+            # merges into one match), so only positions where one ends count
+            for i in pattern_ends:
+                bruteforce = Match('bruteforce', i + 1, k, password[i + 1:k + 1])
+                for length in pattern_lengths[i]:
+                    update(bruteforce, length + 1)
+            pattern_lengths[k] = [length for length, last in best_match[k].items() if last.pattern != 'bruteforce']
+            if pattern_lengths[k]:
+                pattern_ends.append(k)
+
+        length = min(best_g[n - 1], key=best_g[n - 1].get)
+        guesses = best_g[n - 1][length]
+        sequence = []
+        k = n - 1
+        while k >= 0:
+            match = best_match[k][length]
+            sequence.append(match)
+            k = match.i - 1
+            length -= 1
+        sequence.reverse()
+        return guesses, sequence
+
+
+# --- Feedback ---
+
+def feedback(estimate):
+    """Returns (warning, suggestions) for a weak password, like zxcvbn."""
+    if not estimate.sequence:
+        return "", ["Use a few words, avoid common phrases.", "No need for symbols, digits, or uppercase letters."]
+    if estimate.score > 2:
+        return "", []
+    # The unanalyzed tail says nothing about what made the password weak
+    sequence = [match for match in estimate.sequence if not match.details.get('tail')] or estimate.sequence
+    longest = max(sequence, key=lambda match: len(match.token))
+    warning, suggestions = match_feedback(longest, len(sequence) == 1)
+    return warning, ["Add another word or two. Uncommon words are better."] + suggestions
+
+
+def match_feedback(match, sole_match):
+    details = match.details
+    if match.pattern == 'dictionary':
+        dictionary = details['dictionary']
+        warning = ""
+        if dictionary == 'passwords':
+            if sole_match and not details['l33t'] and not details['reversed']:
+                if details['rank'] <= 10:
+                    warning = "This is a top-10 common password."
+                elif details['rank'] <= 100:
+                    warning = "This is a top-100 common password."
+                else:
+                    warning = "This is a very common password."
+            elif math.log10(max(match.guesses, 1)) <= 4:
+                warning = "This is similar to a commonly used password."
+        elif dictionary == 'english' and sole_match:
+            warning = "A word by itself is easy to guess."
+        elif dictionary in ('names', 'surnames'):
+            warning = "Names and surnames by themselves are easy to guess." if sole_match \
+                else "Common names and surnames are easy to guess."
+        suggestions = []
+        token = match.token
+        if token[:1].isupper() and token[1:].islower():
+            suggestions.append("Capitalization doesn't help very much.")
+        elif token.isupper() and token.lower() != token:
+            suggestions.append("All-uppercase is almost as easy to guess as all-lowercase.")
+        if details['reversed'] and len(token) >= 4:
+            suggestions.append("Reversed words aren't much harder to guess.")
+        if details['l33t']:
+            suggestions.append("Predictable substitutions like '@' instead of 'a' don't help very much.")
+        return warning, suggestions
+    if match.pattern == 'spatial':
+        warning = "Straight rows of keys are easy to guess." if details['turns'] == 1 \
+            else "Short keyboard patterns are easy to guess."
+        return warning, ["Use a longer keyboard pattern with more turns."]
+    if match.pattern == 'repeat':
+        warning = 'Repeats like "aaa" are easy to guess.' if len(details['base_token']) == 1 \
+            else 'Repeats like "abcabcabc" are only slightly harder to guess than "abc".'
+        return warning, ["Avoid repeated words and characters."]
+    if match.pattern == 'sequence':
+        return "Sequences like abc or 6543 are easy to guess.", ["Avoid sequences."]
+    if match.pattern == 'year':
+        return "Recent years are easy to guess.", ["Avoid recent years.", "Avoid years that are associated with you."]
+    if match.pattern == 'date':
+        return "Dates are often easy to guess.", ["Avoid dates and years that are associated with you."]
+    return "", []
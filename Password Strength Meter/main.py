@@ -1,60 +1,113 @@
 import streamlit as st
-import re
+import gzip
+import io
+import json
+import tempfile
 
-def check_password_strength(password):
-    score = 0
-    suggestions = []
-    
-    # Length Check
-    if len(password) >= 8:
-        score += 1
-    else:
-        suggestions.append("Make the password at least 8 characters long.")
-    
-    # Uppercase and Lowercase Check
-    if re.search(r"[A-Z]", password) and re.search(r"[a-z]", password):
-        score += 1
-    else:
-        suggestions.append("Include both uppercase and lowercase letters.")
-    
-    # Digit Check
-    if re.search(r"\d", password):
-        score += 1
-    else:
-        suggestions.append("Include at least one number (0-9).")
-    
-    # Special Character Check
-    if re.search(r"[!@#$%^&*]", password):
-        score += 1
-    else:
-        suggestions.append("Include at least one special character (!@#$%^&*).")
-    
-    return score, suggestions
+from audit import run_audit
+from estimator import OFFLINE_GUESSES_PER_SECOND, GuessEstimator
+from reuse import ReuseIndex
+from strength import check_password_strength, get_breached_index
+
+RESULTS_GZIP_LEVEL = 1 # Per-entry results are only held compressed; fast beats small here
+
+@st.cache_resource
+def get_estimator():
+    """The guess estimator, with its dictionaries loaded once per process"""
+    return GuessEstimator.load()
+
+def audit_upload(uploaded_file, delimiter, find_reuse=False):
+    """Audits an uploaded password list, streaming it through the worker pool"""
+    progress = st.empty()
+    reuse = ReuseIndex() if find_reuse else None
+
+    def on_progress(summary):
+        progress.info(f"⏳ {summary.entries:,} passwords audited ({summary.rate:,.0f} passwords/sec)")
+
+    text = io.TextIOWrapper(uploaded_file, encoding="utf-8", errors="replace", newline="")
+    with tempfile.TemporaryFile() as raw:
+        with gzip.open(raw, "wt", encoding="utf-8", compresslevel=RESULTS_GZIP_LEVEL) as out:
+            summary = run_audit(text, out, delimiter or None, on_progress=on_progress, reuse=reuse)
+        text.detach()  # Leave the uploaded file open for Streamlit
+        progress.success(f"✅ Audited {summary.entries:,} passwords in {summary.seconds:.1f}s "
+                         f"({summary.rate:,.0f} passwords/sec)")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Score Distribution**")
+            st.bar_chart({str(score): count for score, count in summary.to_dict()['scores'].items()})
+        with col2:
+            st.markdown("**Failed Rules**")
+            st.bar_chart(summary.to_dict()['failed_rules'])
+        raw.seek(0)  # The results are handed over from the temp file, not copied into memory here
+        st.download_button("⬇️ Download Per-Entry Results", raw, file_name="password_audit.jsonl.gz",
+                           mime="application/gzip")
+    st.caption("For very large lists, run the audit from the command line instead: "
+               "`python audit.py PASSWORDS --output results.jsonl`")
+
+    if reuse is not None:
+        report = reuse.to_dict()
+        st.markdown("**Password Reuse**")
+        col1, col2 = st.columns(2)
+        col1.metric("Accounts sharing a password", f"{report['identical']['entries']:,}",
+                    f"{report['identical']['clusters']:,} clusters", delta_color="off")
+        col2.metric("Accounts with near-identical passwords", f"{report['similar']['entries']:,}",
+                    f"{report['similar']['clusters']:,} clusters", delta_color="off")
+        sizes = {f"{kind} ({size})": count for kind in ('identical', 'similar')
+                 for size, count in report[kind]['cluster_sizes'].items()}
+        if sizes:
+            st.bar_chart(sizes)
+        st.download_button("⬇️ Download Reuse Report", json.dumps(report, indent=2), file_name="password_reuse.json",
+                           mime="application/json")
 
 def main():
     st.set_page_config(page_title="Password Strength Meter", page_icon="🔒", layout="centered")
     
     st.markdown("""<h2 style='text-align: center; color: #4CAF50;'>🔑 Password Strength Meter</h2>""", unsafe_allow_html=True)
     
-    password = st.text_input("Enter your password:", type="password")
+    tab1, tab2 = st.tabs(["Check a Password", "Bulk Audit"])
+
+    with tab1:
+        password = st.text_input("Enter your password:", type="password")
+        breached_index = get_breached_index()
+        if breached_index is not None:
+            st.caption(f"🛡️ Checked offline against {len(breached_index):,} breached passwords")
     
-    if st.button("Check Strength"):
-        if password:
-            score, suggestions = check_password_strength(password)
+        if st.button("Check Strength"):
+            if password:
+                score, suggestions = check_password_strength(password)
+                estimate = get_estimator().estimate(password)
+                # Both the rules and the guess estimate must agree a password is strong
+                score = min(score, estimate.score)
             
-            if score <= 2:
-                st.error("🚨 Weak Password! Try making it stronger.")
-            elif score == 3 or score == 4:
-                st.warning("⚠️ Moderate Password! Consider adding more security features.")
-            else:
-                st.success("✅ Strong Password! Good job!")
+                if score <= 2:
+                    st.error("🚨 Weak Password! Try making it stronger.")
+                elif score == 3:
+                    st.warning("⚠️ Moderate Password! Consider adding more security features.")
+                else:
+                    st.success("✅ Strong Password! Good job!")
+
+                st.caption(f"🧮 About 10^{estimate.guesses_log10:.0f} guesses to crack, "
+                           f"{estimate.crack_time_display} offline at {OFFLINE_GUESSES_PER_SECOND:,.0f} guesses/sec")
+                if estimate.warning:
+                    st.markdown(f"**⚠️ {estimate.warning}**")
+                suggestions = suggestions + [tip for tip in estimate.suggestions if tip not in suggestions]
             
-            if suggestions:
-                st.markdown("**🔹 Suggestions to Improve:**")
-                for suggestion in suggestions:
-                    st.markdown(f"- {suggestion}")
-        else:
-            st.warning("⚠️ Please enter a password to check.")
+                if suggestions:
+                    st.markdown("**🔹 Suggestions to Improve:**")
+                    for suggestion in suggestions:
+                        st.markdown(f"- {suggestion}")
+            else:
+                st.warning("⚠️ Please enter a password to check.")
+
+    with tab2:
+        st.markdown("Upload a password list with one password per line. Passwords are never shown or saved.")
+        uploaded_file = st.file_uploader("Password list", type=["txt", "csv"])
+        delimiter = st.text_input("Account delimiter (optional)", max_chars=1,
+                                  help="For 'account:password' lines, enter ':'")
+        find_reuse = st.checkbox("Find accounts that share identical or near-identical passwords")
+        if uploaded_file and st.button("Run Audit"):
+            audit_upload(uploaded_file, delimiter, find_reuse)
     
     st.markdown("---")
     st.markdown("👨‍💻 Create By Hassan Raza ")
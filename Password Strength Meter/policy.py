@@ -0,0 +1,170 @@
+import re
+import string
+
+import numpy as np
+
+# --- Password Policy ---
+# A policy is a minimum length, named character classes, requirements built
+# from those classes, and banned substrings. It is compiled once: every
+# character maps to a bitmask of the classes it belongs to, and each
+# requirement becomes a mask to test against. Checking a password is then a
+# single pass over its distinct characters, OR-ing their masks together,
+# after which every class requirement is one AND. Banned substrings are
+# folded into one case-insensitive regex.
+#
+# check_batch() does the same for many passwords at once with NumPy: the
+# passwords are packed into one uint32 buffer of code points with a lengths
+# vector, every code point is turned into its class mask by a lookup table,
+# and the masks are OR-reduced per password.
+
+DEFAULT_MIN_LENGTH = 8
+DEFAULT_SPECIAL = "!@#$%^&*"
+
+# A class is either a string of its characters or a predicate on one character.
+DEFAULT_CLASSES = {
+    "upper": string.ascii_uppercase,
+    "lower": string.ascii_lowercase,
+    "digit": str.isdecimal, # What \d matches in a str pattern
+    "special": DEFAULT_SPECIAL,
+}
+
+# (rule name, classes that must all be present, suggestion), checked in order
+DEFAULT_REQUIREMENTS = (
+    ("mixed_case", ("upper", "lower"), "Include both uppercase and lowercase letters."),
+    ("digit", ("digit",), "Include at least one number (0-9)."),
+    ("special", ("special",), f"Include at least one special character ({DEFAULT_SPECIAL})."),
+)
+
+LENGTH_RULE = "length"
+BANNED_RULE = "banned"
+LOOKUP_SIZE = 0x3000 # Code points with a precomputed mask in the batch lookup table
+
+
+class _MaskTable(dict):
+    """Character -> class bitmask, filled in the first time a character is seen."""
+
+    def __init__(self, classes):
+        super().__init__()
+        self.classes = classes
+
+    def __missing__(self, char):
+        mask = 0
+        for bit, members in enumerate(self.classes):
+            if (char in members) if isinstance(members, str) else members(char):
+                mask |= 1 << bit
+        self[char] = mask
+        return mask
+
+
+class PasswordPolicy:
+    """A compiled password policy.
+
+    failed_rules() returns the names of the rules a password fails, in rule
+    order: length first, then the requirements, then banned substrings (only
+    if any are configured). The score is the number of rules passed.
+    """
+
+    def __init__(self, min_length=DEFAULT_MIN_LENGTH, classes=None, requirements=DEFAULT_REQUIREMENTS,
+                 banned=()):
+        classes = dict(DEFAULT_CLASSES if classes is None else classes)
+        names = list(classes)
+        self.min_length = min_length
+        self._masks = _MaskTable([classes[name] for name in names])
+        self._requirements = []
+        self.suggestions = {LENGTH_RULE: f"Make the password at least {min_length} characters long."}
+        for rule, required, suggestion in requirements:
+            unknown = [name for name in required if name not in classes]
+            if unknown:
+                raise ValueError(f"Rule '{rule}' uses unknown character classes: {', '.join(unknown)}")
+            mask = 0
+            for name in required:
+                mask |= 1 << names.index(name)
+            self._requirements.append((rule, mask))
+            self.suggestions[rule] = suggestion
+
+        self.banned = tuple(word for word in banned if word)
+        self._banned = None
+        if self.banned:
+            # Longest first, so the alternation prefers the most specific word
+            words = sorted(set(word.lower() for word in self.banned), key=len, reverse=True)
+            self._banned = re.compile("|".join(map(re.escape, words)), re.IGNORECASE)
+            self.suggestions[BANNED_RULE] = "Avoid common words and patterns such as " \
+                + ", ".join(f"'{word}'" for word in self.banned[:3]) + "."
+
+        self.rules = (LENGTH_RULE,) + tuple(rule for rule, _ in self._requirements) \
+            + ((BANNED_RULE,) if self._banned else ())
+        self._lookup_table = None
+
+    @property
+    def max_score(self):
+        return len(self.rules)
+
+    def failed_rules(self, password):
+        """Returns the names of the rules `password` fails, in rule order."""
+        present = 0
+        masks = self._masks
+        for char in set(password):
+            present |= masks[char]
+        failed = [LENGTH_RULE] if len(password) < self.min_length else []
+        failed += [rule for rule, mask in self._requirements if present & mask != mask]
+        if self._banned is not None and self._banned.search(password):
+            failed.append(BANNED_RULE)
+        return failed
+
+    def check(self, password):
+        """Returns (score, suggestions), like check_password_strength()."""
+        failed = self.failed_rules(password)
+        return self.max_score - len(failed), [self.suggestions[rule] for rule in failed]
+
+    def failed_from_mask(self, mask):
+        """The rule names in a failure bitmask, in rule order."""
+        return [rule for bit, rule in enumerate(self.rules) if mask >> bit & 1]
+
+    def check_batch(self, passwords):
+        """Scores many passwords at once. Returns (scores, failure bitmasks) as arrays.
+
+        Both match failed_rules() for every password: bit i of a failure
+        bitmask is set when the password fails self.rules[i].
+        """
+        passwords = passwords if isinstance(passwords, list) else list(passwords)
+        lengths = np.fromiter(map(len, passwords), dtype=np.int64, count=len(passwords))
+        points = np.frombuffer("".join(passwords).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+        # Class masks of every character, then OR-ed together per password.
+        # reduceat() gives an empty password the value at its offset, so a
+        # trailing zero keeps that in bounds and empty passwords are zeroed.
+        masks = np.zeros(len(points) + 1, dtype=self._lookup.dtype)
+        common = points < LOOKUP_SIZE
+        masks[:-1][common] = self._lookup[points[common]]
+        if not common.all():
+            rare, inverse = np.unique(points[~common], return_inverse=True)
+            rare_masks = np.array([self._masks[chr(point)] for point in rare], dtype=masks.dtype)
+            masks[:-1][~common] = rare_masks[inverse]
+        offsets = np.zeros(len(passwords), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        present = np.bitwise_or.reduceat(masks, offsets) if len(passwords) else masks[:0]
+        present[lengths == 0] = 0
+
+        failed = np.where(lengths < self.min_length, np.uint32(1), np.uint32(0))
+        for bit, (_, mask) in enumerate(self._requirements, 1):
+            failed |= np.where(present & mask != mask, np.uint32(1 << bit), np.uint32(0))
+        if self._banned is not None:
+            banned = np.fromiter((self._banned.search(password) is not None for password in passwords),
+                                 dtype=bool, count=len(passwords))
+            failed |= np.where(banned, np.uint32(1 << (len(self.rules) - 1)), np.uint32(0))
+
+        failures = np.zeros(len(passwords), dtype=np.uint8)
+        for bit in range(len(self.rules)):
+            failures += (failed >> bit & 1).astype(np.uint8)
+        return (self.max_score - failures).astype(np.uint8), failed
+
+    @property
+    def _lookup(self):
+        """Class masks of the first LOOKUP_SIZE code points, built on first use."""
+        if self._lookup_table is None:
+            bits = len(self._masks.classes)
+            dtype = np.uint8 if bits <= 8 else np.uint16 if bits <= 16 else np.uint32 if bits <= 32 else np.uint64
+            if bits > 64:
+                raise ValueError("Batch checks support at most 64 character classes")
+            self._lookup_table = np.array([self._masks[chr(point)] for point in range(LOOKUP_SIZE)], dtype=dtype)
+        return self._lookup_table
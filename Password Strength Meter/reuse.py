@@ -0,0 +1,144 @@
+import hashlib
+import os
+import re
+from array import array
+
+import numpy as np
+
+# --- Password Reuse ---
+# Finds accounts that share a password, or near-identical ones such as
+# "Summer2024!" and "Summer2025!", without comparing passwords pairwise and
+# without keeping them. Each password is reduced to two keyed 64-bit hashes:
+# one of the password itself and one of its skeleton (lowercased, l33t
+# undone between letters, each run of digits and each run of symbols
+# collapsed to a placeholder). The key is random per audit, so the hashes
+# cannot be looked up or compared across audits. Grouping entries by hash
+# is one sort, and every group of two or more is a reuse cluster.
+
+KEY_BYTES = 8
+SALT_BYTES = 16
+SKELETON_MIN_LETTERS = 3 # Shorter skeletons ("123456" is just a digit run) only match exactly
+MAX_REPORTED_CLUSTERS = 100
+
+SKELETON_LEET = str.maketrans({'4': 'a', '@': 'a', '3': 'e', '1': 'i', '!': 'i', '0': 'o',
+                               '$': 's', '5': 's', '7': 't', '+': 't'})
+LEET_BETWEEN_LETTERS = re.compile(r"(?<=[^\W\d_])[4@31!0$57+]+(?=[^\W\d_])")
+DIGIT_RUNS = re.compile(r"\d+")
+SYMBOL_RUNS = re.compile(r"(?:[^\w\x00]|_)+")
+
+
+def skeleton(password):
+    """The shape of a password with the parts people vary between reuses removed."""
+    text = password.lower()
+    text = LEET_BETWEEN_LETTERS.sub(lambda m: m.group(0).translate(SKELETON_LEET), text)
+    text = DIGIT_RUNS.sub("\x00", text)
+    return SYMBOL_RUNS.sub("\x01", text)
+
+
+def reuse_keys(passwords, salt):
+    """Returns (exact keys, skeleton keys) for `passwords` as arrays of 64-bit ints."""
+    keyed = hashlib.blake2b(key=salt, digest_size=KEY_BYTES) # Copied per hash, so the key is set up once
+
+    def key(text):
+        hasher = keyed.copy()
+        hasher.update(text.encode("utf-8", "surrogatepass"))
+        return int.from_bytes(hasher.digest(), "big")
+
+    exact, similar = array('Q'), array('Q')
+    for password in passwords:
+        exact_key = key(password)
+        exact.append(exact_key)
+        shape = skeleton(password)
+        # Everything left in a skeleton besides the placeholders is a letter
+        letters = len(shape) - shape.count("\x00") - shape.count("\x01")
+        similar.append(key("\x02" + shape) if letters >= SKELETON_MIN_LETTERS else exact_key)
+    return exact, similar
+
+
+class ReuseIndex:
+    """Collects the reuse keys of audited entries and groups them into clusters.
+
+    Only line numbers, accounts, scores and keyed hashes are kept.
+    """
+
+    def __init__(self, salt=None):
+        self.salt = salt or os.urandom(SALT_BYTES)
+        self.lines = array('Q')
+        self.scores = array('B')
+        self.accounts = []
+        self.exact = array('Q')
+        self.similar = array('Q')
+
+    def __len__(self):
+        return len(self.lines)
+
+    def add(self, lines, accounts, scores, exact, similar):
+        self.lines.extend(lines)
+        self.accounts.extend(accounts)
+        self.scores.extend(scores)
+        self.exact.extend(exact)
+        self.similar.extend(similar)
+
+    def groups(self, similar=False):
+        """Returns (start, size, order) for every cluster, largest first.
+
+        The members of a cluster are order[start:start + size], as entry
+        indexes. Exact clusters share a password. Similar clusters share a
+        skeleton and hold at least two different passwords.
+        """
+        exact = np.frombuffer(self.exact, dtype=np.uint64)
+        keys = np.frombuffer(self.similar, dtype=np.uint64) if similar else exact
+        order = np.lexsort((exact, keys))
+        sorted_keys, sorted_exact = keys[order], exact[order]
+        new_key = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+        starts = np.flatnonzero(new_key)
+        sizes = np.diff(np.append(starts, len(keys)))
+        keep = sizes >= 2
+        if similar and len(keys):
+            new_password = new_key | np.concatenate(([True], sorted_exact[1:] != sorted_exact[:-1]))
+            keep &= np.add.reduceat(new_password.astype(np.int64), starts) >= 2
+        starts, sizes = starts[keep], sizes[keep]
+        if len(starts):
+            # Largest first, then by first line number
+            first = np.minimum.reduceat(order, np.flatnonzero(new_key))[keep]
+            ranking = np.lexsort((first, -sizes))
+            starts, sizes = starts[ranking], sizes[ranking]
+        return starts, sizes, order
+
+    def clusters(self, similar=False, limit=None):
+        """The largest `limit` clusters (all by default) with their members."""
+        return self._describe(self.groups(similar), similar, limit)
+
+    def _describe(self, groups, similar, limit):
+        starts, sizes, order = groups
+        exact = np.frombuffer(self.exact, dtype=np.uint64)
+        clusters = []
+        for start, size in zip(starts[:limit].tolist(), sizes[:limit].tolist()):
+            members = sorted(order[start:start + size].tolist())
+            cluster = {'size': size}
+            if similar:
+                cluster['distinct_passwords'] = len(set(exact[members].tolist()))
+            cluster['min_score'] = min(self.scores[i] for i in members)
+            cluster['members'] = [self._member(i) for i in members]
+            clusters.append(cluster)
+        return clusters
+
+    def _member(self, i):
+        member = {'line': self.lines[i], 'score': self.scores[i]}
+        if self.accounts[i] is not None:
+            member['account'] = self.accounts[i]
+        return member
+
+    def to_dict(self, max_clusters=MAX_REPORTED_CLUSTERS):
+        report = {'entries': len(self)}
+        for name, similar in (('identical', False), ('similar', True)):
+            groups = self.groups(similar)
+            sizes = groups[1]
+            histogram = np.unique(sizes, return_counts=True)
+            report[name] = {
+                'clusters': len(sizes),
+                'entries': int(sizes.sum()),
+                'cluster_sizes': dict(zip(*(values.tolist() for values in histogram))),
+                'largest': self._describe(groups, similar, max_clusters),
+            }
+        return report
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+
+from breached import DEFAULT_INDEX, BreachedIndex
+from policy import PasswordPolicy
+
+# Password scoring, kept free of Streamlit so the bulk audit's worker
+# processes can import it. Each rule a password fails costs it one point and
+# adds that rule's suggestion. The rules are the default PasswordPolicy:
+# length, mixed case, digit and special character. A password found in the
+# offline breached-password index (see breached.py) scores 0 whatever else
+# it gets right. check_batch() scores many passwords at once and returns
+# failure bitmasks whose bits follow RULES.
+
+DEFAULT_POLICY = PasswordPolicy()
+BREACHED_INDEX = DEFAULT_INDEX
+BREACHED_RULE = "breached"
+RULES = (BREACHED_RULE,) + DEFAULT_POLICY.rules
+SUGGESTIONS = dict(DEFAULT_POLICY.suggestions, **{
+    BREACHED_RULE: "This password appears in known data breaches. Choose one that has never been used before.",
+})
+MAX_SCORE = DEFAULT_POLICY.max_score
+
+_breached_index = None
+_breached_index_loaded = False
+
+
+def get_breached_index():
+    """The breached-password index, opened once per process; None if there is none."""
+    global _breached_index, _breached_index_loaded
+    if not _breached_index_loaded:
+        _breached_index_loaded = True
+        if os.path.exists(BREACHED_INDEX):
+            _breached_index = BreachedIndex(BREACHED_INDEX)
+    return _breached_index
+
+
+def failed_rules(password):
+    """Returns the names of the rules `password` fails, in RULES order."""
+    failed = DEFAULT_POLICY.failed_rules(password)
+    index = get_breached_index()
+    if index is not None and password in index:
+        failed.insert(0, BREACHED_RULE)
+    return failed
+
+
+def score(failed):
+    """The score for a password that fails the rules in `failed`."""
+    return 0 if BREACHED_RULE in failed else MAX_SCORE - len(failed)
+
+
+def check_password_strength(password):
+    failed = failed_rules(password)
+    return score(failed), [SUGGESTIONS[rule] for rule in failed]
+
+
+def failed_from_mask(mask):
+    """The rule names in a check_batch() failure bitmask, in RULES order."""
+    failed = DEFAULT_POLICY.failed_from_mask(mask >> 1) # Bit 0 is the breached check
+    if mask & 1:
+        failed.insert(0, BREACHED_RULE)
+    return failed
+
+
+def check_batch(passwords):
+    """Scores many passwords at once. Returns (scores, failure bitmasks) as arrays.
+
+    For every password the score is what score(failed_rules()) gives and
+    bit i of its bitmask is set when it fails RULES[i].
+    """
+    passwords = passwords if isinstance(passwords, list) else list(passwords)
+    scores, failed = DEFAULT_POLICY.check_batch(passwords)
+    failed <<= 1
+    index = get_breached_index()
+    if index is not None:
+        breached = np.fromiter((password in index for password in passwords), dtype=bool, count=len(passwords))
+        failed[breached] |= 1
+        scores[breached] = 0
+    return scores, failed
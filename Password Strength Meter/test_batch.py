@@ -0,0 +1,117 @@
+"""check_batch() must agree with failed_rules()/score() for every password.
+
+Run with: python -m pytest -q test_batch.py
+"""
+import random
+import string
+
+import pytest
+
+import strength
+from breached import BreachedIndex, build_index
+from policy import LOOKUP_SIZE, PasswordPolicy
+
+EDGE_CASES = [
+    "",
+    "a",
+    "Aa1!",
+    "Aa1!aaaa",
+    "😀😀😀😀😀😀😀😀", # Astral characters only
+    "Aa!😀😀😀😀😀", # Astral characters next to common ones
+    "Aa!٣aaaa", # Arabic-Indic digit three
+    "Aa!０aaaa", # Fullwidth digit zero, above LOOKUP_SIZE
+    "Aa!𝟘aaaa", # Mathematical double-struck digit zero, outside the BMP
+    "Aa!\U000e0031aaaa", # Tag digit one: astral, but not a decimal digit
+    "a" * 10_000,
+    "Aa1!" * 5_000,
+]
+
+
+def random_passwords(count, alphabet, seed=0):
+    rng = random.Random(seed)
+    return [''.join(rng.choices(alphabet, k=rng.randint(0, 24))) for _ in range(count)]
+
+
+PASSWORDS = EDGE_CASES + random_passwords(2000, string.ascii_letters + string.digits + "!@#$%^&* éß٣Ａ０😀𝟘")
+
+
+def assert_policy_matches(policy, passwords):
+    scores, failed = policy.check_batch(passwords)
+    assert len(scores) == len(failed) == len(passwords)
+    for password, entry_score, mask in zip(passwords, scores.tolist(), failed.tolist()):
+        expected = policy.failed_rules(password)
+        assert policy.failed_from_mask(mask) == expected, password
+        assert entry_score == policy.max_score - len(expected), password
+
+
+def test_lookup_boundaries():
+    # The edge cases above must straddle the lookup table, or they test nothing
+    characters = set("".join(EDGE_CASES))
+    assert any(LOOKUP_SIZE <= ord(char) <= 0xFFFF and char.isdecimal() for char in characters)
+    assert any(ord(char) > 0xFFFF and char.isdecimal() for char in characters)
+    assert any(ord(char) > 0xFFFF and not char.isdecimal() for char in characters)
+
+
+def test_default_policy():
+    assert_policy_matches(PasswordPolicy(), PASSWORDS)
+
+
+def test_empty_batch():
+    scores, failed = PasswordPolicy().check_batch([])
+    assert len(scores) == len(failed) == 0
+
+
+def test_only_empty_passwords():
+    assert_policy_matches(PasswordPolicy(), ["", "", ""])
+
+
+def test_banned_substrings():
+    policy = PasswordPolicy(banned=("password", "qwerty", "😀"))
+    passwords = PASSWORDS + ["Password1!", "xxQWERTYxx1!A", "pass😀word", "PaSsWoRd"]
+    assert_policy_matches(policy, passwords)
+    assert policy.failed_from_mask(int(policy.check_batch(["Password1!"])[1][0])) == ["banned"]
+
+
+def test_more_than_eight_classes():
+    classes = {f"class{i}": chr(ord("a") + i) for i in range(12)}
+    classes["astral"] = "😀𝟘"
+    requirements = [(f"rule{i}", (f"class{i}",), f"Include {chr(ord('a') + i)}.") for i in range(12)]
+    requirements.append(("astral", ("astral",), "Include an emoji."))
+    policy = PasswordPolicy(4, classes, requirements)
+    assert policy._lookup.dtype.itemsize == 2
+    assert_policy_matches(policy, PASSWORDS + random_passwords(500, "abcdefghijklmn😀𝟘", seed=1))
+
+
+def test_strength_without_breached_index(monkeypatch):
+    monkeypatch.setattr(strength, "_breached_index", None)
+    monkeypatch.setattr(strength, "_breached_index_loaded", True)
+    scores, failed = strength.check_batch(PASSWORDS)
+    for password, entry_score, mask in zip(PASSWORDS, scores.tolist(), failed.tolist()):
+        expected = strength.failed_rules(password)
+        assert strength.failed_from_mask(mask) == expected, password
+        assert entry_score == strength.score(expected), password
+
+
+@pytest.fixture
+def breached(tmp_path, monkeypatch):
+    listed = ["Aa1!aaaa", "hunter2", "😀😀😀😀😀😀😀😀", "Aa!𝟘aaaa"]
+    list_path = tmp_path / "breached.txt"
+    list_path.write_text("\n".join(listed) + "\n", encoding="utf-8")
+    index_path = tmp_path / "breached.idx"
+    build_index(str(list_path), str(index_path))
+    index = BreachedIndex(str(index_path))
+    monkeypatch.setattr(strength, "_breached_index", index)
+    monkeypatch.setattr(strength, "_breached_index_loaded", True)
+    yield listed
+    index.close()
+
+
+def test_strength_breached_bit(breached):
+    passwords = PASSWORDS + breached
+    scores, failed = strength.check_batch(passwords)
+    for password, entry_score, mask in zip(passwords, scores.tolist(), failed.tolist()):
+        expected = strength.failed_rules(password)
+        assert strength.failed_from_mask(mask) == expected, password
+        assert entry_score == strength.score(expected), password
+        assert bool(mask & 1) == (password in breached), password
+    assert all(entry_score == 0 for password, entry_score in zip(passwords, scores.tolist()) if password in breached)
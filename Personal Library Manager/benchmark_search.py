@@ -0,0 +1,121 @@
+"""Benchmarks Search Books with the index against the original linear scan.
+
+Usage: python benchmark_search.py [--sizes 1000 10000 100000 1000000] [--queries 200]
+
+Queries are words, or the first letters of words, taken from random books,
+and ask for the top --limit results the way the Search Books page does.
+Exits with status 1 if the median query time at the largest size is more
+than --max-query-growth times the one at the smallest size, or if building
+the index costs more than --max-build-us microseconds per book.
+"""
+import argparse
+import random
+import statistics
+import string
+import sys
+import time
+
+from search_index import BookIndex
+from storage import book_key
+
+MAX_QUERY_GROWTH = 20.0 # Median query time may grow at most this much from the smallest to the largest size
+MAX_BUILD_US = 100.0 # Index build time allowed per book, in microseconds
+
+GENRES = ["Fiction", "Mystery", "Science Fiction", "Fantasy", "History", "Biography", "Poetry"]
+
+
+def random_word(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+
+
+def make_library(size, seed=42):
+    rng = random.Random(seed)
+    return [
+        {
+            "title": ' '.join(random_word(rng).capitalize() for _ in range(rng.randint(1, 4))),
+            "author": f"{random_word(rng).capitalize()} {random_word(rng).capitalize()}",
+            "publication_year": rng.randint(1900, 2025),
+            "genre": rng.choice(GENRES),
+            "read_status": rng.random() < 0.4,
+        }
+        for _ in range(size)
+    ]
+
+
+def make_queries(library, count, seed=7):
+    """Picks a word (or its first few letters) from random books' titles and authors."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        book = rng.choice(library)
+        word = rng.choice((book['title'] + ' ' + book['author']).split()).lower()
+        queries.append(word if rng.random() < 0.5 else word[:4])
+    return queries
+
+
+def linear_search(library, term):
+    """The original Search Books loop, over title and author."""
+    return [
+        book for book in library
+        if term in book.get('title', '').lower() or term in book.get('author', '').lower()
+    ]
+
+
+def time_queries(search, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50, help="Results requested per query")
+    parser.add_argument("--scan-queries", type=int, default=20,
+                        help="Queries to time against the linear scan (it is slow on big libraries)")
+    parser.add_argument("--max-query-growth", type=float, default=MAX_QUERY_GROWTH,
+                        help="Largest allowed ratio of median query time, largest size to smallest")
+    parser.add_argument("--max-build-us", type=float, default=MAX_BUILD_US,
+                        help="Largest allowed index build time per book, in microseconds")
+    args = parser.parse_args()
+    if args.queries < 2 or args.scan_queries < 1:
+        parser.error("--queries must be at least 2 and --scan-queries at least 1")
+
+    medians, build_us = [], 0.0
+    print(f"{'books':>10} {'build s':>9} {'index p50 ms':>13} {'index p95 ms':>13} {'scan p50 ms':>12}")
+    for size in args.sizes:
+        library = make_library(size)
+        queries = make_queries(library, args.queries)
+
+        start = time.perf_counter()
+        index = BookIndex.build(library, book_key)
+        build_seconds = time.perf_counter() - start
+
+        fields = ["title", "author"]
+        indexed = time_queries(lambda q: index.search(q, fields, limit=args.limit), queries)
+        scanned = time_queries(lambda q: linear_search(library, q), queries[:args.scan_queries])
+        median = statistics.median(indexed)
+        p95 = statistics.quantiles(indexed, n=20, method="inclusive")[-1]
+        print(f"{size:>10} {build_seconds:>9.2f} {median:>13.3f} "
+              f"{p95:>13.3f} {statistics.median(scanned):>12.3f}")
+        medians.append(median)
+        build_us = max(build_us, build_seconds / size * 1e6)
+
+    failures = []
+    growth = medians[-1] / medians[0]
+    if growth > args.max_query_growth:
+        failures.append(f"median query time grew {growth:.1f}x from {args.sizes[0]:,} to "
+                        f"{args.sizes[-1]:,} books (limit {args.max_query_growth:g}x)")
+    if build_us > args.max_build_us:
+        failures.append(f"building the index took {build_us:.0f} us per book (limit {args.max_build_us:g})")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from storage import BOOK_FIELDS, book_key
+
+# --- Bulk Import / Export ---
+# Records are streamed: files are read row by row and handed back in chunks
+# of IMPORT_CHUNK_SIZE validated books, so importing a 100k-row file never
+# holds more than one chunk of parsed rows in memory. Each chunk is meant to
+# be written with a single storage call (one SQLite transaction or one
+# journal flush).
+
+IMPORT_CHUNK_SIZE = 2000
+FORMATS = ("CSV", "JSONL", "Goodreads CSV")
+
+# Goodreads exports keep reading status in a shelf rather than a column.
+GOODREADS_STATUS_SHELVES = {"read", "to-read", "currently-reading"}
+GOODREADS_FIELDS = ("Title", "Author", "Year Published", "Original Publication Year",
+                    "Bookshelves", "Exclusive Shelf")
+
+TRUE_VALUES = {"true", "yes", "y", "1", "read"}
+FALSE_VALUES = {"false", "no", "n", "0", "unread", ""}
+
+
+def validate_book(title, author, year, genre, read_status, current_year):
+    """Applies the Add Book rules to one record.
+
+    Returns (book, None) for a valid record or (None, reason) otherwise.
+    """
+    title = str(title or '').strip()
+    author = str(author or '').strip()
+    if not title or not author:
+        return None, "Title and Author are required fields."
+
+    if year is None or str(year).strip() == '':
+        year = None
+    else:
+        try:
+            year = int(str(year).strip())
+        except ValueError:
+            return None, f"Publication year '{year}' is not a number."
+        if not 0 <= year <= current_year:
+            return None, f"Publication year {year} is outside 0-{current_year}."
+
+    if not isinstance(read_status, bool):
+        status = str(read_status).strip().lower()
+        if status in TRUE_VALUES:
+            read_status = True
+        elif status in FALSE_VALUES:
+            read_status = False
+        else:
+            return None, f"Read status '{read_status}' is not understood."
+
+    return {
+        "title": title,
+        "author": author,
+        "publication_year": year,
+        "genre": str(genre or '').strip(),
+        "read_status": read_status
+    }, None
+
+
+def read_records(binary_file, file_format):
+    """Yields raw (title, author, year, genre, read_status) tuples from an uploaded file."""
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    try:
+        if file_format == "JSONL":
+            for line in text:
+                if line.strip():
+                    row = json.loads(line)
+                    if not isinstance(row, dict):
+                        raise ValueError(f"JSONL line is not an object: {line.strip()[:50]}")
+                    yield tuple(row.get(field) for field in BOOK_FIELDS)
+        elif file_format == "Goodreads CSV":
+            for row in csv.DictReader(text):
+                shelves = [shelf.strip() for shelf in (row.get("Bookshelves") or '').split(',')]
+                genre = next((shelf for shelf in shelves if shelf and shelf not in GOODREADS_STATUS_SHELVES), '')
+                yield (
+                    row.get("Title"),
+                    row.get("Author"),
+                    row.get("Original Publication Year") or row.get("Year Published"),
+                    genre,
+                    (row.get("Exclusive Shelf") or '').strip() == "read",
+                )
+        else:
+            for row in csv.DictReader(text):
+                yield tuple(row.get(field) for field in BOOK_FIELDS)
+    finally:
+        text.detach()  # Leave the uploaded file open for the caller
+
+
+def import_books(records, known_keys, current_year, chunk_size=IMPORT_CHUNK_SIZE):
+    """Validates and de-duplicates records, yielding one chunk of new books at a time.
+
+    Yields (books, rows_read, invalid, duplicates) per chunk, where the counts
+    cover that chunk only. `known_keys` must already hold the keys of books
+    added from earlier chunks; duplicates within a chunk are caught here.
+    """
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        books, pending = [], set()
+        invalid = duplicates = 0
+        for record in chunk:
+            book, _ = validate_book(*record, current_year=current_year)
+            if book is None:
+                invalid += 1
+                continue
+            key = book_key(book)
+            if key in known_keys or key in pending:
+                duplicates += 1
+                continue
+            pending.add(key)
+            books.append(book)
+        yield books, len(chunk), invalid, duplicates
+
+
+def export_books(books, file_format, out):
+    """Writes books (any iterable) to the text stream `out` one row at a time. Returns the count."""
+    count = 0
+    if file_format == "JSONL":
+        for count, book in enumerate(books, 1):
+            out.write(json.dumps({field: book.get(field) for field in BOOK_FIELDS}) + "\n")
+    elif file_format == "Goodreads CSV":
+        writer = csv.writer(out)
+        writer.writerow(GOODREADS_FIELDS)
+        for count, book in enumerate(books, 1):
+            year = book.get('publication_year')
+            writer.writerow((
+                book.get('title', ''),
+                book.get('author', ''),
+                year if year is not None else '',
+                year if year is not None else '',
+                book.get('genre', ''),
+                "read" if book.get('read_status', False) else "to-read",
+            ))
+    else:
+        writer = csv.writer(out)
+        writer.writerow(BOOK_FIELDS)
+        for count, book in enumerate(books, 1):
+            writer.writerow([book.get(field, '') for field in BOOK_FIELDS])
+    return count
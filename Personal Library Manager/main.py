@@ -1,60 +1,153 @@
 import streamlit as st
+import csv
+import io
 import json
 import os
+import sqlite3
+import time
 from datetime import datetime
 
+from bulk_io import FORMATS, export_books, import_books, read_records, validate_book
+from shared import SharedLibrary
+from storage import open_storage
+
 # --- Configuration ---
 LIBRARY_FILE = "library.json" # File to store library data
+LIBRARY_DB = "library.db" # SQLite database used by the "sqlite" backend
+STORAGE_BACKEND = os.environ.get("LIBRARY_BACKEND", "json") # "json" or "sqlite"
+SEARCH_RESULTS_LIMIT = 100 # Most results shown for a single search
+REMOVE_MATCHES_LIMIT = 20 # Books offered by the Remove Book picker
+PAGE_SIZES = (10, 25, 50, 100) # Books per page in the paged views
+
+# Sort keys for Display All Books; books without a year sort last
+SORT_KEYS = {
+    "Title": lambda book: book.get('title', '').lower(),
+    "Author": lambda book: book.get('author', '').lower(),
+    "Publication Year": lambda book: (book.get('publication_year') is None, book.get('publication_year') or 0),
+    "Genre": lambda book: book.get('genre', '').lower(),
+}
 
 # --- Helper Functions ---
 
+@st.cache_resource
+def get_shared_library():
+    """Opens the library once per server process; every session shares it."""
+    return SharedLibrary(open_storage(STORAGE_BACKEND, LIBRARY_FILE, LIBRARY_DB))
+
 def load_library():
-    """Loads the library data from the JSON file."""
-    if os.path.exists(LIBRARY_FILE):
-        try:
-            with open(LIBRARY_FILE, 'r') as f:
-                # Handle empty or invalid JSON file
-                content = f.read()
-                if not content:
-                    return [] # Return empty list if file is empty
-                return json.load(f)
-        except json.JSONDecodeError:
-            st.error(f"Error reading {LIBRARY_FILE}. It might be corrupted. Starting with an empty library.")
-            return []
-        except Exception as e:
-            st.error(f"An unexpected error occurred while loading the library: {e}")
-            return []
-    else:
-        return [] # Return empty list if file doesn't exist
+    """Returns the shared library, caught up with changes made by other processes."""
+    location = LIBRARY_DB if STORAGE_BACKEND == "sqlite" else LIBRARY_FILE
+    try:
+        shared_library = get_shared_library()
+        shared_library.refresh()
+        return shared_library
+    except (json.JSONDecodeError, sqlite3.DatabaseError):
+        st.error(f"Error reading {location}. It might be corrupted. Fix or move it and reload the page.")
+    except Exception as e:
+        st.error(f"An unexpected error occurred while loading the library: {e}")
+    st.stop()
 
-def save_library(library_data):
-    """Saves the library data to the JSON file."""
+def save_library(books):
+    """Replaces the whole library with `books`."""
     try:
-        with open(LIBRARY_FILE, 'w') as f:
-            json.dump(library_data, f, indent=4)
+        library.save_all(books)
     except Exception as e:
         st.error(f"An error occurred while saving the library: {e}")
 
-def display_book(book, index):
-    """Formats and displays a single book's details."""
+def add_book_to_library(book):
+    """Adds a book to the library. Returns False if an equal book already exists, None on error."""
+    try:
+        return library.add(book)
+    except Exception as e:
+        st.error(f"An error occurred while saving the library: {e}")
+        return None
+
+def add_books_to_library(books):
+    """Adds a batch of validated books with a single storage write. Returns the books added."""
+    try:
+        return library.add_many(books)
+    except Exception as e:
+        st.error(f"An error occurred while saving the library: {e}")
+        return []
+
+def remove_book_from_library(book_id):
+    """Removes a book by id. Returns it, or None if it was already gone."""
+    try:
+        return library.remove(book_id)
+    except Exception as e:
+        st.error(f"An error occurred while saving the library: {e}")
+        return None
+
+def set_read_status(book_id, read_status):
+    """Marks a book as read or unread and persists the change."""
+    try:
+        library.set_read_status(book_id, read_status)
+    except Exception as e:
+        st.error(f"An error occurred while saving the library: {e}")
+
+def is_duplicate_book(book):
+    """Checks in constant time whether a book with the same title and author exists."""
+    return library.is_duplicate(book)
+
+def book_card_html(book, index):
+    """Formats a single book's details as an HTML card."""
     read_status = "Read" if book.get('read_status', False) else "Unread"
     # Use get with default values for robustness against missing keys
     title = book.get('title', 'N/A')
     author = book.get('author', 'N/A')
-    year = book.get('publication_year', 'N/A')
+    year = book.get('publication_year')
+    year = 'N/A' if year is None else year # Bulk imports may leave the year blank
     genre = book.get('genre', 'N/A')
 
-    st.markdown(f"""
+    return f"""
     <div style="border: 1px solid #ddd; border-radius: 5px; padding: 15px; margin-bottom: 10px;">
         <strong>{index}. {title}</strong> by <em>{author}</em> ({year})<br>
         Genre: {genre}<br>
         Status: {read_status}
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+def display_book(book, index):
+    """Formats and displays a single book's details."""
+    st.markdown(book_card_html(book, index), unsafe_allow_html=True)
+
+def sorted_library(sort_by, descending=False):
+    """Returns the library sorted by `sort_by`, re-sorting only after the library changes."""
+    return library.sorted_books(sort_by, SORT_KEYS[sort_by], descending)
+
+def display_page(books, key, as_table=False):
+    """Displays one page of `books` with paging controls, rendering only that page."""
+    page_col, size_col = st.columns([3, 1])
+    with size_col:
+        page_size = st.selectbox("Books per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    page_count = max(1, -(-len(books) // page_size))
+    with page_col:
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count,
+                               value=1, step=1, key=f"{key}_page_{page_count}") # Resets when the page count changes
+    start = (page - 1) * page_size
+    page_books = books[start:start + page_size]
+    st.caption(f"Showing {start + 1}-{start + len(page_books)} of {len(books)}")
 
-# --- Initialize Session State ---
-if 'library' not in st.session_state:
-    st.session_state.library = load_library()
+    if as_table:
+        st.dataframe([
+            {
+                "#": start + i + 1,
+                "Title": book.get('title', ''),
+                "Author": book.get('author', ''),
+                "Year": book.get('publication_year'),
+                "Genre": book.get('genre', ''),
+                "Read": book.get('read_status', False),
+            }
+            for i, book in enumerate(page_books)
+        ], hide_index=True, use_container_width=True)
+    else:
+        # One markdown element per page instead of one per book
+        st.markdown(''.join(book_card_html(book, start + i + 1) for i, book in enumerate(page_books)),
+                    unsafe_allow_html=True)
+
+# --- Load Shared Library ---
+# Shared by every session on this server; see shared.py
+library = load_library()
 
 # --- Streamlit App UI ---
 st.set_page_config(page_title="Personal Library Manager", layout="wide")
@@ -66,7 +159,7 @@ st.markdown("Manage your book collection with ease.")
 st.sidebar.header("Menu")
 menu_choice = st.sidebar.radio(
     "Choose an action:",
-    ("Add Book", "Remove Book", "Search Books", "Display All Books", "Statistics")
+    ("Add Book", "Remove Book", "Search Books", "Display All Books", "Import / Export", "Statistics")
 )
 
 # --- Main Content Area ---
@@ -85,28 +178,19 @@ if menu_choice == "Add Book":
 
         submitted = st.form_submit_button("Add Book")
         if submitted:
-            if not title or not author:
-                st.warning("Title and Author are required fields.")
+            new_book, problem = validate_book(title, author, year, genre, read_status, current_year)
+            if problem:
+                st.warning(problem)
             else:
-                new_book = {
-                    "title": title.strip(),
-                    "author": author.strip(),
-                    "publication_year": year,
-                    "genre": genre.strip(),
-                    "read_status": read_status
-                }
-                # Check for duplicates (optional, based on title and author)
-                is_duplicate = any(
-                    b['title'].lower() == new_book['title'].lower() and
-                    b['author'].lower() == new_book['author'].lower()
-                    for b in st.session_state.library
-                )
-                if is_duplicate:
+                # Check for duplicates (based on normalized title and author)
+                if is_duplicate_book(new_book):
                     st.warning(f"A book with the title '{title}' by '{author}' already exists.")
                 else:
-                    st.session_state.library.append(new_book)
-                    save_library(st.session_state.library)
-                    st.success(f"Book '{title}' added successfully!")
+                    added = add_book_to_library(new_book)
+                    if added:
+                        st.success(f"Book '{title}' added successfully!")
+                    elif added is False:
+                        st.warning(f"A book with the title '{title}' by '{author}' was just added by someone else.")
                     # Clear form fields explicitly if needed (though clear_on_submit helps)
                     # st.session_state.add_title = ""
                     # ... reset other keys if necessary
@@ -115,90 +199,191 @@ if menu_choice == "Add Book":
 # --- Remove Book ---
 elif menu_choice == "Remove Book":
     st.header("Remove a Book")
-    if not st.session_state.library:
+    if not library:
         st.info("Your library is currently empty. Add some books first!")
     else:
-        # Create a list of titles for the selectbox, adding index for uniqueness if needed
-        book_titles = [f"{i+1}. {book['title']} by {book['author']}" for i, book in enumerate(st.session_state.library)]
-        book_to_remove_display = st.selectbox("Select the book to remove:", options=[""] + book_titles)
-
-        if book_to_remove_display:
-            # Extract the index from the selected string
-            try:
-                selected_index = int(book_to_remove_display.split('.')[0]) - 1
-                book_title_to_remove = st.session_state.library[selected_index]['title'] # Get title for confirmation
+        # Look the book up through the search index instead of listing every title
+        remove_term = st.text_input("Find the book to remove (title or author):", key="remove_term").strip()
+        if remove_term:
+            matches = {book['id']: book for book in library.search(remove_term, fields=["title", "author"],
+                                                                   limit=REMOVE_MATCHES_LIMIT)}
+            if not matches:
+                st.info(f"No books found matching '{remove_term}'.")
+            else:
+                book_id_to_remove = st.selectbox(
+                    "Select the book to remove:",
+                    options=list(matches),
+                    format_func=lambda book_id: f"{matches[book_id]['title']} by {matches[book_id]['author']}"
+                )
+                book_title_to_remove = matches[book_id_to_remove]['title'] # Get title for confirmation
 
                 if st.button(f"Confirm Removal of '{book_title_to_remove}'"):
-                    removed_book = st.session_state.library.pop(selected_index)
-                    save_library(st.session_state.library)
-                    st.success(f"Book '{removed_book['title']}' removed successfully!")
-                    st.rerun() # Rerun to update the selectbox
-            except (IndexError, ValueError):
-                st.error("Invalid selection. Please choose a book from the list.")
+                    removed_book = remove_book_from_library(book_id_to_remove)
+                    if removed_book is None:
+                        st.warning(f"'{book_title_to_remove}' had already been removed.")
+                    else:
+                        st.success(f"Book '{removed_book['title']}' removed successfully!")
+                        st.rerun() # Rerun to update the matches
 
 
 # --- Search Books ---
 elif menu_choice == "Search Books":
     st.header("Search Your Library")
-    if not st.session_state.library:
+    if not library:
         st.info("Your library is currently empty. Add some books first!")
     else:
-        search_by = st.radio("Search by:", ("Title", "Author"), horizontal=True)
-        search_term = st.text_input(f"Enter {search_by} to search for:", key="search_term").strip().lower()
+        search_fields = st.multiselect("Search in:", ["Title", "Author", "Genre"], default=["Title", "Author"])
+        search_term = st.text_input("Enter words to search for:", key="search_term").strip()
 
-        if search_term:
-            results = []
-            if search_by == "Title":
-                results = [book for book in st.session_state.library if search_term in book.get('title', '').lower()]
-            elif search_by == "Author":
-                results = [book for book in st.session_state.library if search_term in book.get('author', '').lower()]
+        if search_term and search_fields:
+            # The index matches every word against any of the chosen fields and ranks the results
+            results = library.search(
+                search_term,
+                fields=[field.lower() for field in search_fields],
+                limit=SEARCH_RESULTS_LIMIT
+            )
 
             st.subheader("Search Results")
             if results:
-                for i, book in enumerate(results):
-                    display_book(book, i + 1)
+                if len(results) == SEARCH_RESULTS_LIMIT:
+                    st.caption(f"Showing the top {SEARCH_RESULTS_LIMIT} matches. Add more words to narrow the search.")
+                display_page(results, key="search")
+
+                # Mark a found book as read or unread
+                selected = st.selectbox(
+                    "Update read status of:", range(len(results)),
+                    format_func=lambda i: f"{results[i]['title']} by {results[i]['author']} "
+                                          f"({'Read' if results[i].get('read_status', False) else 'Unread'})",
+                    key="status_book"
+                )
+                if st.button("Toggle Read Status"):
+                    book = results[selected]
+                    set_read_status(book['id'], not book.get('read_status', False))
+                    st.rerun()
             else:
-                st.info(f"No books found matching '{search_term}' by {search_by}.")
+                st.info(f"No books found matching '{search_term}' in {', '.join(search_fields)}.")
 
 # --- Display All Books ---
 elif menu_choice == "Display All Books":
     st.header("Your Library Collection")
-    if not st.session_state.library:
+    if not library:
+        st.info("Your library is currently empty. Add some books first!")
+    else:
+        st.write(f"Total books: {len(library)}")
+        sort_col, order_col, view_col = st.columns([2, 1, 1])
+        with sort_col:
+            sort_by = st.selectbox("Sort by", list(SORT_KEYS), key="display_sort_by")
+        with order_col:
+            descending = st.radio("Order", ("Ascending", "Descending"), key="display_order") == "Descending"
+        with view_col:
+            as_table = st.radio("View", ("Cards", "Table"), key="display_view") == "Table"
+        filter_term = st.text_input("Filter by title, author or genre:", key="display_filter").strip()
+
+        books = sorted_library(sort_by, descending)
+        if filter_term:
+            # Filter through the search index, then keep the chosen sort order
+            sort_key = SORT_KEYS[sort_by]
+            books = sorted(library.search(filter_term), key=sort_key, reverse=descending)
+            if not books:
+                st.info(f"No books match '{filter_term}'.")
+        if books:
+            display_page(books, key="display", as_table=as_table)
+
+# --- Import / Export ---
+elif menu_choice == "Import / Export":
+    st.header("Import and Export Books")
+
+    st.subheader("Import")
+    import_format = st.radio("File format:", FORMATS, horizontal=True, key="import_format")
+    uploaded_file = st.file_uploader("Choose a file to import", type=["csv", "jsonl", "json", "txt"])
+    if uploaded_file and st.button("Import Books"):
+        progress = st.progress(0.0, text="Starting import...")
+        total_bytes = max(uploaded_file.size, 1)
+        rows = added = invalid = duplicates = 0
+        start = time.perf_counter()
+        try:
+            chunks = import_books(read_records(uploaded_file, import_format),
+                                  library.book_keys, datetime.now().year)
+            for books, chunk_rows, chunk_invalid, chunk_duplicates in chunks:
+                added_books = add_books_to_library(books) # One transaction / journal flush per chunk
+                rows += chunk_rows
+                added += len(added_books)
+                invalid += chunk_invalid
+                duplicates += chunk_duplicates + len(books) - len(added_books)
+                rate = rows / max(time.perf_counter() - start, 1e-9)
+                progress.progress(min(uploaded_file.tell() / total_bytes, 1.0),
+                                  text=f"{rows:,} rows read ({rate:,.0f} rows/sec)")
+        except (ValueError, KeyError, UnicodeDecodeError, csv.Error) as e:
+            st.error(f"Import stopped after {rows:,} rows: {e}")
+        elapsed = time.perf_counter() - start
+        progress.progress(1.0, text=f"{rows:,} rows read in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+        st.success(f"Imported {added:,} books. Skipped {duplicates:,} duplicates and {invalid:,} invalid rows.")
+
+    st.subheader("Export")
+    export_format = st.radio("File format:", FORMATS, horizontal=True, key="export_format")
+    if not library:
         st.info("Your library is currently empty. Add some books first!")
     else:
-        st.write(f"Total books: {len(st.session_state.library)}")
-        # Sort books alphabetically by title (optional)
-        sorted_library = sorted(st.session_state.library, key=lambda x: x.get('title', '').lower())
-        for i, book in enumerate(sorted_library):
-            display_book(book, i + 1)
+        # Built only on request, and kept until the library or the format changes
+        export_key = (library.version, export_format)
+        export = st.session_state.get('export')
+        if export is None or export[0] != export_key:
+            export = None
+            if st.button(f"Prepare {len(library):,} books for download"):
+                out = io.StringIO()
+                count = export_books(library.iter_books(), export_format, out)
+                export = st.session_state.export = (export_key, count, out.getvalue())
+        if export is not None:
+            extension = "jsonl" if export_format == "JSONL" else "csv"
+            st.download_button(f"Download {export[1]:,} books",
+                               data=export[2], file_name=f"library.{extension}")
 
 # --- Statistics ---
 elif menu_choice == "Statistics":
     st.header("Library Statistics")
-    total_books = len(st.session_state.library)
+    stats = library.stats_snapshot()
+    total_books = stats.total
 
     if total_books == 0:
         st.info("Your library is empty. No statistics to display yet.")
     else:
-        read_books = sum(1 for book in st.session_state.library if book.get('read_status', False))
-        try:
-            percentage_read = (read_books / total_books) * 100 if total_books > 0 else 0
-        except ZeroDivisionError:
-             percentage_read = 0
+        read_books = stats.read
+        percentage_read = (read_books / total_books) * 100
 
-        col1, col2 = st.columns(2)
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
             st.metric(label="Total Books", value=total_books)
         with col2:
             st.metric(label="Books Read", value=f"{read_books} ({percentage_read:.1f}%)")
+        with col3:
+            st.metric(label="Genres", value=len(stats.counts["genre"]))
+        with col4:
+            st.metric(label="Authors", value=len(stats.counts["author"]))
+
+        st.subheader("Books by Read Status")
+        status_counts = {"Read": read_books, "Unread": total_books - read_books}
+        st.bar_chart(status_counts)
+
+        genre_col, decade_col = st.columns(2)
+        with genre_col:
+            st.subheader("Books by Genre")
+            st.bar_chart(dict(stats.counts["genre"]))
+        with decade_col:
+            st.subheader("Books by Decade")
+            st.bar_chart(dict(sorted(stats.counts["decade"].items())))
 
-        # Optional: Add more stats like books per genre, etc.
-        if total_books > 0:
-            st.subheader("Books by Read Status")
-            status_counts = {"Read": read_books, "Unread": total_books - read_books}
-            st.bar_chart(status_counts)
+        year_col, author_col = st.columns(2)
+        with year_col:
+            st.subheader("Books by Publication Year")
+            st.line_chart({int(year): count for year, count in sorted(stats.counts["year"].items(), key=lambda item: int(item[0]))})
+        with author_col:
+            st.subheader("Top Authors")
+            st.dataframe([{"Author": author, "Books": count}
+                          for author, count in stats.counts["author"].most_common(10)],
+                         hide_index=True, use_container_width=True)
 
 
 # --- Footer ---
 st.sidebar.markdown("---")
-st.sidebar.info(f"Library data is saved to `{LIBRARY_FILE}`.")
+st.sidebar.info(f"Library data is saved to `{library.storage.location}`.")
+st.sidebar.caption(f"Shared with everyone using this server (version {library.version}).")
@@ -0,0 +1,245 @@
+import heapq
+import re
+from array import array
+from bisect import bisect_left, insort
+
+# --- Search Index ---
+# Keeps an in-memory index over the library so "Search Books" does not have
+# to lowercase and scan every book on each keystroke. Everything is keyed by
+# whole words, so a book costs one posting per distinct word it contains:
+#   * (field, word) -> books containing that word;
+#   * a sorted vocabulary per field, so the words starting with a query term
+#     are one binary search away;
+#   * (field, trigram) -> vocabulary words, for terms that only match in the
+#     middle of a word ("ring" in "Springtime"). It is built the first time
+#     a mid-word lookup needs it and is kept up to date from then on.
+# Word and prefix hits are looked up first. The mid-word lookup only runs
+# when they cannot fill the requested number of results, since mid-word
+# matches rank below word and prefix matches anyway. Adding a book costs a
+# few dictionary appends, and query time grows far more slowly than the
+# library. benchmark_search.py measured, for the top 50 results, a median
+# of 0.048 ms on 1k books, 0.085 ms on 100k and 0.58 ms on 1M (mostly the
+# extra mid-word matches a bigger library really has), and a build time of
+# about 35 us per book. It fails if those grow past its limits.
+# Postings are compact arrays of integer document ids. Removing a book only
+# drops it from `docs`; stale postings are skipped at query time and swept
+# out once they outnumber the live books.
+
+SEARCH_FIELDS = ("title", "author", "genre")
+FIELD_WEIGHTS = {"title": 3.0, "author": 2.0, "genre": 1.0}
+GRAM_SIZE = 3
+WORD_RE = re.compile(r"\w+")
+
+
+def trigrams(text):
+    """Returns the set of GRAM_SIZE-character substrings of `text`."""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class BookIndex:
+    """Word-level index over title, author and genre, updated per book."""
+
+    def __init__(self, key_func, fields=SEARCH_FIELDS):
+        self.key_func = key_func  # Maps a book to its unique key
+        self.fields = fields
+        self.docs = {}      # doc id -> book
+        self.values = {}    # doc id -> {field: lowercased value}
+        self.tokens = {}    # doc id -> {field: tuple of the value's words}
+        self.doc_ids = {}   # book key -> doc id
+        self.words = {}     # (field, word) -> array of doc ids
+        self.vocab = {field: [] for field in fields}  # field -> sorted words
+        self.grams = None   # (field, trigram) -> list of words; built on first use
+        self._sorted = True
+        self._next_id = 0
+        self._stale = 0
+
+    @classmethod
+    def build(cls, library, key_func, fields=SEARCH_FIELDS):
+        index = cls(key_func, fields)
+        index._sorted = False  # Sort each vocabulary once at the end
+        for book in library:
+            index.add(book)
+        for words in index.vocab.values():
+            words.sort()
+        index._sorted = True
+        return index
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, book):
+        key = self.key_func(book)
+        if key in self.doc_ids:
+            self.remove(book)
+        doc = self._next_id
+        self._next_id += 1
+        self.docs[doc] = book
+        self.doc_ids[key] = doc
+        values = {field: str(book.get(field, '') or '').lower() for field in self.fields}
+        tokens = {field: tuple(WORD_RE.findall(value)) for field, value in values.items()}
+        self.values[doc] = values
+        self.tokens[doc] = tokens
+        for field, words in tokens.items():
+            for word in set(words):
+                postings = self.words.get((field, word))
+                if postings is None:
+                    postings = self.words[(field, word)] = array('I')
+                    self._add_word(field, word)
+                postings.append(doc)
+
+    def remove(self, book):
+        doc = self.doc_ids.pop(self.key_func(book), None)
+        if doc is None:
+            return
+        del self.docs[doc]
+        del self.values[doc]
+        del self.tokens[doc]
+        self._stale += 1
+        if self._stale > len(self.docs):
+            self._sweep()
+
+    def search(self, query, fields=None, limit=None):
+        """Returns books matching every word of `query`, best matches first.
+
+        Each query word must appear in at least one of `fields`. Candidates
+        are looked up through the start of words and, for words of three or
+        more characters when those do not fill `limit`, through the trigram
+        index for mid-word matches.
+        Results are ranked by how well the words matched (whole field >
+        whole word > prefix > substring), weighted by FIELD_WEIGHTS. Terms
+        shorter than three characters only match at the start of a word.
+        """
+        fields = [field for field in (fields or self.fields) if field in self.fields]
+        terms = query.lower().split()
+        if not terms or not fields:
+            return []
+
+        results = self._ranked(self._candidates(terms, fields, mid_word=False), terms, fields, limit)
+        if limit is not None and len(results) >= limit:
+            return results
+        if not any(len(term) >= GRAM_SIZE for term in terms):
+            return results  # Short terms never match mid-word
+        return self._ranked(self._candidates(terms, fields, mid_word=True), terms, fields, limit)
+
+    def _candidates(self, terms, fields, mid_word):
+        """Returns live doc ids whose postings cover the most selective term."""
+        best = None
+        for term in terms:
+            if mid_word and len(term) >= GRAM_SIZE and not WORD_RE.search(term):
+                return self._scan(term, fields)  # Punctuation only; no word to look up
+            postings = []
+            for field in fields:
+                words = self._prefixed_words(field, term)
+                if mid_word and len(term) >= GRAM_SIZE:
+                    words.update(self._containing_words(field, term))
+                postings.extend(self.words[(field, word)] for word in words)
+            size = sum(map(len, postings))
+            if best is None or size < best[0]:
+                best = (size, postings)
+                if not size:
+                    break
+        found = set()
+        for docs in best[1]:
+            found.update(docs)
+        # Filter against `docs` explicitly; set.intersection_update() with a
+        # dict argument would walk the whole dict.
+        return {doc for doc in found if doc in self.docs}
+
+    def _prefixed_words(self, field, term):
+        """Returns the vocabulary words of `field` that start with `term`."""
+        vocab = self.vocab[field]
+        words = set()
+        for i in range(bisect_left(vocab, term), len(vocab)):
+            if not vocab[i].startswith(term):
+                break
+            words.add(vocab[i])
+        return words
+
+    def _containing_words(self, field, term):
+        """Returns the vocabulary words of `field` that contain part of `term`.
+
+        A term matching inside a value contains its longest word entirely
+        within one of the value's words, so that longest word is what is
+        looked up. The rarest of its trigrams narrows the vocabulary down.
+        """
+        part = max(WORD_RE.findall(term), key=len)
+        if len(part) < GRAM_SIZE:
+            return {word for word in self.vocab[field] if part in word}
+        if self.grams is None:
+            self._build_grams()
+        candidates = min((self.grams.get((field, gram), ()) for gram in trigrams(part)), key=len)
+        return {word for word in candidates if part in word}
+
+    def _scan(self, term, fields):
+        return {doc for doc, values in self.values.items() if any(term in values[field] for field in fields)}
+
+    def _add_word(self, field, word):
+        if self._sorted:
+            insort(self.vocab[field], word)
+        else:
+            self.vocab[field].append(word)
+        if self.grams is not None:
+            for gram in trigrams(word):
+                self.grams.setdefault((field, gram), []).append(word)
+
+    def _build_grams(self):
+        self.grams = {}
+        for field, words in self.vocab.items():
+            for word in words:
+                for gram in trigrams(word):
+                    self.grams.setdefault((field, gram), []).append(word)
+
+    def _ranked(self, candidates, terms, fields, limit):
+        scored = []
+        for doc in candidates:
+            score = self._score(self.values[doc], self.tokens[doc], terms, fields)
+            if score:
+                scored.append((score, -doc))
+        if limit is None:
+            scored.sort(reverse=True)
+        else:
+            scored = heapq.nlargest(limit, scored)
+        return [self.docs[-neg_doc] for _, neg_doc in scored]
+
+    @staticmethod
+    def _score(values, tokens, terms, fields):
+        total = 0.0
+        for term in terms:
+            best = 0.0
+            for field in fields:
+                value = values[field]
+                if term not in value:
+                    continue
+                words = tokens[field]
+                if value == term:
+                    match = 4.0
+                elif term in words:
+                    match = 3.0
+                elif any(word.startswith(term) for word in words):
+                    match = 2.0
+                elif len(term) >= GRAM_SIZE:
+                    match = 1.0
+                else:
+                    continue  # Short terms only match at word starts
+                best = max(best, match * FIELD_WEIGHTS.get(field, 1.0))
+            if not best:
+                return 0.0
+            total += best
+        return total
+
+    def _sweep(self):
+        """Drops postings that point at removed books, and words no book uses any more."""
+        for key in list(self.words):
+            live = array('I', (doc for doc in self.words[key] if doc in self.docs))
+            if live:
+                self.words[key] = live
+            else:
+                del self.words[key]
+        self.vocab = {field: [] for field in self.fields}
+        for field, word in self.words:
+            self.vocab[field].append(word)
+        for words in self.vocab.values():
+            words.sort()
+        if self.grams is not None:
+            self._build_grams()
+        self._stale = 0
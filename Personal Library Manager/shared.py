@@ -0,0 +1,187 @@
+import threading
+
+from search_index import BookIndex
+from stats import LibraryStats
+from storage import book_key, new_book_id
+
+EXPORT_CHUNK_SIZE = 5000 # Books fetched under the lock at a time by iter_books()
+
+# --- Shared Library ---
+# One SharedLibrary per server process holds the books, their indexes and
+# statistics for every session, so a change made in one session is visible
+# to the others on their next rerun. Writes hold the storage's file lock and
+# first apply whatever other processes have written since we last looked
+# (refresh), then check the change still makes sense and write it. Changes
+# to different books therefore merge; conflicting ones (adding a book that
+# now exists, removing one that is already gone) are reported back to the
+# caller instead of overwriting someone else's work.
+
+
+def get_book_id(book):
+    return book['id']
+
+
+class SharedLibrary:
+    """The library, its search index, duplicate keys and statistics, shared across sessions."""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.version = 0 # Bumped on every change, whoever made it
+        self._lock = threading.RLock()
+        self._sort_cache = {} # (sort_by, descending) -> books, for _sort_cache_version
+        self._sort_cache_version = None
+        self.books = None
+        self.reload()
+
+    def reload(self):
+        """Loads the whole library from storage.
+
+        The first load builds the indexes. Later ones (after another process
+        compacted the journal or pruned the change log) only apply the
+        differences to them, so no session stalls on a full rebuild.
+        """
+        with self._lock, self.storage.lock:
+            books = self.storage.load()
+            if self.books is not None:
+                self._apply_differences(books)
+                return
+            self.books = {book['id']: book for book in books}
+            self.book_keys = {book_key(book) for book in books}
+            self.search_index = BookIndex.build(books, get_book_id)
+            try:
+                self.stats = self.storage.load_stats(books)
+            except Exception:
+                self.stats = LibraryStats.build(books)
+            self.version += 1
+
+    def refresh(self):
+        """Applies changes other processes have written since we last looked."""
+        with self._lock, self.storage.lock:
+            records = self.storage.changes_since_load()
+            if records is None or any('id' not in book for _, book in records):
+                self.reload()
+                return
+            for op, book in records:
+                self._apply(op, book)
+
+    # --- Reads ---
+
+    def __len__(self):
+        return len(self.books)
+
+    def iter_books(self, chunk_size=EXPORT_CHUNK_SIZE):
+        """Yields every book without holding the lock for the whole walk.
+
+        Books are fetched `chunk_size` at a time by id; books removed in the
+        meantime are skipped and books added in the meantime are not seen.
+        """
+        with self._lock:
+            book_ids = list(self.books)
+        for start in range(0, len(book_ids), chunk_size):
+            with self._lock:
+                chunk = [self.books.get(book_id) for book_id in book_ids[start:start + chunk_size]]
+            yield from (book for book in chunk if book is not None)
+
+    def search(self, query, fields=None, limit=None):
+        with self._lock:
+            return self.search_index.search(query, fields, limit)
+
+    def sorted_books(self, sort_by, key_func, descending=False):
+        """Returns the books sorted by `key_func`, re-sorting only after the library changes."""
+        with self._lock:
+            if self._sort_cache_version != self.version:
+                self._sort_cache.clear() # Orders for older versions are stale
+                self._sort_cache_version = self.version
+            cache_key = (sort_by, descending)
+            if cache_key not in self._sort_cache:
+                self._sort_cache[cache_key] = sorted(self.books.values(), key=key_func, reverse=descending)
+            return self._sort_cache[cache_key]
+
+    def stats_snapshot(self):
+        """Returns a copy of the statistics that later changes will not touch."""
+        with self._lock:
+            return LibraryStats.from_dict(self.stats.to_dict())
+
+    def is_duplicate(self, book):
+        return book_key(book) in self.book_keys
+
+    # --- Writes ---
+
+    def add_many(self, books):
+        """Adds books that are not in the library yet. Returns the ones added."""
+        with self._lock, self.storage.lock:
+            self.refresh()
+            added, keys = [], set()
+            for book in books:
+                key = book_key(book)
+                if key in self.book_keys or key in keys:
+                    continue # Added by someone else in the meantime
+                keys.add(key)
+                book.setdefault('id', new_book_id())
+                added.append(book)
+            if added:
+                self.storage.add_many(self.books, added)
+                for book in added:
+                    self._apply("add", book)
+            return added
+
+    def add(self, book):
+        """Adds one book. Returns False if an equal book already exists."""
+        return bool(self.add_many([book]))
+
+    def remove(self, book_id):
+        """Removes a book. Returns it, or None if it was already removed."""
+        with self._lock, self.storage.lock:
+            self.refresh()
+            book = self.books.get(book_id)
+            if book is not None:
+                self.storage.remove(self.books, book)
+                self._apply("remove", book)
+            return book
+
+    def set_read_status(self, book_id, read_status):
+        """Marks a book read or unread. Returns the updated book, or None if it is gone."""
+        with self._lock, self.storage.lock:
+            self.refresh()
+            book = self.books.get(book_id)
+            if book is None or book.get('read_status', False) == read_status:
+                return book # Gone, or someone already made the same change
+            updated = dict(book, read_status=read_status)
+            self.storage.update(self.books, updated)
+            self._apply("update", updated)
+            return updated
+
+    def save_all(self, books):
+        """Replaces the whole library."""
+        with self._lock, self.storage.lock:
+            self.storage.save(books)
+            self.reload()
+
+    def _apply_differences(self, books):
+        """Brings the in-memory library in line with `books`, one change at a time."""
+        loaded = {book['id']: book for book in books}
+        for book_id in [book_id for book_id in self.books if book_id not in loaded]:
+            self._apply("remove", self.books[book_id])
+        for book_id, book in loaded.items():
+            old_book = self.books.get(book_id)
+            if old_book != book:
+                self._apply("add" if old_book is None else "update", book)
+
+    def _apply(self, op, book):
+        """Applies one change to the in-memory library, indexes and statistics."""
+        old_book = self.books.get(book['id'])
+        if old_book is None and op != "add":
+            return # Removed or updated a book that is already gone
+        if op == "remove":
+            del self.books[old_book['id']]
+            self.book_keys.discard(book_key(old_book))
+            self.search_index.remove(old_book)
+            self.stats.remove(old_book)
+        else:
+            if old_book is not None:
+                self.book_keys.discard(book_key(old_book))
+            self.books[book['id']] = book
+            self.book_keys.add(book_key(book))
+            self.search_index.add(book)
+            self.stats.change(old_book, book)
+        self.version += 1
@@ -0,0 +1,74 @@
+from collections import Counter
+
+# --- Library Statistics ---
+# Running aggregates for the Statistics page. Each add, remove or status
+# change adjusts a handful of counters, so the page never has to walk the
+# whole library. The counters are saved alongside the library by the
+# storage backends (see storage.py).
+
+GROUPED_DIMENSIONS = ("genre", "author", "decade", "year")
+UNSPECIFIED = "Unspecified"
+
+
+def book_groups(book):
+    """Returns the (dimension, key) pairs a book is counted under."""
+    groups = [("total", ""), ("genre", (book.get('genre') or '').strip() or UNSPECIFIED),
+              ("author", (book.get('author') or '').strip() or UNSPECIFIED)]
+    if book.get('read_status', False):
+        groups.append(("read", ""))
+    year = book.get('publication_year')
+    if isinstance(year, int):
+        groups.append(("decade", f"{year // 10 * 10}s"))
+        groups.append(("year", str(year)))
+    return groups
+
+
+class LibraryStats:
+    """Counts of books in total, read, and per genre, author, decade and year."""
+
+    def __init__(self):
+        self.counts = {dimension: Counter() for dimension in ("total", "read") + GROUPED_DIMENSIONS}
+
+    @classmethod
+    def build(cls, library):
+        stats = cls()
+        for book in library:
+            stats.add(book)
+        return stats
+
+    @property
+    def total(self):
+        return self.counts["total"][""]
+
+    @property
+    def read(self):
+        return self.counts["read"][""]
+
+    def add(self, book):
+        for dimension, key in book_groups(book):
+            self.counts[dimension][key] += 1
+
+    def remove(self, book):
+        for dimension, key in book_groups(book):
+            counter = self.counts[dimension]
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+
+    def change(self, old_book, new_book):
+        """Moves counts from `old_book` to `new_book`; either may be None."""
+        if old_book is not None:
+            self.remove(old_book)
+        if new_book is not None:
+            self.add(new_book)
+
+    def to_dict(self):
+        return {dimension: dict(counter) for dimension, counter in self.counts.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        for dimension, counter in data.items():
+            if dimension in stats.counts:
+                stats.counts[dimension].update(counter)
+        return stats
@@ -0,0 +1,621 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unicodedata
+import uuid
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+from stats import LibraryStats, book_groups
+
+# --- Storage Backends ---
+# Every backend exposes the same small interface so the app does not care
+# where the books actually live. Every stored book carries a stable 'id'
+# (see new_book_id), which is what remove and update look books up by.
+#   load()                 -> list of book dicts
+#   save(library)          persist the whole library
+#   add(library, book)     persist a book that was just appended to `library`
+#   add_many(library, books)  persist a batch of appended books in one write
+#   remove(library, book)  persist a book that was just removed from `library`
+#   update(library, book)  persist changes to a book already in `library`
+#   load_stats(library)    -> LibraryStats saved with the library
+#   changes_since_load()   -> (op, book) records written by other processes
+#                             since load(), or None if a full load() is needed
+#   lock                   FileLock held around read-check-write sequences
+
+BOOK_FIELDS = ("title", "author", "publication_year", "genre", "read_status")
+COMPACT_EVERY = 500 # Journal records to accumulate before folding them into the snapshot
+CHANGES_KEPT = 10000 # Change records SQLite keeps for other processes to catch up from
+
+
+class FileLock:
+    """Advisory lock on a file, shared by the threads and processes using it.
+
+    Re-entrant within a thread, so storage methods can take it while the
+    caller already holds it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            self._file = open(self.path, 'a+')
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+def temp_path_for(path):
+    """A new, uniquely named temp file next to `path`, for writing and then os.replace()-ing.
+
+    Every writer gets its own file, so a background compaction and a save()
+    in the same process never write into the same temp file.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=directory)
+    os.close(fd)
+    # mkstemp() creates the file private to its owner; keep the mode the replaced file had
+    os.chmod(tmp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+    return tmp_path
+
+
+def normalize_text(text):
+    """Folds text for comparisons: Unicode NFKC, case folding and collapsed whitespace."""
+    return ' '.join(unicodedata.normalize('NFKC', text).casefold().split())
+
+
+def book_key(book):
+    """Identifies a book by its normalized title and author (the duplicate rule)."""
+    return (normalize_text(book.get('title', '')), normalize_text(book.get('author', '')))
+
+
+def new_book_id():
+    """Returns a new stable, unique book id."""
+    return uuid.uuid4().hex
+
+
+def record_key(book):
+    """Identifies a book in the journal: by id, or by title and author for
+    books written before ids existed."""
+    return book.get('id') or book_key(book)
+
+
+def apply_op(books, positions, op, book, on_change=None):
+    """Applies one journal operation to `books`, using `positions` (key -> index).
+
+    Operations are keyed upserts and deletes, so replaying a record that is
+    already reflected in the snapshot leaves the library unchanged.
+    `on_change(old_book, new_book)` is called with the book each operation
+    replaced (None when there was none) and the book it left in its place.
+    """
+    key = record_key(book)
+    index = positions.get(key)
+    old_book = None if index is None else books[index]
+    if op in ("add", "update"):
+        if index is None:
+            positions[key] = len(books)
+            books.append(book)
+        else:
+            books[index] = book
+        if on_change:
+            on_change(old_book, book)
+    elif op == "remove" and index is not None:
+        books[index] = None  # Tombstone; compacted away by the caller
+        del positions[key]
+        if on_change:
+            on_change(old_book, None)
+
+
+def replay(books, records, on_change=None):
+    """Returns `books` with every (op, book) record applied in order."""
+    books = list(books)
+    positions = {record_key(book): i for i, book in enumerate(books)}
+    for op, book in records:
+        apply_op(books, positions, op, book, on_change)
+    return [book for book in books if book is not None]
+
+
+class JsonStorage:
+    """Stores the library as a JSON snapshot plus an append-only journal.
+
+    library.json keeps its original format (a JSON list of books). Each add,
+    remove or update appends one line to `<path>.log`, so a write costs the
+    size of the change rather than the size of the library. Once the journal
+    grows past COMPACT_EVERY records, a background thread folds it into a new
+    snapshot that replaces the old one with an atomic rename.
+
+    Statistics for each snapshot are written to `<path>.stats`, stamped with
+    the snapshot's size and modification time. Loading starts from them and
+    applies the journal on top, and rebuilds them only if the stamp does
+    not match (e.g. library.json was edited by hand).
+
+    Several processes may share the files. Writes hold `<path>.lock`, and
+    changes_since_load() reads only the journal bytes past the last offset
+    this process has seen. A compaction swaps in a new journal file, so a
+    changed inode tells other processes that they must reload.
+    """
+
+    def __init__(self, path, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.log_path = path + ".log"
+        self.stats_path = path + ".stats"
+        self.location = path
+        self.compact_every = compact_every
+        self.lock = FileLock(path + ".lock")
+        self._log_records = 0
+        self._log_offset = 0 # Journal bytes this process has applied
+        self._log_inode = None # Identifies the journal file those bytes belong to
+        self._compacting = False
+        self._stats = None
+
+    def load(self):
+        with self.lock:
+            open(self.log_path, 'a').close() # Make sure there is a journal to track
+            books = self._read_snapshot()
+            records = self._read_log()
+            self._log_records = len(records)
+            stats = self._read_stats()
+            if stats is None:
+                books = replay(books, records)
+                self._stats = LibraryStats.build(books)
+            else:
+                self._stats = stats
+                books = replay(books, records, on_change=stats.change)
+            if any('id' not in book for book in books):
+                # One-time upgrade of a library written before books had ids
+                for book in books:
+                    book.setdefault('id', new_book_id())
+                self.save(books)
+        return books
+
+    def changes_since_load(self):
+        with self.lock:
+            if not os.path.exists(self.log_path):
+                return None
+            with open(self.log_path, 'rb') as f:
+                info = os.fstat(f.fileno())
+                if info.st_ino != self._log_inode or info.st_size < self._log_offset:
+                    return None # Compacted or rewritten by another process
+                f.seek(self._log_offset)
+                data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]
+        self._log_offset += len(complete)
+        return self._parse_log(complete)
+
+    def load_stats(self, library):
+        if self._stats is None:
+            self._stats = LibraryStats.build(library)
+        return self._stats
+
+    def save(self, library):
+        with self.lock:
+            self._write_snapshot(library)
+            self._truncate_log(0)
+            self._log_offset = 0
+            self._log_inode = os.stat(self.log_path).st_ino
+
+    def add(self, library, book):
+        self._append("add", book)
+
+    def add_many(self, library, books):
+        self._append_many([("add", book) for book in books])
+
+    def remove(self, library, book):
+        self._append("remove", {'id': book['id'], 'title': book.get('title', ''), 'author': book.get('author', '')})
+
+    def update(self, library, book):
+        self._append("update", book)
+
+    def compact(self):
+        """Folds the journal into a new snapshot. Safe to run alongside appends."""
+        with self.lock:
+            info = os.stat(self.log_path)
+            log_end, log_inode = info.st_size, info.st_ino
+            books = replay(self._read_snapshot(), self._read_log(limit=log_end))
+        # Rewriting the snapshot happens outside the lock so that appends are
+        # never blocked behind a full serialize.
+        tmp_path = temp_path_for(self.path)
+        self._write_file(tmp_path, books)
+        stats_tmp_path = self._write_stats(tmp_path, LibraryStats.build(books))
+        with self.lock:
+            if os.stat(self.log_path).st_ino != log_inode:
+                # Another process compacted first; its snapshot already covers ours.
+                os.remove(tmp_path)
+                os.remove(stats_tmp_path)
+                return
+            os.replace(tmp_path, self.path)
+            os.replace(stats_tmp_path, self.stats_path)
+            # Records appended while we were writing stay in the journal.
+            self._truncate_log(log_end)
+            if self._log_inode == log_inode and self._log_offset >= log_end:
+                self._log_offset -= log_end
+                self._log_inode = os.stat(self.log_path).st_ino
+
+    def _append(self, op, book):
+        self._append_many([(op, book)])
+
+    def _append_many(self, records):
+        """Appends records to the journal with a single write and fsync."""
+        if not records:
+            return
+        data = ''.join(json.dumps({"op": op, "book": book}) + "\n" for op, book in records)
+        with self.lock:
+            with open(self.log_path, 'a') as f:
+                start = f.tell()
+                up_to_date = os.fstat(f.fileno()).st_ino == self._log_inode and start == self._log_offset
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                if up_to_date:
+                    # Otherwise leave the offset alone: changes_since_load()
+                    # will pick up other writers' records along with ours.
+                    self._log_offset = f.tell()
+            self._log_records += len(records)
+            should_compact = self._log_records >= self.compact_every and not self._compacting
+            if should_compact:
+                self._compacting = True
+        if should_compact:
+            threading.Thread(target=self._background_compact, daemon=True).start()
+
+    def _background_compact(self):
+        try:
+            self.compact()
+        finally:
+            self._compacting = False
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r') as f:
+            content = f.read()
+        if not content.strip():
+            return []  # Empty file means empty library
+        return json.loads(content)
+
+    def _read_log(self, limit=None):
+        """Returns journal records as (op, book) pairs, dropping a torn last line.
+
+        Reading the whole journal (no `limit`) also marks it as applied for
+        changes_since_load().
+        """
+        if not os.path.exists(self.log_path):
+            return []
+        with open(self.log_path, 'rb') as f:
+            data = f.read() if limit is None else f.read(limit)
+            inode = os.fstat(f.fileno()).st_ino
+        complete = data[:data.rfind(b"\n") + 1]
+        if limit is None:
+            if len(complete) < len(data):
+                # The process died mid-append; cut the partial record off so
+                # the next append starts on a fresh line.
+                with self.lock:
+                    with open(self.log_path, 'r+b') as f:
+                        f.truncate(len(complete))
+            self._log_offset, self._log_inode = len(complete), inode
+        return self._parse_log(complete)
+
+    @staticmethod
+    def _parse_log(complete):
+        records = []
+        for line in complete.decode('utf-8').splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                records.append((entry["op"], entry["book"]))
+        return records
+
+    def _write_snapshot(self, library):
+        tmp_path = temp_path_for(self.path)
+        self._write_file(tmp_path, library)
+        stats_tmp_path = self._write_stats(tmp_path, LibraryStats.build(library))
+        os.replace(tmp_path, self.path)
+        os.replace(stats_tmp_path, self.stats_path)
+
+    def _read_stats(self):
+        """Returns the saved snapshot statistics, or None if they are missing or stale."""
+        if not os.path.exists(self.stats_path) or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.stats_path, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get("snapshot") != self._snapshot_stamp(self.path):
+            return None
+        return LibraryStats.from_dict(saved["counts"])
+
+    def _write_stats(self, snapshot_path, stats):
+        """Writes stats for the snapshot at `snapshot_path` to a temp file and returns its path."""
+        tmp_path = temp_path_for(self.stats_path)
+        with open(tmp_path, 'w') as f:
+            json.dump({"snapshot": self._snapshot_stamp(snapshot_path), "counts": stats.to_dict()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp_path
+
+    @staticmethod
+    def _snapshot_stamp(path):
+        # os.replace keeps size and mtime, so the stamp survives the rename
+        info = os.stat(path)
+        return [info.st_size, info.st_mtime_ns]
+
+    def _truncate_log(self, offset):
+        """Drops the first `offset` bytes of the journal, keeping anything after them."""
+        tail = b""
+        if offset and os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                f.seek(offset)
+                tail = f.read()
+        tmp_path = temp_path_for(self.log_path)
+        with open(tmp_path, 'wb') as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+        self._log_records = tail.count(b"\n")
+
+    @staticmethod
+    def _write_file(path, library):
+        with open(path, 'w') as f:
+            json.dump(library, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class SqliteStorage:
+    """Stores one row per book in SQLite, so add and remove touch a single row.
+
+    Statistics live in the `stats` table and are adjusted in the same
+    transaction as the book rows they count. Every write also records an
+    (op, book) row in `changes`, which changes_since_load() tails so other
+    processes can catch up without re-reading the whole table. A full save()
+    records a "reset" row, which sends them back to a full load().
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            publication_year INTEGER,
+            genre TEXT,
+            read_status INTEGER NOT NULL DEFAULT 0,
+            book_id TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_books_title ON books (title COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_books_author ON books (author COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_books_genre ON books (genre COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_books_read_status ON books (read_status);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS stats (
+            dimension TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (dimension, key)
+        );
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL,
+            book TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path, migrate_from=None):
+        self.path = path
+        self.location = path
+        self.lock = FileLock(path + ".lock")
+        self._last_change = 0 # Highest `changes.seq` this process has applied
+        # Streamlit reruns the script on different threads, so the connection
+        # must not be pinned to the thread that opened it.
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+        self._ensure_book_ids()
+        if migrate_from:
+            self.migrate_from_json(migrate_from)
+        if self._get_meta("stats_built") is None:
+            self._rebuild_stats()
+
+    def migrate_from_json(self, json_path):
+        """Imports an existing library.json once. Returns the number of books imported."""
+        if self._get_meta("migrated_from_json") is not None:
+            return 0
+        books = JsonStorage(json_path).load() if os.path.exists(json_path) else []
+        with self.conn:
+            self._insert_many(books)
+            self._set_meta("migrated_from_json", json_path)
+        self._rebuild_stats()
+        return len(books)
+
+    def load(self):
+        with self.conn:
+            # Both reads in one transaction, so no write slips in between
+            self.conn.execute("BEGIN")
+            books = self._read_books()
+            self._last_change = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        return books
+
+    def changes_since_load(self):
+        oldest = self.conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+        if oldest is not None and oldest > self._last_change + 1:
+            return None # The records we would need have been pruned
+        rows = self.conn.execute(
+            "SELECT seq, op, book FROM changes WHERE seq > ? ORDER BY seq", (self._last_change,)
+        ).fetchall()
+        if any(op == "reset" for _, op, _ in rows):
+            return None # Someone replaced the whole library
+        if rows:
+            self._last_change = rows[-1][0]
+        return [(op, json.loads(book)) for _, op, book in rows]
+
+    def load_stats(self, library):
+        stats = LibraryStats()
+        for dimension, key, count in self.conn.execute("SELECT dimension, key, count FROM stats"):
+            if dimension in stats.counts:
+                stats.counts[dimension][key] = count
+        return stats
+
+    def save(self, library):
+        with self.conn:
+            self.conn.execute("DELETE FROM books")
+            self._insert_many(library)
+            self._record_changes([("reset", {})])
+        self._rebuild_stats()
+
+    def add(self, library, book):
+        self.add_many(library, [book])
+
+    def add_many(self, library, books):
+        with self.conn:
+            self._insert_many(books)
+            for book in books:
+                self._count(book, 1)
+            self._record_changes([("add", book) for book in books])
+
+    def update(self, library, book):
+        with self.conn:
+            old_book = self._find(book['id'])
+            self.conn.execute(
+                "UPDATE books SET title = ?, author = ?, publication_year = ?, genre = ?, read_status = ? "
+                "WHERE book_id = ?",
+                self._book_to_row(book)
+            )
+            if old_book is not None:
+                self._count(old_book, -1)
+                self._count(book, 1)
+                self._record_changes([("update", book)])
+
+    def remove(self, library, book):
+        with self.conn:
+            removed = self.conn.execute("DELETE FROM books WHERE book_id = ?", (book['id'],)).rowcount
+            if removed:
+                self._count(book, -1)
+                self._record_changes([("remove", {'id': book['id']})])
+
+    def _read_books(self):
+        rows = self.conn.execute(
+            f"SELECT {', '.join(BOOK_FIELDS)}, book_id FROM books ORDER BY id"
+        ).fetchall()
+        return [self._row_to_book(row) for row in rows]
+
+    def _find(self, book_id):
+        row = self.conn.execute(
+            f"SELECT {', '.join(BOOK_FIELDS)}, book_id FROM books WHERE book_id = ?", (book_id,)
+        ).fetchone()
+        return self._row_to_book(row) if row else None
+
+    def _record_changes(self, records):
+        """Logs writes for other processes; call inside the write's transaction."""
+        latest = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        self.conn.executemany("INSERT INTO changes (op, book) VALUES (?, ?)",
+                              [(op, json.dumps(book)) for op, book in records])
+        if latest == self._last_change:
+            # Nobody else wrote since we last looked, so we are still caught up
+            self._last_change = latest + len(records)
+        self.conn.execute("DELETE FROM changes WHERE seq <= ?", (latest + len(records) - CHANGES_KEPT,))
+
+    def _count(self, book, delta):
+        """Adjusts the stats rows for `book` by `delta`."""
+        for dimension, key in book_groups(book):
+            self.conn.execute(
+                "INSERT INTO stats (dimension, key, count) VALUES (?, ?, ?) "
+                "ON CONFLICT (dimension, key) DO UPDATE SET count = count + excluded.count",
+                (dimension, key, delta)
+            )
+            self.conn.execute(
+                "DELETE FROM stats WHERE dimension = ? AND key = ? AND count <= 0", (dimension, key)
+            )
+
+    def _rebuild_stats(self):
+        stats = LibraryStats.build(self._read_books()) # Leaves the change cursor alone
+        with self.conn:
+            self.conn.execute("DELETE FROM stats")
+            self.conn.executemany(
+                "INSERT INTO stats (dimension, key, count) VALUES (?, ?, ?)",
+                [(dimension, key, count)
+                 for dimension, counter in stats.counts.items()
+                 for key, count in counter.items()]
+            )
+            self._set_meta("stats_built", "1")
+
+    def _insert_many(self, books):
+        for book in books:
+            book.setdefault('id', new_book_id())
+        self.conn.executemany(
+            f"INSERT INTO books ({', '.join(BOOK_FIELDS)}, book_id) VALUES (?, ?, ?, ?, ?, ?)",
+            [self._book_to_row(book) for book in books]
+        )
+
+    def _ensure_book_ids(self):
+        """Adds the book_id column to databases created before books had ids."""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(books)")]
+        with self.conn:
+            if 'book_id' not in columns:
+                self.conn.execute("ALTER TABLE books ADD COLUMN book_id TEXT")
+            missing = self.conn.execute("SELECT id FROM books WHERE book_id IS NULL").fetchall()
+            self.conn.executemany("UPDATE books SET book_id = ? WHERE id = ?",
+                                  [(new_book_id(), row_id) for (row_id,) in missing])
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_books_book_id ON books (book_id)")
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    @staticmethod
+    def _book_to_row(book):
+        return (
+            book.get('title', ''),
+            book.get('author', ''),
+            book.get('publication_year'),
+            book.get('genre', ''),
+            1 if book.get('read_status', False) else 0,
+            book['id'],
+        )
+
+    @staticmethod
+    def _row_to_book(row):
+        book = dict(zip(BOOK_FIELDS + ('id',), row))
+        book['read_status'] = bool(book['read_status'])
+        return book
+
+
+def open_storage(backend, json_path, db_path):
+    """Creates the storage backend named by `backend` ("json" or "sqlite")."""
+    if backend == "sqlite":
+        return SqliteStorage(db_path, migrate_from=json_path)
+    if backend == "json":
+        return JsonStorage(json_path)
+    raise ValueError(f"Unknown storage backend: {backend!r}")
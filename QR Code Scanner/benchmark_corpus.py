@@ -0,0 +1,153 @@
+"""Decode-performance regression suite over a synthetic QR corpus.
+
+Usage: python benchmark_corpus.py [--images 200] [--seed 0] [--corpus DIR]
+                                  [--output run.json] [--compare baseline.json]
+
+The corpus is first written to disk by a separate process (to DIR if given,
+reused there on later runs with the same --images and --seed), so this
+process only reads and decodes it and its peak memory is that of decoding.
+Every image is decoded with the app's decode path (decoder.decode_image_bytes)
+and throughput, latency percentiles, peak memory and accuracy, overall and
+per distortion, are written to JSON. With --compare, the headline numbers are
+printed next to an earlier run's.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import cv2
+
+from corpus import MANIFEST, read_corpus, read_manifest, write_corpus
+from decoder import decode_image_bytes
+
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024 # bytes on macOS, KiB elsewhere
+
+
+def accuracy(counts):
+    return {
+        'images': counts['images'],
+        'code_recall': counts['found'] / max(counts['expected'], 1),
+        'exact_images': counts['exact'] / max(counts['images'], 1),
+        'wrong_payloads': counts['wrong'],
+    }
+
+
+def prepare_corpus(directory, images, seed):
+    """Writes the corpus to `directory` in a child process, unless it is already there."""
+    if os.path.exists(os.path.join(directory, MANIFEST)):
+        manifest = read_manifest(directory)
+        if (manifest['images'], manifest['seed']) == (images, seed):
+            return
+    # Spawned rather than forked, so generating never adds to this process's peak memory
+    process = multiprocessing.get_context("spawn").Process(target=write_corpus, args=(directory, images, seed))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise SystemExit(f"Generating the corpus failed (exit code {process.exitcode})")
+
+
+def run(directory, images, seed):
+    latencies = []
+    decode_seconds = 0.0
+    totals = defaultdict(int)
+    by_variant = defaultdict(lambda: defaultdict(int))
+    start_rss = peak_rss_mb()
+    for name, data, expected, variant in read_corpus(directory):
+        start = time.perf_counter() # Reading above is not timed
+        result = decode_image_bytes(name, data)
+        seconds = time.perf_counter() - start
+        latencies.append(seconds * 1000)
+        decode_seconds += seconds
+
+        found = len(set(expected) & set(result['payloads']))
+        outcome = {
+            'images': 1,
+            'expected': len(expected),
+            'found': found,
+            'exact': sorted(expected) == sorted(result['payloads']),
+            'wrong': len(set(result['payloads']) - set(expected)),
+        }
+        for counts in [totals] + [by_variant[f"{key}={value}"] for key, value in variant.items()]:
+            for key, value in outcome.items():
+                counts[key] += value
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        'config': {'images': images, 'seed': seed, 'python': platform.python_version(),
+                   'opencv': cv2.__version__, 'machine': platform.machine()},
+        'throughput_images_per_sec': images / max(decode_seconds, 1e-9),
+        'latency_ms': {f"p{pct}": cuts[pct - 1] for pct in PERCENTILES} | {
+            'mean': sum(latencies) / len(latencies), 'max': max(latencies)},
+        'peak_rss_mb': peak_rss_mb(),
+        'start_rss_mb': start_rss,
+        'accuracy': accuracy(totals),
+        'accuracy_by_variant': {name: accuracy(counts) for name, counts in sorted(by_variant.items())},
+    }
+
+
+def compare(report, baseline):
+    rows = [
+        ("images/sec", report['throughput_images_per_sec'], baseline['throughput_images_per_sec']),
+        ("p50 ms", report['latency_ms']['p50'], baseline['latency_ms']['p50']),
+        ("p95 ms", report['latency_ms']['p95'], baseline['latency_ms']['p95']),
+        ("peak RSS MB", report['peak_rss_mb'], baseline['peak_rss_mb']),
+        ("code recall", report['accuracy']['code_recall'], baseline['accuracy']['code_recall']),
+    ]
+    print(f"{'':>12} {'this run':>10} {'baseline':>10} {'change':>8}")
+    for label, current, previous in rows:
+        if current is None or previous is None:
+            continue
+        change = (current - previous) / previous * 100 if previous else 0.0
+        print(f"{label:>12} {current:>10.3f} {previous:>10.3f} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", help="Directory to write the corpus to, or reuse it from")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--compare", help="Earlier report to compare against")
+    args = parser.parse_args()
+    if args.images < 2:
+        parser.error("--images must be at least 2")
+
+    if args.corpus:
+        prepare_corpus(args.corpus, args.images, args.seed)
+        report = run(args.corpus, args.images, args.seed)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            prepare_corpus(directory, args.images, args.seed)
+            report = run(directory, args.images, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    else:
+        print(json.dumps({key: report[key] for key in report if key != 'accuracy_by_variant'}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmarks the app's staged QR decoder against the original full-image decode.
+
+Usage: python benchmark_decode.py [--images 40] [--size 4000 3000] [--dir photos/]
+
+Without --dir, synthetic phone-sized photos are generated with one to three
+QR codes each, so the decode rate can be checked against known payloads.
+With --dir, real images are used and only parity between the two paths is
+reported. Exits non-zero if the staged path decodes fewer of the known
+payloads than the original.
+"""
+import argparse
+import io
+import os
+import random
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from corpus import render_sample
+from decoder import IMAGE_EXTENSIONS, decode_image_bytes
+
+
+def make_photo(rng, size, count):
+    """Returns (jpeg_bytes, payloads) for a noisy, slightly blurred photo with `count` QR codes on it."""
+    seed = rng.randrange(2**32)
+    data, payloads, _ = render_sample(random.Random(seed), seed, size, count, blur=3, noise=12, quality=90)
+    return data, payloads
+
+
+def load_dir(path):
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(os.path.join(path, name), 'rb') as f:
+                yield f.read(), None
+
+
+def original_decode(data):
+    """The app's original decode_qr_code(): full RGB copy and a new detector per image."""
+    img_array = np.array(Image.open(io.BytesIO(data)).convert("RGB"))
+    qcd = cv2.QRCodeDetector()
+    retval, decoded_info, _, _ = qcd.detectAndDecodeMulti(img_array)
+    return [info for info in decoded_info if info] if retval else []
+
+
+def staged_decode(data):
+    """The app's decode path, from encoded bytes to payloads, as the batch pool and services run it."""
+    result = decode_image_bytes("image", data)
+    if result['error']:
+        raise ValueError(result['error'])
+    return result['payloads']
+
+
+def timed(decode, data):
+    start = time.perf_counter()
+    payloads = decode(data)
+    return payloads, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=40, help="Synthetic photos to generate")
+    parser.add_argument("--size", type=int, nargs=2, default=[4000, 3000], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--dir", help="Use the images in this directory instead")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.dir:
+        samples = list(load_dir(args.dir))
+    else:
+        rng = random.Random(args.seed)
+        samples = [make_photo(rng, tuple(args.size), rng.randint(1, 3)) for _ in range(args.images)]
+
+    original_seconds = staged_seconds = 0.0
+    original_hits = staged_hits = expected_total = 0
+    matches = 0
+    for data, expected in samples:
+        original, seconds = timed(original_decode, data)
+        original_seconds += seconds
+        staged, seconds = timed(staged_decode, data)
+        staged_seconds += seconds
+        matches += sorted(original) == sorted(staged)
+        if expected is not None:
+            expected_total += len(expected)
+            original_hits += len(set(expected) & set(original))
+            staged_hits += len(set(expected) & set(staged))
+
+    count = len(samples)
+    if not count:
+        print("No images to benchmark.")
+        return
+    print(f"images:            {count}")
+    print(f"original ms/image: {original_seconds / count * 1000:.1f}")
+    print(f"staged ms/image:   {staged_seconds / count * 1000:.1f}")
+    print(f"speedup:           {original_seconds / max(staged_seconds, 1e-9):.2f}x")
+    print(f"same payloads:     {matches}/{count} images")
+    if expected_total:
+        print(f"original decoded:  {original_hits}/{expected_total} codes")
+        print(f"staged decoded:    {staged_hits}/{expected_total} codes")
+        if staged_hits < original_hits:
+            raise SystemExit("The staged decoder found fewer codes than the original")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Decodes QR codes without the Streamlit UI.
+
+Usage:
+  python cli.py decode PATH [PATH ...] [--workers 4]
+      Decodes image files, directories (recursively) and ZIP archives in
+      parallel, printing one JSON line per image as it finishes. Paths
+      that cannot be read are reported and skipped, and make the exit
+      status 1.
+  python cli.py serve [--host 127.0.0.1] [--port 8765] [--workers 4]
+      Serves POST /decode (raw image bytes in the body, at most 50 MB,
+      JSON result back) and GET /health from a warm decoder pool.
+"""
+import argparse
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from decoder import DecodeService, iter_paths
+
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024 # Largest image the HTTP service accepts
+
+
+def decode_command(args):
+    service = DecodeService(args.workers)
+    images = failures = 0
+    unreadable = []
+
+    def skip(path, error):
+        unreadable.append(path)
+        print(f"error: skipping {path}: {error}", file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    try:
+        for result in service.decode_many(iter_paths(args.paths, on_error=skip)):
+            images += 1
+            failures += bool(result['error'] or not result['payloads'])
+            print(json.dumps(result), flush=True)
+    finally:
+        service.close()
+    elapsed = time.perf_counter() - start
+    print(f"{images} images, {failures} without a QR code, {len(unreadable)} unreadable paths, "
+          f"{images / max(elapsed, 1e-9):.1f} images/sec", file=sys.stderr)
+    return 1 if unreadable else 0
+
+
+class DecodeHandler(BaseHTTPRequestHandler):
+    service = None # Set by serve_command
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/health":
+            self._send(404, {'error': "not found"})
+            return
+        cache = self.service.cache
+        self._send(200, {'status': "ok", 'workers': self.service.workers,
+                         'cache_hits': cache.hits, 'cache_misses': cache.misses})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/decode":
+            self._send(404, {'error': "not found"})
+            return
+        header = self.headers.get('Content-Length')
+        if header is None:
+            self._send(411, {'error': "Content-Length is required"})
+            return
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if length <= 0:
+            self._send(400, {'error': "send the image bytes as the request body"})
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self._send(413, {'error': f"images are limited to {MAX_UPLOAD_BYTES} bytes"})
+            return
+        name = parse_qs(url.query).get('name', ["image"])[0]
+        result = self.service.decode(self.rfile.read(length), name)
+        self._send(422 if result['error'] else 200, result)
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', "application/json")
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve_command(args):
+    DecodeHandler.service = DecodeService(args.workers).warm()
+    server = ThreadingHTTPServer((args.host, args.port), DecodeHandler)
+    print(f"Serving QR decoding on http://{args.host}:{args.port}/decode", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        DecodeHandler.service.close()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    decode = commands.add_parser("decode", help="Decode files, directories and ZIP archives")
+    decode.add_argument("paths", nargs="+")
+    decode.add_argument("--workers", type=int, help="Decoder processes (default: one per CPU)")
+    decode.set_defaults(run=decode_command)
+    serve = commands.add_parser("serve", help="Serve decoding over HTTP")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--workers", type=int, help="Decoder processes (default: one per CPU)")
+    serve.set_defaults(run=serve_command)
+    args = parser.parse_args()
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
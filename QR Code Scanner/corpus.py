@@ -0,0 +1,136 @@
+import json
+import os
+import random
+
+import cv2
+import numpy as np
+
+# Deterministic synthetic QR images for benchmarks. Image i of a corpus is
+# generated from its own seed, so any image can be rebuilt on its own and the
+# same seed always gives byte-identical images. Each image records how it
+# was made, so accuracy can be broken down by distortion. A corpus can be
+# written to a directory once (write_corpus) and read back (read_corpus), so
+# whatever reads it does not pay for generating it. benchmark_decode.py
+# draws its fixed-size photos with render_sample() as well.
+
+IMAGE_SIZES = [(640, 480), (1280, 720), (1920, 1080), (4000, 3000)] # Width, height
+MAX_CODES = 3
+MAX_ROTATION = 45 # Degrees
+BLUR_KERNELS = [0, 0, 3, 5] # 0 means no blur
+NOISE_SIGMAS = [0, 4, 8, 16]
+JPEG_QUALITIES = [None, 95, 75, 50] # None means lossless PNG
+MANIFEST = "manifest.json"
+
+
+def make_payload(rng):
+    kind = rng.choice(["url", "text", "number"])
+    if kind == "url":
+        return f"https://example.com/item/{rng.randrange(10**9)}"
+    if kind == "number":
+        return str(rng.randrange(10**12))
+    words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+    return " ".join(rng.choice(words) for _ in range(rng.randint(2, 8)))
+
+
+def rotate_code(code, angle):
+    """Rotates a code about its centre on a white canvas big enough to hold it."""
+    side = code.shape[0]
+    canvas = int(np.ceil(side * 1.5))
+    offset = (canvas - side) // 2
+    tile = np.full((canvas, canvas), 255, np.uint8)
+    tile[offset:offset + side, offset:offset + side] = code
+    matrix = cv2.getRotationMatrix2D((canvas / 2, canvas / 2), angle, 1.0)
+    return cv2.warpAffine(tile, matrix, (canvas, canvas), flags=cv2.INTER_LINEAR, borderValue=255)
+
+
+def make_sample(seed):
+    """Builds one image with randomly chosen distortions. Returns (encoded_bytes, payloads, variant)."""
+    rng = random.Random(seed)
+    width, height = rng.choice(IMAGE_SIZES)
+    count = rng.randint(1, MAX_CODES)
+    angle = rng.choice([0, rng.uniform(-MAX_ROTATION, MAX_ROTATION)])
+    blur = rng.choice(BLUR_KERNELS)
+    noise = rng.choice(NOISE_SIGMAS)
+    quality = rng.choice(JPEG_QUALITIES)
+    return render_sample(rng, seed, (width, height), count, angle, blur, noise, quality)
+
+
+def render_sample(rng, seed, size, count, angle=0, blur=0, noise=0, quality=None):
+    """Draws `count` codes on a shaded background and encodes the image.
+
+    Payloads, code sizes and placement come from `rng`, and the noise from
+    `seed`. `quality` None writes a PNG, anything else a JPEG of that
+    quality. Returns (encoded_bytes, payloads, variant).
+    """
+    width, height = size
+    gradient = np.linspace(rng.randint(60, 120), rng.randint(140, 200), width, dtype=np.float32)
+    image = np.tile(gradient, (height, 1))
+
+    encoder = cv2.QRCodeEncoder.create()
+    payloads = []
+    cell = width // count # One code per vertical strip, so codes never overlap
+    for i in range(count):
+        payload = make_payload(rng)
+        room = int(min(cell, height) / 1.5)
+        side = rng.randint(max(room // 3, 21), max(room, 21))
+        code = cv2.resize(encoder.encode(payload), (side, side), interpolation=cv2.INTER_NEAREST)
+        tile = rotate_code(code, angle) if angle else code
+        tile_side = min(tile.shape[0], cell, height)
+        tile = tile[:tile_side, :tile_side]
+        x = i * cell + rng.randint(0, cell - tile_side)
+        y = rng.randint(0, height - tile_side)
+        image[y:y + tile_side, x:x + tile_side] = tile
+        payloads.append(payload)
+
+    if blur:
+        image = cv2.GaussianBlur(image, (blur, blur), 0)
+    if noise:
+        image += np.random.default_rng(seed).normal(0, noise, image.shape).astype(np.float32)
+    image = cv2.cvtColor(np.clip(image, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+
+    if quality is None:
+        ok, encoded = cv2.imencode(".png", image)
+    else:
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    variant = {
+        'size': f"{width}x{height}",
+        'codes': count,
+        'rotated': bool(angle),
+        'blur': blur,
+        'noise': noise,
+        'format': "png" if quality is None else f"jpeg{quality}",
+    }
+    return encoded.tobytes(), payloads, variant
+
+
+def iter_corpus(count, seed=0):
+    """Yields (name, encoded_bytes, payloads, variant) for `count` images."""
+    for i in range(count):
+        data, payloads, variant = make_sample(seed * 1_000_003 + i)
+        yield f"synthetic-{seed}-{i:05d}", data, payloads, variant
+
+
+def write_corpus(directory, count, seed=0):
+    """Writes `count` images and a manifest of their payloads and variants to `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    entries = []
+    for name, data, payloads, variant in iter_corpus(count, seed):
+        file_name = f"{name}.{'png' if variant['format'] == 'png' else 'jpg'}"
+        with open(os.path.join(directory, file_name), 'wb') as f:
+            f.write(data)
+        entries.append({'name': name, 'file': file_name, 'payloads': payloads, 'variant': variant})
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump({'images': count, 'seed': seed, 'entries': entries}, f)
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST)) as f:
+        return json.load(f)
+
+
+def read_corpus(directory):
+    """Yields (name, encoded_bytes, payloads, variant) for a corpus written by write_corpus()."""
+    for entry in read_manifest(directory)['entries']:
+        with open(os.path.join(directory, entry['file']), 'rb') as f:
+            data = f.read()
+        yield entry['name'], data, entry['payloads'], entry['variant']
@@ -0,0 +1,331 @@
+import hashlib
+import io
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+# The decode core shared by the Streamlit app, the command line and the HTTP
+# service (cli.py). It runs outside Streamlit, so it can be used from worker
+# processes. Each worker builds one cv2.QRCodeDetector when it starts and
+# reuses it for every image it is given; elsewhere each thread gets its own.
+# DecodeService puts a process pool and a content-hash result cache in front
+# of it, so every caller decodes the same way and shares the same warm state.
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+DETECT_SIDES = (1024, 2048) # Longest sides of the downscaled detection passes
+DECODE_MAX_SIDE = 1600 # Longest side a located region is decoded at
+REGION_MARGIN = 0.15 # Extra border around a located code, as a fraction of its size
+DECODE_CACHE_ENTRIES = 256 # Distinct images whose decode results are kept
+
+_local = threading.local() # One detector per thread; they are not thread-safe
+
+
+def init_worker():
+    """Creates the detector this worker process reuses for every image."""
+    get_detector()
+
+
+def get_detector():
+    if not hasattr(_local, 'detector'):
+        _local.detector = cv2.QRCodeDetector()
+    return _local.detector
+
+
+def decode_full(gray, detector=None):
+    """Decodes every QR code in a grayscale image with one full-size pass."""
+    detector = detector or get_detector()
+    retval, decoded_info, _, _ = detector.detectAndDecodeMulti(gray)
+    return [info for info in decoded_info if info] if retval else []
+
+
+def fit_within(image, max_side):
+    """Downscales `image` so its longest side is at most `max_side`. Returns (image, scale)."""
+    scale = max_side / max(image.shape[:2])
+    if scale >= 1:
+        return image, 1.0
+    size = (max(1, round(image.shape[1] * scale)), max(1, round(image.shape[0] * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA), scale
+
+
+def locate(gray, detector=None):
+    """Returns the bounding boxes (x0, y0, x1, y1) of the QR codes in a grayscale image.
+
+    Detection runs on copies downscaled to each of DETECT_SIDES, never on
+    the full-resolution image, and the boxes found are united: small codes
+    are missed at the smaller size and large or blurred ones are sometimes
+    only found there. A box whose centre lies inside one already found is
+    the same code.
+    """
+    detector = detector or get_detector()
+    height, width = gray.shape[:2]
+    boxes = []
+    for side in DETECT_SIDES:
+        image, scale = fit_within(gray, side)
+        found, points = detector.detectMulti(image)
+        if not found:
+            continue
+        for quad in points:
+            quad = quad / scale
+            x0, y0 = quad.min(axis=0)
+            x1, y1 = quad.max(axis=0)
+            cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+            if any(bx0 <= cx <= bx1 and by0 <= cy <= by1 for bx0, by0, bx1, by1 in boxes):
+                continue
+            margin = max(x1 - x0, y1 - y0) * REGION_MARGIN
+            boxes.append((max(int(x0 - margin), 0), max(int(y0 - margin), 0),
+                          min(int(x1 + margin) + 1, width), min(int(y1 + margin) + 1, height)))
+    return boxes
+
+
+def decode_gray(gray, detector=None):
+    """Decodes every QR code in a grayscale image, cheaply where possible.
+
+    Codes are located with locate(), then each region is cut from the
+    full-resolution image and decoded on its own, which is much cheaper than
+    decoding the whole photo. If nothing is located, or a located region
+    will not decode, the whole image also gets a full-resolution pass and
+    its payloads are added.
+    """
+    detector = detector or get_detector()
+    if max(gray.shape[:2]) <= DETECT_SIDES[0]:
+        return decode_full(gray, detector)
+
+    boxes = locate(gray, detector)
+    payloads = []
+    complete = bool(boxes)
+    for x0, y0, x1, y1 in boxes:
+        region, _ = fit_within(gray[y0:y1, x0:x1], DECODE_MAX_SIDE)
+        info, _, _ = detector.detectAndDecode(region)
+        if info:
+            if info not in payloads:
+                payloads.append(info)
+        else:
+            complete = False # Located but unreadable; let the full pass try
+    if not complete:
+        payloads += [info for info in decode_full(gray, detector) if info not in payloads]
+    return payloads
+
+
+def decode_image_bytes(name, data):
+    """Decodes every QR code in an encoded image. Returns a result dict."""
+    start = time.perf_counter()
+    try:
+        gray = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise ValueError("not a readable image")
+        payloads = decode_gray(gray)
+        error = None
+    except Exception as e:
+        payloads, error = [], str(e)
+    return {
+        'name': name,
+        'payloads': payloads,
+        'error': error,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def iter_zip(name, archive_file):
+    """Yields (name, bytes) for the images in a ZIP archive, one member at a time."""
+    with zipfile.ZipFile(archive_file) as archive:
+        for member in archive.infolist():
+            if not member.is_dir() and member.filename.lower().endswith(IMAGE_EXTENSIONS):
+                yield f"{name}/{member.filename}", archive.read(member)
+
+
+def iter_images(files):
+    """Yields (name, bytes) for uploaded images, unpacking ZIP archives one member at a time."""
+    for uploaded in files:
+        if uploaded.name.lower().endswith(".zip"):
+            yield from iter_zip(uploaded.name, io.BytesIO(uploaded.getvalue()))
+        else:
+            yield uploaded.name, uploaded.getvalue()
+
+
+def iter_paths(paths, on_error=None):
+    """Yields (path, bytes) for image files, directories (recursively) and ZIP archives.
+
+    A path that cannot be read raises, unless `on_error(path, error)` is
+    given; then it is reported there and skipped.
+    """
+    for path in paths:
+        try:
+            if os.path.isdir(path):
+                for root, dirs, names in os.walk(path):
+                    dirs.sort()
+                    yield from iter_paths((os.path.join(root, name) for name in sorted(names)
+                                           if name.lower().endswith(IMAGE_EXTENSIONS + (".zip",))), on_error)
+            elif path.lower().endswith(".zip"):
+                yield from iter_zip(path, path)
+            else:
+                with open(path, 'rb') as f:
+                    yield path, f.read()
+        except (OSError, zipfile.BadZipFile) as e:
+            if on_error is None:
+                raise
+            on_error(path, e)
+
+
+def count_images(files):
+    """Counts the images iter_images() will yield, without reading them."""
+    total = 0
+    for uploaded in files:
+        if uploaded.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(uploaded.getvalue())) as archive:
+                total += sum(1 for member in archive.infolist()
+                             if not member.is_dir() and member.filename.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            total += 1
+    return total
+
+
+def create_pool(workers=None):
+    """Starts a process pool whose workers each hold one warm detector."""
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=init_worker)
+
+
+def decode_many(pool, images, max_pending=None):
+    """Decodes (name, bytes) pairs on `pool`, yielding results as they finish.
+
+    At most `max_pending` images are in flight at once, so a large ZIP is
+    not read into memory all at the same time.
+    """
+    for _, result in decode_tagged(pool, ((None, name, data) for name, data in images), max_pending):
+        yield result
+
+
+def decode_tagged(pool, images, max_pending=None):
+    """Like decode_many(), for (tag, name, bytes) triples; yields (tag, result).
+
+    The tag travels with the image, so results can be matched to what was
+    submitted even when several images share a name.
+    """
+    max_pending = max_pending or (os.cpu_count() or 1) * 4
+    images = iter(images)
+    pending = {}
+    while True:
+        for tag, name, data in images:
+            pending[pool.submit(decode_image_bytes, name, data)] = tag
+            if len(pending) >= max_pending:
+                break
+        if not pending:
+            return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future.result()
+
+
+class ResultCache:
+    """Thread-safe LRU map from image content hash to decoded payloads."""
+
+    def __init__(self, max_entries=DECODE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def key(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            payloads = self._entries.get(key)
+            if payloads is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(payloads)
+
+    def put(self, key, payloads):
+        with self._lock:
+            self._entries[key] = list(payloads)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DecodeService:
+    """A warm decoder process pool behind a shared result cache.
+
+    One instance serves a whole process: the Streamlit app keeps one in
+    st.cache_resource, the CLI and the HTTP service create their own.
+    Results are decode_image_bytes() dicts plus 'cached', True when the
+    payloads came from the cache. Failed decodes are not cached.
+    """
+
+    def __init__(self, workers=None, cache_entries=DECODE_CACHE_ENTRIES):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = ResultCache(cache_entries)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = create_pool(self.workers)
+            return self._pool
+
+    def warm(self):
+        """Starts every worker now, so the first requests do not pay for it."""
+        for future in [self.pool.submit(init_worker) for _ in range(self.workers)]:
+            future.result()
+        return self
+
+    def decode(self, data, name="image", key=None):
+        """Decodes one encoded image on the pool, or answers it from the cache.
+
+        `key` is the image's ResultCache.key(), for callers that already have it.
+        """
+        key = key or self.cache.key(data)
+        payloads = self.cache.get(key)
+        if payloads is not None:
+            return {'name': name, 'payloads': payloads, 'error': None, 'seconds': 0.0, 'cached': True}
+        result = self.pool.submit(decode_image_bytes, name, data).result()
+        return self._store(key, result)
+
+    def decode_many(self, images, max_pending=None):
+        """Decodes (name, bytes) pairs, yielding results as they finish.
+
+        Cached images are answered straight away; the rest go to the pool.
+        """
+        def misses():
+            for name, data in images:
+                key = self.cache.key(data)
+                payloads = self.cache.get(key)
+                if payloads is not None:
+                    hits.append({'name': name, 'payloads': payloads, 'error': None, 'seconds': 0.0,
+                                 'cached': True})
+                    continue
+                yield key, name, data
+
+        hits = deque()
+        for key, result in decode_tagged(self.pool, misses(), max_pending or self.workers * 4):
+            yield from self._drain(hits)
+            yield self._store(key, result)
+        yield from self._drain(hits)
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    @staticmethod
+    def _drain(results):
+        while results:
+            yield results.popleft()
+
+    def _store(self, key, result):
+        if key is not None and result['error'] is None:
+            self.cache.put(key, result['payloads'])
+        result['cached'] = False
+        return result
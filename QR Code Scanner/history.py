@@ -0,0 +1,136 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# --- Scan History ---
+# Every decoded payload is stored as one row in SQLite, indexed by payload
+# and by time, so the history view can page through and search any number
+# of scans with small queries instead of holding them all in memory. The
+# oldest rows are pruned once MAX_SCANS are stored.
+# Pages are fetched by keyset (the id of the last row shown), so a page deep
+# in the history costs the same as the first one. The total number of scans
+# is kept in a counter row that every write adjusts, and filtered counts are
+# cached until the next write.
+
+MAX_SCANS = 1_000_000 # Rows kept; older scans are pruned
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def now_timestamp():
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+class ScanHistory:
+    """Scan history in SQLite, shared by every session of the app."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scans (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            content TEXT NOT NULL COLLATE NOCASE,
+            source TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_scans_content ON scans (content);
+        CREATE INDEX IF NOT EXISTS idx_scans_timestamp ON scans (timestamp);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path, max_scans=MAX_SCANS):
+        self.path = path
+        self.max_scans = max_scans
+        # Sessions run on different threads and share this connection
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+        self._counts = {} # (filters, total, newest id) -> matching scans
+        with self.conn:
+            # Histories written before the counter existed are counted once
+            self.conn.execute("INSERT OR IGNORE INTO meta (key, value) SELECT 'total', COUNT(*) FROM scans")
+
+    def add_many(self, scans):
+        """Stores (content, source) pairs. Returns them as history entries."""
+        timestamp = now_timestamp()
+        entries = [{'timestamp': timestamp, 'content': content, 'source': source} for content, source in scans]
+        if not entries:
+            return entries
+        with self._lock, self.conn:
+            cursor = self.conn.executemany(
+                "INSERT INTO scans (timestamp, content, source) VALUES (?, ?, ?)",
+                [(entry['timestamp'], entry['content'], entry['source']) for entry in entries]
+            )
+            added = cursor.rowcount
+            newest = self.conn.execute("SELECT MAX(id) FROM scans").fetchone()[0]
+            if added and newest > self.max_scans:
+                added -= self.conn.execute("DELETE FROM scans WHERE id <= ?",
+                                           (newest - self.max_scans,)).rowcount
+            self.conn.execute("UPDATE meta SET value = value + ? WHERE key = 'total'", (added,))
+        return entries
+
+    def add(self, content, source=None):
+        return self.add_many([(content, source)])[0]
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM scans")
+            self.conn.execute("UPDATE meta SET value = 0 WHERE key = 'total'")
+
+    def count(self, query="", start_date=None, end_date=None, contains=False):
+        """Returns the number of scans matching the filters."""
+        with self._lock:
+            total = self.conn.execute("SELECT value FROM meta WHERE key = 'total'").fetchone()[0]
+            if not (query or start_date or end_date):
+                return total
+            # The counter and the newest id change with every write
+            newest = self.conn.execute("SELECT MAX(id) FROM scans").fetchone()[0]
+            key = (query, start_date, end_date, contains, total, newest)
+            if key not in self._counts:
+                where, params = self._filters(query, start_date, end_date, contains)
+                self._counts.clear()
+                self._counts[key] = self.conn.execute(f"SELECT COUNT(*) FROM scans {where}", params).fetchone()[0]
+            return self._counts[key]
+
+    def page(self, before=None, limit=20, query="", start_date=None, end_date=None, contains=False):
+        """Returns one page of scans matching the filters, newest first.
+
+        `before` is the 'id' of the last scan of the previous page, or None
+        for the first page.
+        """
+        where, params = self._filters(query, start_date, end_date, contains, before)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, timestamp, content, source FROM scans {where} ORDER BY id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [{'id': scan_id, 'timestamp': timestamp, 'content': content, 'source': source}
+                for scan_id, timestamp, content, source in rows]
+
+    @staticmethod
+    def _filters(query, start_date, end_date, contains, before=None):
+        """Builds the WHERE clause.
+
+        A payload query matches as a case-insensitive prefix, which is a range
+        on the payload index; `contains` matches anywhere in the payload and
+        has to read every row the date range leaves. Dates are inclusive.
+        """
+        clauses, params = [], []
+        if before is not None:
+            clauses.append("id < ?")
+            params.append(before)
+        if query:
+            if contains:
+                clauses.append("instr(lower(content), ?) > 0")
+                params.append(query.lower())
+            else:
+                clauses.append("content >= ? AND content < ?")
+                params += [query, query + "\U0010ffff"]
+        if start_date:
+            clauses.append("timestamp >= ?")
+            params.append(start_date.strftime(DATE_FORMAT))
+        if end_date:
+            clauses.append("timestamp < ?")
+            params.append((end_date + timedelta(days=1)).strftime(DATE_FORMAT))
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+# Live scanning in two threads. The capture thread reads frames as fast as
+# the source delivers them into a one-slot LatestFrame buffer, overwriting
+# whatever the decoder has not picked up yet. The decode thread always takes
+# the newest frame, so a slow decode skips stale frames instead of falling
+# further and further behind, and the preview never waits on the decoder.
+
+SYNTHETIC_SOURCE = "synthetic"
+SYNTHETIC_PAYLOAD = "https://example.com/synthetic-qr"
+SYNTHETIC_SIZE = (640, 480) # Width, height
+DEFAULT_SOURCE_FPS = 30 # Used when a video file does not report its rate
+RATE_WINDOW = 2.0 # Seconds of history used for the FPS figures
+
+
+class SyntheticSource:
+    """A cv2.VideoCapture look-alike that draws a QR code moving over noise."""
+
+    def __init__(self, payload=SYNTHETIC_PAYLOAD, size=SYNTHETIC_SIZE, fps=DEFAULT_SOURCE_FPS,
+                 frames=None, qr_every=1):
+        code = cv2.QRCodeEncoder.create().encode(payload)
+        side = min(size) // 2
+        self.code = cv2.cvtColor(cv2.resize(code, (side, side), interpolation=cv2.INTER_NEAREST),
+                                 cv2.COLOR_GRAY2BGR)
+        self.size = size
+        self.fps = fps
+        self.frames = frames # None means endless
+        self.qr_every = qr_every # Draw the code on every n-th frame only
+        self.index = 0
+        self.rng = np.random.default_rng(0)
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return self.fps if prop == cv2.CAP_PROP_FPS else 0
+
+    def read(self):
+        if self.frames is not None and self.index >= self.frames:
+            return False, None
+        width, height = self.size
+        frame = self.rng.integers(100, 156, (height, width, 3), dtype=np.uint8)
+        if self.index % self.qr_every == 0:
+            side = self.code.shape[0]
+            x = (self.index * 4) % (width - side)
+            y = (height - side) // 2
+            frame[y:y + side, x:x + side] = self.code
+        self.index += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+
+def open_source(source):
+    """Opens a camera index, a video file path or SYNTHETIC_SOURCE.
+
+    Returns (capture, paced): file and synthetic sources are paced to their
+    frame rate so they behave like a live camera.
+    """
+    if source == SYNTHETIC_SOURCE:
+        return SyntheticSource(), True
+    if isinstance(source, int) or str(source).isdigit():
+        return cv2.VideoCapture(int(source)), False
+    return cv2.VideoCapture(str(source)), True
+
+
+class RateMeter:
+    """Events per second over the last RATE_WINDOW seconds."""
+
+    def __init__(self):
+        self.times = deque()
+
+    def tick(self, now=None):
+        now = time.perf_counter() if now is None else now
+        self.times.append(now)
+        while self.times and self.times[0] < now - RATE_WINDOW:
+            self.times.popleft()
+
+    @property
+    def rate(self):
+        if len(self.times) < 2:
+            return 0.0
+        return (len(self.times) - 1) / max(self.times[-1] - self.times[0], 1e-9)
+
+
+class LatestFrame:
+    """A one-slot buffer: writers overwrite, readers wait for something newer."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._captured_at = 0.0
+        self.closed = False
+
+    def put(self, frame, captured_at):
+        with self._condition:
+            self._frame, self._captured_at = frame, captured_at
+            self._seq += 1
+            self._condition.notify_all()
+
+    def get(self, after_seq=0, timeout=None):
+        """Returns (seq, frame, captured_at) for a frame newer than `after_seq`, or None."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > after_seq or self.closed, timeout)
+            if self._seq <= after_seq:
+                return None
+            return self._seq, self._frame, self._captured_at
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class LiveScanner:
+    """Runs a capture thread and a decode thread over one frame source."""
+
+    def __init__(self, source=0):
+        self.capture, self.paced = open_source(source)
+        self.buffer = LatestFrame()
+        self.detector = cv2.QRCodeDetector() # Built once, used only by the decode thread
+        self.capture_rate = RateMeter()
+        self.decode_rate = RateMeter()
+        self.latency = 0.0 # Seconds from capture to decoded result, last frame
+        self.frames_captured = 0
+        self.frames_decoded = 0
+        self.results = [] # (payload, latency) in the order they were decoded
+        self.error = None
+        self._results_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, daemon=True),
+            threading.Thread(target=self._decode_loop, daemon=True),
+        ]
+
+    def start(self):
+        if not self.capture.isOpened():
+            self.error = "Failed to open video source"
+            return self
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.buffer.close()
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(timeout=2)
+        self.capture.release()
+
+    @property
+    def running(self):
+        return not self._stop.is_set() and any(thread.is_alive() for thread in self._threads)
+
+    @property
+    def frames_skipped(self):
+        """Frames captured but never decoded because a newer one arrived first."""
+        return max(self.frames_captured - self.frames_decoded, 0)
+
+    def latest_frame(self):
+        """The newest captured frame (BGR), or None before the first one."""
+        result = self.buffer.get(timeout=0)
+        return result[1] if result else None
+
+    def take_results(self):
+        """Returns and clears the payloads decoded since the last call."""
+        with self._results_lock:
+            results, self.results = self.results, []
+        return results
+
+    def stats(self):
+        return {
+            'capture_fps': self.capture_rate.rate,
+            'decode_fps': self.decode_rate.rate,
+            'latency_ms': self.latency * 1000,
+            'frames_captured': self.frames_captured,
+            'frames_decoded': self.frames_decoded,
+            'frames_skipped': self.frames_skipped,
+        }
+
+    def _capture_loop(self):
+        interval = 1.0 / (self.capture.get(cv2.CAP_PROP_FPS) or DEFAULT_SOURCE_FPS) if self.paced else 0
+        next_frame = time.perf_counter()
+        while not self._stop.is_set():
+            ret, frame = self.capture.read()
+            if not ret:
+                if self.frames_captured == 0:
+                    self.error = "Failed to read from video source"
+                break
+            now = time.perf_counter()
+            self.buffer.put(frame, now)
+            self.frames_captured += 1
+            self.capture_rate.tick(now)
+            if interval:
+                next_frame += interval
+                self._stop.wait(max(next_frame - time.perf_counter(), 0))
+        self.buffer.close()
+
+    def _decode_loop(self):
+        seq = 0
+        while not self._stop.is_set():
+            latest = self.buffer.get(seq, timeout=0.5)
+            if latest is None:
+                if self.buffer.closed:
+                    return
+                continue
+            seq, frame, captured_at = latest
+            try:
+                retval, decoded_info, _, _ = self.detector.detectAndDecodeMulti(frame)
+            except cv2.error:
+                retval, decoded_info = False, ()
+            now = time.perf_counter()
+            self.frames_decoded += 1
+            self.decode_rate.tick(now)
+            self.latency = now - captured_at
+            payloads = [info for info in decoded_info if info] if retval else []
+            if payloads:
+                with self._results_lock:
+                    self.results.extend((payload, self.latency) for payload in payloads)
@@ -1,9 +1,19 @@
 import streamlit as st
 import cv2
-from PIL import Image
-import numpy as np
-from datetime import datetime
+import os
+import tempfile
+import time
+from collections import deque
 
+from decoder import DecodeService, ResultCache, count_images, iter_images
+from history import ScanHistory
+from live_scanner import SYNTHETIC_SOURCE, LiveScanner
+from video_extract import DEFAULT_MOTION_THRESHOLD, DEFAULT_STRIDE, extract_from_video
+
+PREVIEW_FPS = 15 # Default rate the live preview is redrawn at
+HISTORY_DB = "scan_history.db" # SQLite file holding every scan
+HISTORY_PAGE_SIZE = 20 # Scans shown per history page
+RECENT_SCANS = 10 # Scans kept in memory per session
  
 st.set_page_config(
     page_title="QR Code Scanner",
@@ -29,19 +39,101 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Initialize session state for scan history
-if 'scan_history' not in st.session_state:
-    st.session_state.scan_history = []
+# Recent scans of this session; the full history is on disk
+if 'recent_scans' not in st.session_state:
+    st.session_state.recent_scans = deque(maxlen=RECENT_SCANS)
+
+@st.cache_resource
+def get_scan_history():
+    """Scan history database shared by all sessions."""
+    return ScanHistory(HISTORY_DB)
+
+def record_scans(payloads, source):
+    """Saves decoded payloads to the history and this session's recent scans"""
+    entries = get_scan_history().add_many([(payload, source) for payload in payloads])
+    st.session_state.recent_scans.extend(entries)
+
+@st.cache_resource
+def get_decode_service():
+    """Decoder pool and result cache shared by all sessions; each worker keeps one detector warm."""
+    return DecodeService()
+
+def scan_batch(files):
+    """Decodes many uploaded images in parallel, showing results as they finish"""
+    total = max(count_images(files), 1)
+    progress = st.progress(0.0, text="Starting batch scan...")
+    table = st.empty()
+    rows = []
+    failures = 0
+    start = time.perf_counter()
+    for result in get_decode_service().decode_many(iter_images(files)):
+        if result['error'] or not result['payloads']:
+            failures += 1
+        record_scans(result['payloads'], "batch")
+        rows.append({
+            'Image': result['name'],
+            'Decoded Content': "\n".join(result['payloads']) or (result['error'] or "No QR code found"),
+            'Time (ms)': round(result['seconds'] * 1000, 1),
+        })
+        rate = len(rows) / max(time.perf_counter() - start, 1e-9)
+        progress.progress(min(len(rows) / total, 1.0), text=f"{len(rows)} of {total} images scanned ({rate:.1f} images/sec)")
+        table.dataframe(rows, use_container_width=True)
+    elapsed = time.perf_counter() - start
+    progress.progress(1.0, text=f"Done in {elapsed:.1f}s")
+    return len(rows), failures, elapsed
+
+def scan_video(footage, stride, motion_threshold):
+    """Decodes an uploaded video on the shared pool and lists each payload once per sighting"""
+    # OpenCV reads videos from a path, not from memory
+    suffix = os.path.splitext(footage.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        tmp.write(footage.getvalue())
+    progress = st.progress(0.0, text="Reading video...")
+
+    def on_progress(frames_read, total_frames):
+        if total_frames:
+            progress.progress(min(frames_read / total_frames, 1.0), text=f"{frames_read} of {total_frames} frames")
 
-def decode_qr_code(image):
-    """Decode QR code from image"""
     try:
-        img_array = np.array(image.convert("RGB"))
-        qcd = cv2.QRCodeDetector()
-        retval, decoded_info, points, straight_qrcode = qcd.detectAndDecodeMulti(img_array)
-        if retval:
-            return [type('obj', (), {'data': info.encode()}) for info in decoded_info]
-        return []
+        sightings, stats = extract_from_video(tmp.name, stride, motion_threshold,
+                                              pool=get_decode_service().pool, on_progress=on_progress)
+    except Exception as e:
+        st.error(f"Error processing video: {str(e)}")
+        return
+    finally:
+        os.remove(tmp.name)
+    progress.progress(1.0, text=f"Done in {stats['seconds']:.1f}s")
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Frames/sec", f"{stats['frames_per_second']:.1f}")
+    col2.metric("Frames Decoded", stats['frames_decoded'], help=f"of {stats['frames_read']} read")
+    col3.metric("QR Codes Found", len(sightings))
+    if not sightings:
+        st.error("No QR code found in the video.")
+        return
+    st.dataframe([{
+        'Decoded Content': sighting['payload'],
+        'First Seen (s)': round(sighting['first_seen'], 2),
+        'Last Seen (s)': round(sighting['last_seen'], 2),
+        'Frames': sighting['frames'],
+    } for sighting in sightings], use_container_width=True)
+    record_scans([sighting['payload'] for sighting in sightings], "video")
+
+def show_live_stats(placeholders, stats):
+    """Shows capture FPS, decode FPS and latency of the live scanner"""
+    capture_col, decode_col, latency_col = placeholders
+    capture_col.metric("Capture FPS", f"{stats['capture_fps']:.1f}")
+    decode_col.metric("Decode FPS", f"{stats['decode_fps']:.1f}",
+                      help=f"{stats['frames_skipped']} stale frames skipped")
+    latency_col.metric("Latency (ms)", f"{stats['latency_ms']:.0f}")
+
+def decode_qr_code(data, key=None):
+    """Decode QR code from image bytes; repeat images are answered from the shared cache"""
+    try:
+        result = get_decode_service().decode(data, key=key)
+        if result['error']:
+            raise ValueError(result['error'])
+        return [type('obj', (), {'data': info.encode()}) for info in result['payloads']]
     except Exception as e:
         st.error(f"Error processing image: {str(e)}")
         return []
@@ -52,7 +144,7 @@ def main():
     st.title("QR Code Scanner")
     
  
-    tab1, tab2 = st.tabs(["Upload Image", "Use Camera"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Upload Image", "Use Camera", "Batch Scan", "Video File"])
     
     with tab1:
         # Existing upload functionality
@@ -62,11 +154,15 @@ def main():
             help="Upload an image containing a QR code"
         )
         if uploaded_file:
-            image = Image.open(uploaded_file)
-            st.image(image, caption="Uploaded Image", use_column_width=True)
+            data = uploaded_file.getvalue()
+            digest = ResultCache.key(data)
+            st.image(data, caption="Uploaded Image", use_column_width=True)
 
             with st.spinner('Scanning QR Code...'):
-                decoded_objects = decode_qr_code(image)
+                decoded_objects = decode_qr_code(data, digest)
+                # Reruns keep the same upload; record it in history only once
+                new_scan = st.session_state.get('last_upload_digest') != digest
+                st.session_state.last_upload_digest = digest
 
                 if decoded_objects:
                     for obj in decoded_objects:
@@ -79,10 +175,8 @@ def main():
                         """, unsafe_allow_html=True)
                         
                         # history
-                        st.session_state.scan_history.append({
-                            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            'content': decoded_data
-                        })
+                        if new_scan:
+                            record_scans([decoded_data], "upload")
                         
                         # Copy button
                         if st.button('📋 Copy to Clipboard'):
@@ -93,43 +187,94 @@ def main():
 
     with tab2:
         st.write("📸 Live QR Code Scanner")
+        source_type = st.radio("Video source", ["Camera", "Video file", "Synthetic"], horizontal=True)
+        video_file = None
+        if source_type == "Video file":
+            video_file = st.file_uploader("Choose a video file", type=["mp4", "avi", "mov", "mkv"])
+        preview_fps = st.slider("Preview FPS", 1, 30, PREVIEW_FPS,
+                                help="How often the preview is redrawn; decoding runs independently")
         camera_placeholder = st.empty()
-        start_camera = st.button("Start Camera")
-        
+        metric_cols = st.columns(3)
+        metric_placeholders = [col.empty() for col in metric_cols]
+        start_camera = st.button("Start Camera", disabled=source_type == "Video file" and not video_file)
+
         if start_camera:
-            cap = cv2.VideoCapture(0)
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    st.error("Failed to access camera")
-                    break
-                
-                # Convert BGR to RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                camera_placeholder.image(frame_rgb, channels="RGB")
-                
-                # Try to decode QR code
-                qcd = cv2.QRCodeDetector()
-                retval, decoded_info, points, _ = qcd.detectAndDecodeMulti(frame)
-                
-                if retval:
-                    for info in decoded_info:
-                        if info:  # If QR code is detected
-                            cap.release()  # Release camera
-                            st.success(f"QR Code Detected: {info}")
-                            #  history
-                            st.session_state.scan_history.append({
-                                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                'content': info
-                            })
-                            return
-                
-            
-                if not start_camera:
-                    cap.release()
-                    break
-                
-            cap.release()
+            video_path = None
+            if source_type == "Camera":
+                source = 0
+            elif source_type == "Synthetic":
+                source = SYNTHETIC_SOURCE
+            else:
+                # OpenCV reads videos from a path, not from memory
+                suffix = os.path.splitext(video_file.name)[1]
+                with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+                    tmp.write(video_file.getvalue())
+                source = video_path = tmp.name
+
+            scanner = LiveScanner(source).start()
+            try:
+                last_preview = 0.0
+                results = []
+                while scanner.running:
+                    now = time.perf_counter()
+                    if now - last_preview >= 1.0 / preview_fps:
+                        last_preview = now
+                        frame = scanner.latest_frame()
+                        if frame is not None:
+                            camera_placeholder.image(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), channels="RGB")
+                        show_live_stats(metric_placeholders, scanner.stats())
+
+                    results = scanner.take_results()
+                    if results:
+                        break
+                    time.sleep(0.005)
+                else:
+                    # The decoder may have finished the last frames after our last look
+                    results = scanner.take_results()
+
+                if results:
+                    for info, _ in results:
+                        st.success(f"QR Code Detected: {info}")
+                        #  history
+                        record_scans([info], "camera")
+                elif scanner.error:
+                    st.error(scanner.error)
+                else:
+                    st.info("Video ended without a QR code.")
+            finally:
+                scanner.stop()
+                show_live_stats(metric_placeholders, scanner.stats())
+                if video_path:
+                    os.remove(video_path)
+
+    with tab3:
+        st.write("🗂️ Scan many images at once")
+        batch_files = st.file_uploader(
+            "Choose images or ZIP archives",
+            type=["png", "jpg", "jpeg", "zip"],
+            accept_multiple_files=True,
+            help="Images are decoded in parallel across all CPU cores"
+        )
+        if batch_files and st.button("Scan All"):
+            scanned, failures, elapsed = scan_batch(batch_files)
+            if scanned:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Images Scanned", scanned)
+                col2.metric("Images/sec", f"{scanned / max(elapsed, 1e-9):.1f}")
+                col3.metric("Failure Rate", f"{failures / scanned:.1%}")
+            else:
+                st.warning("No images found in the upload.")
+
+    with tab4:
+        st.write("🎞️ Extract QR codes from recorded footage")
+        footage = st.file_uploader("Choose a video file", type=["mp4", "avi", "mov", "mkv"], key="footage")
+        col1, col2 = st.columns(2)
+        stride = col1.number_input("Frame stride", min_value=1, value=DEFAULT_STRIDE,
+                                   help="Decode every n-th frame")
+        motion_threshold = col2.slider("Motion threshold", 0.0, 20.0, DEFAULT_MOTION_THRESHOLD,
+                                       help="Frames that changed less than this are not decoded again (0 decodes all)")
+        if footage and st.button("Extract QR Codes"):
+            scan_video(footage, stride, motion_threshold)
 
     with st.sidebar:
         st.header("📖 Instructions")
@@ -152,22 +297,58 @@ def main():
     col1, col2 = st.columns([2, 1])
 
     with col1:
+        history = get_scan_history()
         # Add clear history button
-        if st.session_state.scan_history:
+        if history.count():
             if st.button("🗑️ Clear History"):
-                st.session_state.scan_history = []
+                history.clear()
+                st.session_state.recent_scans.clear()
                 st.rerun()
                 
         st.header("📜 Scan History")
-        if st.session_state.scan_history:
-            for scan in reversed(st.session_state.scan_history):
+        search_col, dates_col = st.columns(2)
+        query = search_col.text_input("Search payloads", placeholder="Starts with...")
+        contains = search_col.checkbox("Match anywhere in the payload", help="Slower on large histories")
+        dates = dates_col.date_input("Date range", value=(), help="Leave empty for all dates")
+        start_date = dates[0] if len(dates) > 0 else None
+        end_date = dates[1] if len(dates) > 1 else start_date
+
+        total = history.count(query, start_date, end_date, contains)
+        if total:
+            # Where each page starts; paging is by keyset, so pages are walked one at a time
+            filters = (query, start_date, end_date, contains)
+            if st.session_state.get('history_filters') != filters:
+                st.session_state.history_filters = filters
+                st.session_state.history_cursors = [None]
+            cursors = st.session_state.history_cursors
+            scans = history.page(cursors[-1], HISTORY_PAGE_SIZE, *filters)
+            pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+            st.caption(f"{total} scans · page {len(cursors)} of {pages}")
+            for scan in scans:
                 st.markdown(f"""
                 **Time:** {scan['timestamp']}  
                 **Content:** {scan['content']}
                 ---
                 """)
+            newer_col, older_col = st.columns(2)
+            if newer_col.button("⬅️ Newer", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+            if older_col.button("Older ➡️", disabled=len(scans) < HISTORY_PAGE_SIZE or len(cursors) >= pages):
+                cursors.append(scans[-1]['id'])
+                st.rerun()
+        elif query or dates:
+            st.info("No scans match your search.")
         else:
             st.info("No scans yet. Upload an image to get started!")
 
+    with col2:
+        st.header("🕘 Recent Scans")
+        if st.session_state.recent_scans:
+            for scan in reversed(st.session_state.recent_scans):
+                st.markdown(f"**{scan['timestamp'][11:]}** · {scan['content']}")
+        else:
+            st.caption("Scans from this session appear here.")
+
 if __name__ == "__main__":
     main()
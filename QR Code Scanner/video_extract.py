@@ -0,0 +1,172 @@
+"""Extracts QR payloads from a recorded video file.
+
+Usage: python video_extract.py VIDEO [--stride 2] [--motion-threshold 2.0] [--workers 4]
+
+Prints one JSON line per sighting (payload, first and last timestamp) and a
+summary with frames/sec on stderr. Runs without Streamlit.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import cv2
+
+from decoder import create_pool, decode_gray
+
+# Frames are read in order on the calling thread, thinned out by a frame
+# stride and by skipping frames that barely differ from the last decoded one,
+# and decoded on a process pool. Results are consumed in frame order so a
+# payload seen on consecutive frames is reported once, with the time it
+# first and last appeared.
+
+DEFAULT_STRIDE = 1
+DEFAULT_MOTION_THRESHOLD = 2.0 # Mean grey-level change below which a frame counts as unchanged
+MOTION_THUMBNAIL = (64, 36) # Size frames are shrunk to before comparing them
+MISSED_FRAMES_ALLOWED = 2 # Sampled frames a payload may vanish for and still be the same sighting
+DEFAULT_FPS = 30 # Used when the file does not report its rate
+
+
+def decode_frame(index, timestamp, gray):
+    """Worker task: decodes one grayscale frame."""
+    return index, timestamp, decode_gray(gray)
+
+
+def sample_frames(capture, stride=DEFAULT_STRIDE, motion_threshold=DEFAULT_MOTION_THRESHOLD, stats=None):
+    """Yields (index, timestamp, gray) for the frames worth decoding.
+
+    `gray` is None for a sampled frame that looks the same as the last decoded
+    one; its payloads are taken to be unchanged. Frames between strides are
+    only grabbed, never decoded into images.
+    """
+    fps = capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+    stats = stats if stats is not None else {}
+    last_thumbnail = None
+    index = -1
+    while capture.grab():
+        index += 1
+        stats['frames_read'] = index + 1
+        if index % stride:
+            continue
+        ret, frame = capture.retrieve()
+        if not ret:
+            break
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        timestamp = index / fps
+        if motion_threshold > 0:
+            thumbnail = cv2.resize(gray, MOTION_THUMBNAIL, interpolation=cv2.INTER_AREA)
+            if last_thumbnail is not None and cv2.absdiff(thumbnail, last_thumbnail).mean() < motion_threshold:
+                stats['frames_unchanged'] = stats.get('frames_unchanged', 0) + 1
+                yield index, timestamp, None
+                continue
+            last_thumbnail = thumbnail
+        stats['frames_decoded'] = stats.get('frames_decoded', 0) + 1
+        yield index, timestamp, gray
+
+
+def decode_in_order(pool, frames, max_pending):
+    """Decodes frames on `pool`, yielding (index, timestamp, payloads) in frame order.
+
+    Unchanged frames (gray is None) repeat the payloads of the frame before.
+    """
+    pending = deque()
+    last_payloads = []
+
+    def finish(item):
+        nonlocal last_payloads
+        if isinstance(item, tuple):
+            index, timestamp = item
+            return index, timestamp, last_payloads
+        index, timestamp, last_payloads = item.result()
+        return index, timestamp, last_payloads
+
+    for index, timestamp, gray in frames:
+        if gray is None:
+            pending.append((index, timestamp))
+        else:
+            pending.append(pool.submit(decode_frame, index, timestamp, gray))
+        while len(pending) > max_pending:
+            yield finish(pending.popleft())
+    while pending:
+        yield finish(pending.popleft())
+
+
+class SightingTracker:
+    """Merges per-frame payloads into sightings with first and last timestamps."""
+
+    def __init__(self, missed_allowed=MISSED_FRAMES_ALLOWED):
+        self.missed_allowed = missed_allowed
+        self.open = {} # payload -> [sighting, sampled frames since last seen]
+        self.sightings = []
+
+    def add(self, timestamp, payloads):
+        for payload in set(payloads):
+            if payload in self.open:
+                entry = self.open[payload]
+                entry[0]['last_seen'] = timestamp
+                entry[0]['frames'] += 1
+                entry[1] = 0
+            else:
+                sighting = {'payload': payload, 'first_seen': timestamp, 'last_seen': timestamp, 'frames': 1}
+                self.sightings.append(sighting)
+                self.open[payload] = [sighting, 0]
+        for payload in list(self.open):
+            if payload not in payloads:
+                self.open[payload][1] += 1
+                if self.open[payload][1] > self.missed_allowed:
+                    del self.open[payload]
+
+
+def extract_from_video(path, stride=DEFAULT_STRIDE, motion_threshold=DEFAULT_MOTION_THRESHOLD,
+                       pool=None, workers=None, on_progress=None):
+    """Decodes a video file. Returns (sightings, stats).
+
+    `on_progress(frames_read, total_frames)` is called after every sampled
+    frame is decoded. A pool is created, and shut down, if none is given.
+    """
+    capture = cv2.VideoCapture(str(path))
+    if not capture.isOpened():
+        raise ValueError(f"cannot open video {path}")
+    total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+    own_pool = pool is None
+    pool = pool or create_pool(workers)
+    stats = {'frames_read': 0, 'frames_decoded': 0, 'frames_unchanged': 0}
+    tracker = SightingTracker()
+    start = time.perf_counter()
+    try:
+        frames = sample_frames(capture, max(1, stride), motion_threshold, stats)
+        for _, timestamp, payloads in decode_in_order(pool, frames, (workers or os.cpu_count() or 1) * 2):
+            tracker.add(timestamp, payloads)
+            if on_progress:
+                on_progress(stats['frames_read'], total_frames)
+    finally:
+        capture.release()
+        if own_pool:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+    stats['seconds'] = elapsed
+    stats['frames_per_second'] = stats['frames_read'] / max(elapsed, 1e-9)
+    return tracker.sightings, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("video")
+    parser.add_argument("--stride", type=int, default=DEFAULT_STRIDE, help="Decode every n-th frame")
+    parser.add_argument("--motion-threshold", type=float, default=DEFAULT_MOTION_THRESHOLD,
+                        help="Skip frames that changed less than this (0 decodes all sampled frames)")
+    parser.add_argument("--workers", type=int, help="Decoder processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    sightings, stats = extract_from_video(args.video, args.stride, args.motion_threshold, workers=args.workers)
+    for sighting in sightings:
+        print(json.dumps(sighting))
+    print(f"{stats['frames_read']} frames read, {stats['frames_decoded']} decoded, "
+          f"{stats['frames_unchanged']} unchanged, {stats['frames_per_second']:.1f} frames/sec",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Converts columns of a CSV, Parquet or NumPy (.npy) file between units.
+
+Usage: python bulk.py INPUT OUTPUT --convert COLUMN:FROM:TO [--convert ...]
+                      [--chunk-rows 1000000] [--verify]
+
+COLUMN is a column name, or a column index for .npy files (a 1-D array is
+column 0). FROM and TO are unit names or symbols, e.g. speed:km/h:m/s.
+The output has the same format and columns as the input, with the given
+columns converted. Rows/sec is printed when done; --verify also checks a
+sample of every chunk against the scalar conversion.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from units import REGISTRY
+
+# Files are read and written DEFAULT_CHUNK_ROWS rows at a time, so memory use
+# depends on the chunk size, not the file size. Each column is converted with
+# one vectorized multiply-add, using the (factor, offset) the registry has
+# already resolved for the scalar conversions. pandas and pyarrow are only
+# imported for the CSV and Parquet paths, so the rest of the converter works
+# without them.
+
+FORMATS = ("csv", "parquet", "npy")
+DEFAULT_CHUNK_ROWS = 1_000_000
+VERIFY_ROWS = 1000 # Rows per chunk checked against the scalar conversion with --verify
+
+
+def file_format(name):
+    kind = os.path.splitext(name)[1].lower().lstrip(".")
+    if kind not in FORMATS:
+        raise ValueError(f"Unsupported file type '{name}': use .csv, .parquet or .npy")
+    return kind
+
+
+def resolve(conversions, registry=REGISTRY):
+    """Maps {column: (from_unit, to_unit)} to {column: (from_unit, to_unit, factor, offset)}."""
+    return {column: (from_unit, to_unit) + registry.conversion(from_unit, to_unit)
+            for column, (from_unit, to_unit) in conversions.items()}
+
+
+def convert_values(values, factor, offset):
+    """values * factor + offset as a new float64 array."""
+    result = np.multiply(values, factor, dtype=np.float64)
+    result += offset
+    return result
+
+
+def verify(original, converted, from_unit, to_unit, registry=REGISTRY):
+    """Checks the first VERIFY_ROWS values against registry.convert(); raises ValueError if any differ."""
+    original = np.asarray(original[:VERIFY_ROWS], dtype=np.float64)
+    expected = np.array([registry.convert(value, from_unit, to_unit) for value in original.tolist()])
+    if not np.allclose(np.asarray(converted[:VERIFY_ROWS]), expected, rtol=1e-12, atol=1e-12, equal_nan=True):
+        raise ValueError(f"Vectorized {from_unit} -> {to_unit} conversion differs from the scalar one")
+
+
+def convert_frame(frame, resolved, check=False):
+    """Converts the columns of a DataFrame chunk in place."""
+    for column, (from_unit, to_unit, factor, offset) in resolved.items():
+        if column not in frame.columns:
+            raise ValueError(f"No column '{column}'")
+        try:
+            values = frame[column].to_numpy(dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"Column '{column}' is not numeric") from None
+        converted = convert_values(values, factor, offset)
+        if check:
+            verify(values, converted, from_unit, to_unit)
+        frame[column] = converted
+
+
+def convert_csv(src, dst, resolved, chunk_rows, check, on_progress):
+    import pandas as pd
+
+    rows = 0
+    for chunk in pd.read_csv(src, chunksize=chunk_rows):
+        convert_frame(chunk, resolved, check)
+        chunk.to_csv(dst, header=rows == 0, index=False, mode='w' if rows == 0 else 'a')
+        rows += len(chunk)
+        on_progress(rows)
+    if rows == 0:
+        pd.read_csv(src, nrows=0).to_csv(dst, index=False)
+    return rows
+
+
+def convert_parquet(src, dst, resolved, chunk_rows, check, on_progress):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = 0
+    source = pq.ParquetFile(src)
+    writer = None
+    try:
+        for batch in source.iter_batches(batch_size=chunk_rows):
+            frame = batch.to_pandas()
+            convert_frame(frame, resolved, check)
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(dst, table.schema)
+            writer.write_table(table)
+            rows += len(frame)
+            on_progress(rows)
+        if writer is None:
+            pq.write_table(source.schema_arrow.empty_table(), dst)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def convert_npy(src, dst, resolved, chunk_rows, check, on_progress):
+    if not isinstance(src, (str, os.PathLike)):
+        # File objects (e.g. uploads) are copied to disk, so they are memory-mapped like paths
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "source.npy")
+            with open(path, 'wb') as f:
+                shutil.copyfileobj(src, f)
+            return convert_npy(path, dst, resolved, chunk_rows, check, on_progress)
+    source = np.load(src, mmap_mode='r')
+    columns = npy_columns(source.shape, source.dtype)
+    for column in resolved:
+        if not isinstance(column, int) or not 0 <= column < columns:
+            raise ValueError(f"No column {column!r}: the array has {columns}")
+    # Floating arrays keep their precision; anything else becomes float64
+    dtype = source.dtype if np.issubdtype(source.dtype, np.floating) else np.float64
+    out = np.lib.format.open_memmap(dst, mode='w+', dtype=dtype, shape=source.shape)
+    for start in range(0, len(source), chunk_rows):
+        chunk = source[start:start + chunk_rows]
+        out[start:start + chunk_rows] = chunk
+        for column, (from_unit, to_unit, factor, offset) in resolved.items():
+            values = chunk if source.ndim == 1 else chunk[:, column]
+            converted = convert_values(values, factor, offset)
+            if check:
+                verify(values, converted, from_unit, to_unit)
+            if source.ndim == 1:
+                out[start:start + chunk_rows] = converted
+            else:
+                out[start:start + chunk_rows, column] = converted
+        on_progress(min(start + chunk_rows, len(source)))
+    out.flush()
+    return len(source)
+
+
+CONVERTERS = {'csv': convert_csv, 'parquet': convert_parquet, 'npy': convert_npy}
+NPY_HEADER_READERS = {(1, 0): np.lib.format.read_array_header_1_0, (2, 0): np.lib.format.read_array_header_2_0}
+
+
+def npy_columns(shape, dtype):
+    """The number of columns of a .npy array; raises ValueError for arrays convert_npy() cannot handle."""
+    if dtype.names is not None:
+        raise ValueError("Structured .npy arrays are not supported; save one numeric array instead")
+    if not (np.issubdtype(dtype, np.number) or np.issubdtype(dtype, np.bool_)):
+        raise ValueError(f"Expected a numeric .npy array, got dtype {dtype}")
+    if len(shape) not in (1, 2):
+        raise ValueError(f"Expected a 1-D or 2-D array, got {len(shape)}-D")
+    return 1 if len(shape) == 1 else shape[1]
+
+
+def list_columns(src, kind):
+    """The columns of a file that convert_file() accepts: names, or indexes for .npy."""
+    if kind == "csv":
+        import pandas as pd
+
+        columns = list(pd.read_csv(src, nrows=0).columns)
+    elif kind == "parquet":
+        import pyarrow.parquet as pq
+
+        columns = pq.ParquetFile(src).schema_arrow.names
+    else:
+        if isinstance(src, (str, os.PathLike)):
+            array = np.load(src, mmap_mode='r')
+            shape, dtype = array.shape, array.dtype
+        else:
+            version = np.lib.format.read_magic(src)
+            if version not in NPY_HEADER_READERS:
+                raise ValueError(f".npy format version {version[0]}.{version[1]} is not supported; "
+                                 "save the array with numpy.save() and default options")
+            shape, _, dtype = NPY_HEADER_READERS[version](src)
+        columns = list(range(npy_columns(shape, dtype)))
+    if hasattr(src, "seek"):
+        src.seek(0)
+    return columns
+
+
+def convert_file(src, dst, conversions, kind=None, chunk_rows=DEFAULT_CHUNK_ROWS, check=False, on_progress=None):
+    """Converts the columns in `conversions` ({column: (from_unit, to_unit)}) of `src` into `dst`.
+
+    `src` is a path or a binary file object (such as an upload) and `dst` a
+    path; `kind` ("csv", "parquet" or "npy") defaults to the extension of `src`.
+    `on_progress(rows)` is called after every chunk. Returns (rows, seconds).
+    """
+    kind = kind or file_format(src)
+    resolved = resolve(conversions)
+    start = time.perf_counter()
+    rows = CONVERTERS[kind](src, dst, resolved, chunk_rows, check, on_progress or (lambda rows: None))
+    return rows, time.perf_counter() - start
+
+
+def parse_conversion(text, kind):
+    """Parses COLUMN:FROM:TO; the column may itself contain colons."""
+    parts = text.rsplit(":", 2)
+    if len(parts) != 3:
+        raise argparse.ArgumentTypeError(f"Expected COLUMN:FROM:TO, got '{text}'")
+    column, from_unit, to_unit = parts
+    return (int(column) if kind == "npy" else column), (from_unit, to_unit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--convert", action="append", required=True, metavar="COLUMN:FROM:TO")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--verify", action="store_true", help="Check every chunk against the scalar conversion")
+    args = parser.parse_args()
+
+    kind = file_format(args.input)
+    if file_format(args.output) != kind:
+        parser.error("INPUT and OUTPUT must be the same file type")
+    try:
+        conversions = dict(parse_conversion(text, kind) for text in args.convert)
+        rows, seconds = convert_file(args.input, args.output, conversions, kind, args.chunk_rows, args.verify)
+    except (ValueError, argparse.ArgumentTypeError) as e:
+        parser.exit(1, f"error: {e}\n")
+    print(f"Converted {rows:,} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
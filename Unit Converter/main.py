@@ -1,4 +1,11 @@
 import streamlit as st
+import os
+import tempfile
+
+from bulk import FORMATS, convert_file, file_format, list_columns
+from units import REGISTRY
+
+MAX_DOWNLOAD_BYTES = 200 * 2**20 # Largest converted file offered as a browser download
 
  
 st.set_page_config(
@@ -57,34 +64,6 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Function to convert length
-def convert_length(value, from_unit, to_unit):
-    conversion_factors = {
-        'meters': 1.0,
-        'kilometers': 0.001,
-        'miles': 0.000621371,
-        'feet': 3.28084
-    }
-    return value * conversion_factors[to_unit] / conversion_factors[from_unit]
-
-# Function to convert temperature
-def convert_temperature(value, from_unit, to_unit):
-    if from_unit == 'Celsius' and to_unit == 'Fahrenheit':
-        return value * 9/5 + 32
-    elif from_unit == 'Fahrenheit' and to_unit == 'Celsius':
-        return (value - 32) * 5/9
-    return value
-
-# Function to convert weight
-def convert_weight(value, from_unit, to_unit):
-    conversion_factors = {
-        'kilograms': 1.0,
-        'grams': 1000.0,
-        'pounds': 2.20462,
-        'ounces': 35.274
-    }
-    return value * conversion_factors[to_unit] / conversion_factors[from_unit]
-
 # Main app with enhanced UI
 st.title('🔄 Smart Unit Converter')
 
@@ -93,7 +72,7 @@ col1, col2 = st.columns([1, 1])
 
 with col1:
     st.markdown("### Select Category")
-    category = st.selectbox('', ['Length', 'Temperature', 'Weight'], 
+    category = st.selectbox('', list(REGISTRY.categories), 
                           help="Choose the type of conversion you want to perform",
                           key='category_select')
 
@@ -106,39 +85,17 @@ with col2:
 # Create two columns for input and output units
 unit_col1, unit_col2 = st.columns([1, 1])
 
-# Conversion logic with enhanced UI
-if category == 'Length':
-    with unit_col1:
-        st.markdown("### From")
-        from_unit = st.selectbox('', ['meters', 'kilometers', 'miles', 'feet'],
-                                key='length_from')
-    with unit_col2:
-        st.markdown("### To")
-        to_unit = st.selectbox('', ['meters', 'kilometers', 'miles', 'feet'],
-                              key='length_to')
-    result = convert_length(value, from_unit, to_unit)
-
-elif category == 'Temperature':
-    with unit_col1:
-        st.markdown("### From")
-        from_unit = st.selectbox('', ['Celsius', 'Fahrenheit'],
-                                key='temp_from')
-    with unit_col2:
-        st.markdown("### To")
-        to_unit = st.selectbox('', ['Celsius', 'Fahrenheit'],
-                              key='temp_to')
-    result = convert_temperature(value, from_unit, to_unit)
-
-elif category == 'Weight':
-    with unit_col1:
-        st.markdown("### From")
-        from_unit = st.selectbox('', ['kilograms', 'grams', 'pounds', 'ounces'],
-                                key='weight_from')
-    with unit_col2:
-        st.markdown("### To")
-        to_unit = st.selectbox('', ['kilograms', 'grams', 'pounds', 'ounces'],
-                              key='weight_to')
-    result = convert_weight(value, from_unit, to_unit)
+# Conversion logic with enhanced UI: unit lists come from the registry
+units = REGISTRY.categories[category]
+with unit_col1:
+    st.markdown("### From")
+    from_unit = st.selectbox('', units, format_func=lambda name: f"{name} ({REGISTRY.unit(name).symbol})",
+                            key=f'{category}_from')
+with unit_col2:
+    st.markdown("### To")
+    to_unit = st.selectbox('', units, format_func=lambda name: f"{name} ({REGISTRY.unit(name).symbol})",
+                          key=f'{category}_to')
+result = REGISTRY.convert(value, from_unit, to_unit)
 
 # Display result with enhanced styling
 st.markdown("---")
@@ -152,6 +109,39 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# Bulk conversion of whole files, between the units selected above
+st.markdown("---")
+st.markdown("### Bulk Conversion")
+uploaded_file = st.file_uploader("Upload a CSV, Parquet or NumPy (.npy) file", type=list(FORMATS))
+if uploaded_file:
+    kind = file_format(uploaded_file.name)
+    try:
+        file_columns = list_columns(uploaded_file, kind)
+    except (ValueError, ImportError) as e:
+        st.error(f"❌ {e}")
+        file_columns = []
+    columns = st.multiselect(f"Columns to convert from {from_unit} to {to_unit}", file_columns)
+    if columns and st.button("Convert File"):
+        progress = st.empty()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, f"converted.{kind}")
+            try:
+                rows, seconds = convert_file(uploaded_file, output,
+                                             {column: (from_unit, to_unit) for column in columns}, kind,
+                                             on_progress=lambda rows: progress.info(f"⏳ {rows:,} rows converted"))
+            except (ValueError, ImportError) as e:
+                progress.error(f"❌ {e}")
+            else:
+                progress.success(f"✅ Converted {rows:,} rows in {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/sec)")
+                size = os.path.getsize(output)
+                if size > MAX_DOWNLOAD_BYTES:
+                    st.warning(f"The converted file is {size / 2**20:,.0f} MB, too large to download from "
+                               f"the browser. Convert it with `python bulk.py` instead.")
+                else:
+                    with open(output, 'rb') as f: # Handed over as a file, not read into a bytes copy here
+                        st.download_button("⬇️ Download Converted File", f,
+                                           file_name=f"converted_{uploaded_file.name}")
+
 # Add information cards
 st.markdown("---")
 st.markdown("### Quick Reference")
@@ -0,0 +1,94 @@
+"""convert_file() must agree with REGISTRY.convert() for every value it converts.
+
+Run with: python -m pytest -q test_bulk.py
+"""
+import numpy as np
+import pytest
+
+from bulk import convert_file, list_columns
+from units import REGISTRY
+
+CONVERSIONS = [
+    ("Celsius", "Fahrenheit"),
+    ("kilometers per hour", "m/s"),
+    ("mi", "km"),
+    ("kWh", "kcal"),
+]
+
+
+def sample_values(count=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 1000, count)
+    values[:4] = [0.0, -273.15, 1e300, np.nan]
+    return values
+
+
+def expected(values, from_unit, to_unit):
+    return np.array([REGISTRY.convert(value, from_unit, to_unit) for value in values.tolist()])
+
+
+@pytest.mark.parametrize("from_unit, to_unit", CONVERSIONS)
+def test_npy_matches_scalar(tmp_path, from_unit, to_unit):
+    values = sample_values()
+    src, dst = tmp_path / "in.npy", tmp_path / "out.npy"
+    np.save(src, np.column_stack([values, values]))
+    rows, _ = convert_file(str(src), str(dst), {1: (from_unit, to_unit)}, chunk_rows=777)
+    out = np.load(dst)
+    assert rows == len(values)
+    np.testing.assert_array_equal(out[:, 0], values)
+    np.testing.assert_allclose(out[:, 1], expected(values, from_unit, to_unit), rtol=1e-12)
+
+
+@pytest.mark.parametrize("from_unit, to_unit", CONVERSIONS)
+def test_csv_matches_scalar(tmp_path, from_unit, to_unit):
+    pd = pytest.importorskip("pandas")
+    values = sample_values()
+    src, dst = tmp_path / "in.csv", tmp_path / "out.csv"
+    pd.DataFrame({"reading": values, "label": "x"}).to_csv(src, index=False)
+    read_back = pd.read_csv(src)["reading"].to_numpy() # CSV round-trips through text
+    convert_file(str(src), str(dst), {"reading": (from_unit, to_unit)}, chunk_rows=777)
+    out = pd.read_csv(dst)
+    assert list(out.columns) == ["reading", "label"]
+    np.testing.assert_allclose(out["reading"].to_numpy(), expected(read_back, from_unit, to_unit), rtol=1e-12)
+
+
+@pytest.mark.parametrize("from_unit, to_unit", CONVERSIONS)
+def test_parquet_matches_scalar(tmp_path, from_unit, to_unit):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    values = sample_values()
+    src, dst = tmp_path / "in.parquet", tmp_path / "out.parquet"
+    pd.DataFrame({"reading": values}).to_parquet(src, index=False)
+    convert_file(str(src), str(dst), {"reading": (from_unit, to_unit)}, chunk_rows=777)
+    out = pd.read_parquet(dst)["reading"].to_numpy()
+    np.testing.assert_allclose(out, expected(values, from_unit, to_unit), rtol=1e-12)
+
+
+def test_npy_keeps_floating_dtype(tmp_path):
+    src, dst = tmp_path / "in.npy", tmp_path / "out.npy"
+    np.save(src, np.arange(10, dtype=np.float32))
+    convert_file(str(src), str(dst), {0: ("km", "m")})
+    out = np.load(dst)
+    assert out.dtype == np.float32
+    np.testing.assert_array_equal(out, np.arange(10, dtype=np.float32) * 1000)
+
+    np.save(src, np.arange(10, dtype=np.int32))
+    convert_file(str(src), str(dst), {0: ("km", "m")})
+    assert np.load(dst).dtype == np.float64
+
+
+def test_npy_columns_from_upload(tmp_path):
+    path = tmp_path / "in.npy"
+    np.save(path, np.zeros((3, 4)))
+    with open(path, 'rb') as f:
+        assert list_columns(f, "npy") == [0, 1, 2, 3]
+        assert f.tell() == 0
+
+
+def test_npy_rejects_structured_arrays(tmp_path):
+    path = tmp_path / "in.npy"
+    np.save(path, np.zeros(3, dtype=[("a", "f8"), ("b", "f8")]))
+    with open(path, 'rb') as f, pytest.raises(ValueError, match="Structured"):
+        list_columns(f, "npy")
+    with pytest.raises(ValueError, match="Structured"):
+        convert_file(str(path), str(tmp_path / "out.npy"), {0: ("km", "m")})
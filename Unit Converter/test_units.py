@@ -0,0 +1,29 @@
+"""REGISTRY must convert within a quantity kind and refuse to convert across kinds.
+
+Run with: python -m pytest -q test_units.py
+"""
+import pytest
+
+from units import REGISTRY, UnitRegistry
+
+
+def test_same_dimension_different_kind():
+    assert REGISTRY.unit("J").dimension == REGISTRY.unit("N·m").dimension
+    with pytest.raises(ValueError, match="Cannot convert"):
+        REGISTRY.convert(1, "J", "N·m")
+    with pytest.raises(ValueError, match="Cannot convert"):
+        REGISTRY.conversion("kWh", "lbf·ft")
+
+
+def test_conversions_within_a_kind():
+    assert REGISTRY.convert(1, "kJ", "J") == pytest.approx(1000)
+    assert REGISTRY.convert(1, "kgf·m", "N·m") == pytest.approx(9.80665)
+    assert REGISTRY.convert(100, "°C", "°F") == pytest.approx(212)
+
+
+def test_kind_defaults_to_category():
+    registry = UnitRegistry()
+    registry.define("meters", "m", "Length", "length")
+    registry.define("wavelength", "λ", "Optics", "m", kind="Length")
+    assert registry.unit("λ").category == "Optics"
+    assert registry.build().convert(2, "λ", "m") == 2
@@ -0,0 +1,221 @@
+import re
+
+# --- Unit Registry ---
+# Every unit is declared once: its category (for the UI), its dimension as a
+# vector of exponents of the base dimensions, and how to turn a value into
+# the base unit of that dimension, base = value * scale + offset. Only
+# temperatures have an offset. Compound units such as km/h or N·m are
+# declared as expressions over units already defined, so their dimension and
+# scale follow from their parts. Every unit also has a quantity kind (its
+# category unless given), because a dimension does not always tell
+# quantities apart: torque and energy are both kg·m²/s². Once all units are
+# declared, build() works out the (factor, offset) between every pair of
+# units of the same dimension and kind, so a conversion is one dictionary
+# lookup and a multiply-add.
+
+BASE_DIMENSIONS = ("length", "mass", "time", "temperature", "current", "amount", "luminosity")
+SUPERSCRIPTS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻", "0123456789-")
+FACTOR = re.compile(r"([^\s·*/^⁰¹²³⁴⁵⁶⁷⁸⁹⁻]+)(?:\^?([-⁻]?[\d⁰¹²³⁴⁵⁶⁷⁸⁹]+))?")
+
+
+class Unit:
+    """A unit: value * scale + offset is the value in the base unit of its dimension."""
+
+    __slots__ = ('name', 'symbol', 'category', 'kind', 'dimension', 'scale', 'offset')
+
+    def __init__(self, name, symbol, category, dimension, scale=1.0, offset=0.0, kind=None):
+        self.name = name
+        self.symbol = symbol
+        self.category = category
+        self.kind = kind or category
+        self.dimension = dimension
+        self.scale = scale
+        self.offset = offset
+
+    def __repr__(self):
+        return f"Unit({self.name!r}, {self.symbol!r}, scale={self.scale}, offset={self.offset})"
+
+
+class UnitRegistry:
+    """Units by name and symbol, and the conversion between every compatible pair."""
+
+    def __init__(self):
+        self.units = {}
+        self.categories = {}
+        self._symbols = {}
+        self._table = {}
+
+    def define(self, name, symbol, category, definition, scale=1.0, offset=0.0, kind=None):
+        """Declares a unit.
+
+        `definition` is a base dimension name, for the base unit of that
+        dimension, or an expression over units already defined such as "m",
+        "km/h" or "kg·m/s²". The unit is `scale` of that expression, plus
+        `offset` in the base unit (e.g. Celsius is "K" plus 273.15).
+        Units only convert to units of the same `kind`, which defaults to
+        `category`.
+        """
+        if name in self.units or symbol in self._symbols:
+            raise ValueError(f"Unit '{name}' ({symbol}) is already defined")
+        if definition in BASE_DIMENSIONS:
+            dimension = tuple(int(base == definition) for base in BASE_DIMENSIONS)
+            base_scale = 1.0
+        else:
+            dimension, base_scale = self.parse(definition)
+        unit = Unit(name, symbol, category, dimension, base_scale * scale, offset, kind)
+        self.units[name] = unit
+        self._symbols[symbol] = unit
+        self.categories.setdefault(category, []).append(name)
+        self._table.clear()
+        return unit
+
+    def parse(self, expression):
+        """Returns (dimension, scale) for a product/quotient of defined units, e.g. "N·m" or "mi/h"."""
+        dimension = [0] * len(BASE_DIMENSIONS)
+        scale = 1.0
+        sign = 1
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            char = expression[position]
+            if char in " ·*":
+                position += 1
+                continue
+            if char == "/":
+                sign = -1
+                position += 1
+                continue
+            factor = FACTOR.match(expression, position)
+            if not factor:
+                raise ValueError(f"Cannot parse unit expression '{expression}'")
+            unit = self.unit(factor.group(1))
+            if unit.offset:
+                raise ValueError(f"'{unit.name}' has an offset and cannot be part of a compound unit")
+            power = sign * int(factor.group(2).translate(SUPERSCRIPTS)) if factor.group(2) else sign
+            dimension = [total + power * exponent for total, exponent in zip(dimension, unit.dimension)]
+            scale *= unit.scale ** power
+            position = factor.end()
+        return tuple(dimension), scale
+
+    def unit(self, name):
+        """Looks a unit up by name or symbol."""
+        unit = self.units.get(name) or self._symbols.get(name)
+        if unit is None:
+            raise ValueError(f"Unknown unit '{name}'")
+        return unit
+
+    def build(self):
+        """Resolves the (factor, offset) between every pair of units of the same dimension and kind."""
+        by_quantity = {}
+        for unit in self.units.values():
+            by_quantity.setdefault((unit.dimension, unit.kind), []).append(unit)
+        table = {}
+        for units in by_quantity.values():
+            for source in units:
+                for target in units:
+                    # value * source.scale + source.offset == result * target.scale + target.offset
+                    factor = source.scale / target.scale
+                    offset = (source.offset - target.offset) / target.scale
+                    table[source.name, target.name] = (factor, offset)
+        self._table = table
+        return self
+
+    def conversion(self, from_unit, to_unit):
+        """Returns (factor, offset) such that to = from * factor + offset."""
+        if not self._table:
+            self.build()
+        from_unit, to_unit = self.unit(from_unit), self.unit(to_unit)
+        try:
+            return self._table[from_unit.name, to_unit.name]
+        except KeyError:
+            raise ValueError(f"Cannot convert {from_unit.name} ({from_unit.category}) "
+                             f"to {to_unit.name} ({to_unit.category})") from None
+
+    def convert(self, value, from_unit, to_unit):
+        factor, offset = self.conversion(from_unit, to_unit)
+        return value * factor + offset
+
+
+def default_registry():
+    registry = UnitRegistry()
+    define = registry.define
+
+    define("meters", "m", "Length", "length")
+    define("kilometers", "km", "Length", "m", 1000)
+    define("centimeters", "cm", "Length", "m", 0.01)
+    define("millimeters", "mm", "Length", "m", 0.001)
+    define("miles", "mi", "Length", "m", 1609.344)
+    define("yards", "yd", "Length", "m", 0.9144)
+    define("feet", "ft", "Length", "m", 0.3048)
+    define("inches", "in", "Length", "m", 0.0254)
+    define("nautical miles", "nmi", "Length", "m", 1852)
+
+    define("kilograms", "kg", "Weight", "mass")
+    define("grams", "g", "Weight", "kg", 0.001)
+    define("milligrams", "mg", "Weight", "kg", 1e-6)
+    define("tonnes", "t", "Weight", "kg", 1000)
+    define("pounds", "lb", "Weight", "kg", 0.45359237)
+    define("ounces", "oz", "Weight", "lb", 1 / 16)
+    define("stones", "st", "Weight", "lb", 14)
+
+    define("Kelvin", "K", "Temperature", "temperature")
+    define("Celsius", "°C", "Temperature", "K", 1, 273.15)
+    define("Fahrenheit", "°F", "Temperature", "K", 5 / 9, 273.15 - 32 * 5 / 9)
+    define("Rankine", "°R", "Temperature", "K", 5 / 9)
+
+    define("seconds", "s", "Time", "time")
+    define("minutes", "min", "Time", "s", 60)
+    define("hours", "h", "Time", "s", 3600)
+    define("days", "d", "Time", "s", 86400)
+    define("weeks", "wk", "Time", "d", 7)
+
+    define("square meters", "m²", "Area", "m²")
+    define("square kilometers", "km²", "Area", "km²")
+    define("square feet", "ft²", "Area", "ft²")
+    define("square miles", "mi²", "Area", "mi²")
+    define("hectares", "ha", "Area", "m²", 10_000)
+    define("acres", "ac", "Area", "ft²", 43_560)
+
+    define("liters", "L", "Volume", "m³", 0.001)
+    define("milliliters", "mL", "Volume", "L", 0.001)
+    define("cubic meters", "m³", "Volume", "m³")
+    define("US gallons", "gal", "Volume", "in³", 231)
+    define("US fluid ounces", "fl oz", "Volume", "gal", 1 / 128)
+
+    define("meters per second", "m/s", "Speed", "m/s")
+    define("kilometers per hour", "km/h", "Speed", "km/h")
+    define("miles per hour", "mph", "Speed", "mi/h")
+    define("feet per second", "ft/s", "Speed", "ft/s")
+    define("knots", "kn", "Speed", "nmi/h")
+
+    define("newtons", "N", "Force", "kg·m/s²")
+    define("kilonewtons", "kN", "Force", "N", 1000)
+    define("pounds-force", "lbf", "Force", "lb·m/s²", 9.80665)
+    define("kilograms-force", "kgf", "Force", "kg·m/s²", 9.80665)
+
+    define("newton meters", "N·m", "Torque", "N·m")
+    define("pound-force feet", "lbf·ft", "Torque", "lbf·ft")
+    define("kilogram-force meters", "kgf·m", "Torque", "kgf·m")
+
+    define("joules", "J", "Energy", "N·m")
+    define("kilojoules", "kJ", "Energy", "J", 1000)
+    define("calories", "cal", "Energy", "J", 4.184)
+    define("kilocalories", "kcal", "Energy", "cal", 1000)
+    define("watt hours", "Wh", "Energy", "J", 3600)
+    define("kilowatt hours", "kWh", "Energy", "Wh", 1000)
+
+    define("pascals", "Pa", "Pressure", "N/m²")
+    define("kilopascals", "kPa", "Pressure", "Pa", 1000)
+    define("bar", "bar", "Pressure", "Pa", 100_000)
+    define("atmospheres", "atm", "Pressure", "Pa", 101_325)
+    define("pounds per square inch", "psi", "Pressure", "lbf/in²")
+
+    return registry.build()
+
+
+REGISTRY = default_registry()
+
+
+def convert(value, from_unit, to_unit):
+    """Converts `value` between two units of REGISTRY, by name or symbol."""
+    return REGISTRY.convert(value, from_unit, to_unit)